@@ -0,0 +1 @@
+"""Benchmarks for the gradebook commands on synthetic workbooks (run with ``python -m benchmarks``)."""  # noqa: W505
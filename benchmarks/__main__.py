@@ -0,0 +1,65 @@
+"""Run the benchmark suite and write the timings as JSON."""
+import contextlib
+import json
+import os
+import pathlib
+import platform
+import sys
+import tempfile
+
+import click
+from benchmarks import suite
+
+
+@click.command()
+@click.option("--students", type=click.IntRange(min=1), default=100, show_default=True)
+@click.option("--sheets", type=click.IntRange(min=1), default=10, show_default=True)
+@click.option("--columns", type=click.IntRange(min=1), default=10, show_default=True)
+@click.option(
+    "--sparsity",
+    type=click.FloatRange(0, 1),
+    default=0.2,
+    show_default=True,
+    help="Fraction of score cells left blank.",
+)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option(
+    "--backend",
+    "backends",
+    multiple=True,
+    help="Backend to benchmark (repeatable); by default every backend available here.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True, path_type=pathlib.Path),
+    help="Write the results to this file instead of standard output.",
+)
+def _cli(students, sheets, columns, sparsity, seed, backends, output):
+    """Benchmark populate-student-sheets and update-student-sheets on a synthetic gradebook."""
+    with tempfile.TemporaryDirectory() as directory:
+        # The commands print a line per student; keep that out of the results.
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            timings = suite.run(
+                pathlib.Path(directory), students, sheets, columns, sparsity, seed, backends
+            )
+    results = {
+        "parameters": {
+            "students": students,
+            "sheets": sheets,
+            "columns": columns,
+            "sparsity": sparsity,
+            "seed": seed,
+        },
+        "platform": platform.platform(),
+        "python": sys.version.split()[0],
+        "timings": [timing._asdict() for timing in timings],
+    }
+    text = json.dumps(results, indent=1)
+    if output is None:
+        print(text)
+    else:
+        output.write_text(text + "\n", encoding="UTF-8")
+
+
+if __name__ == "__main__":
+    _cli()
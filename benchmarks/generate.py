@@ -0,0 +1,83 @@
+"""Generate synthetic TeacherBook/studentTemplate pairs of a chosen size."""
+import pathlib
+import random
+import shutil
+import typing
+
+import student_teacher_gradebook
+from student_teacher_gradebook import _config
+
+SOURCE_DIR = pathlib.Path(__file__).parent.parent / "source"
+TEACHER_BOOK_NAME = "TeacherBook.xlsx"
+TEMPLATE_NAME = "studentTemplate.xlsx"
+_FILENAME_FORMAT = "{name}_gradebook.xlsx"
+
+
+class Gradebook(typing.NamedTuple):
+    """Files of a generated gradebook."""
+
+    teacher_book: pathlib.Path
+    template: pathlib.Path
+    students: typing.List[str]
+    sheets: typing.List[str]
+
+
+def generate(
+    directory: pathlib.Path,
+    students: int,
+    sheets: int,
+    columns: int,
+    sparsity: float = 0.0,
+    seed: int = 0,
+    session: typing.Optional[student_teacher_gradebook.Session] = None,
+) -> Gradebook:
+    """Write a teacher book with students x sheets x columns of scores into directory.
+
+    sparsity is the fraction of score cells left blank. Each grade sheet lists the students in
+    a shuffled order, and the roster has no student files yet, so populate-student-sheets
+    has to run before update-student-sheets.
+    """
+    directory = directory.resolve()
+    directory.mkdir(parents=True, exist_ok=True)
+    randomizer = random.Random(seed)
+    teacher_book = directory / TEACHER_BOOK_NAME
+    template = directory / TEMPLATE_NAME
+    shutil.copy2(SOURCE_DIR / TEACHER_BOOK_NAME, teacher_book)
+    shutil.copy2(SOURCE_DIR / TEMPLATE_NAME, template)
+
+    names = [f"Student {index:05d}" for index in range(students)]
+    sheet_names = [f"Assignment {index + 1}" for index in range(sheets)]
+    owns_session = session is None
+    session = session if session is not None else student_teacher_gradebook.Session()
+    try:
+        workbook = session.app.open_workbook(teacher_book.resolve())
+        for name in workbook.worksheet_names():
+            if name not in (_config.CONFIG_SHEET_NAME, _config.ROSTER_SHEET_NAME):
+                workbook.remove_sheet(name)
+        workbook.set_block(_config.CONFIG_SHEET_NAME, 2, 2, [[_FILENAME_FORMAT]])
+        workbook.set_block(
+            _config.ROSTER_SHEET_NAME,
+            2,
+            1,
+            [[f"s{index:07d}", name] for index, name in enumerate(names)],
+        )
+        for sheet_name in reversed(sheet_names):  # sheets are added in front
+            workbook.add_sheet(sheet_name)
+            order = names[:]
+            randomizer.shuffle(order)
+            rows = [["Name"] + [f"Item {column + 1}" for column in range(columns)]]
+            rows.extend(
+                [name]
+                + [
+                    None if randomizer.random() < sparsity else randomizer.randint(0, 100)
+                    for _ in range(columns)
+                ]
+                for name in order
+            )
+            workbook.set_block(sheet_name, 1, 1, rows)
+        workbook.save()
+        workbook.close()
+    finally:
+        if owns_session:
+            session.close()
+    return Gradebook(teacher_book, template, names, sheet_names)
@@ -0,0 +1,113 @@
+"""Time each phase of populate-student-sheets and update-student-sheets on a generated gradebook.
+
+The commands run as the CLI runs them, with the phases they mark for --profile collected per
+command, so a regression shows up against the phase that caused it rather than only in the
+total.
+"""
+import contextlib
+import os
+import pathlib
+import sys
+import typing
+
+from benchmarks import generate
+
+import student_teacher_gradebook
+import student_teacher_gradebook.__main__
+from student_teacher_gradebook import _config, _profiling
+
+
+class PhaseTiming(typing.NamedTuple):
+    """Time spent in one phase of a command; count is how many times the phase ran."""
+
+    backend: str
+    command: str
+    phase: str
+    count: int
+    seconds: float
+    max_seconds: float
+
+
+def available_backends() -> typing.List[str]:
+    """The backends that can run here (the in-memory test backend is not benchmarked)."""
+    backends = ["ooxml"]
+    if sys.platform == "win32":
+        try:
+            import win32com.client  # noqa: F401 - only checking that it is installed.
+        except ImportError:
+            pass
+        else:
+            backends.append("excel")
+    return backends
+
+
+@contextlib.contextmanager
+def _configured(backend: str, gradebook: generate.Gradebook) -> typing.Iterator[None]:
+    # The commands read their files and backend from the config, and roster student files are
+    # relative to the working directory, as for the CLI.
+    settings = {
+        "BACKEND": backend,
+        "SOURCE_DIR": gradebook.teacher_book.parent,
+        "TEACHER_BOOK": gradebook.teacher_book,
+        "STUDENT_TEMPLATE": gradebook.template,
+    }
+    previous_settings = {name: getattr(_config, name) for name in settings}
+    previous_directory = pathlib.Path.cwd()
+    for name, value in settings.items():
+        setattr(_config, name, value)
+    os.chdir(gradebook.teacher_book.parent)
+    try:
+        yield
+    finally:
+        os.chdir(previous_directory)
+        for name, value in previous_settings.items():
+            setattr(_config, name, value)
+
+
+def _timings(backend: str, command: str, profiler: _profiling.Profiler) -> typing.List[PhaseTiming]:
+    return [
+        PhaseTiming(backend, command, name, count, total, longest)
+        for name, count, total, longest in profiler.summary()
+    ]
+
+
+def run_populate(
+    backend: str, gradebook: generate.Gradebook, workers: int = 8
+) -> typing.List[PhaseTiming]:
+    """Time populate-student-sheets on gradebook."""
+    with _configured(backend, gradebook), _profiling.collecting() as profiler:
+        student_teacher_gradebook.__main__._populate_student_sheets(workers)
+    return _timings(backend, "populate-student-sheets", profiler)
+
+
+def run_update(
+    backend: str, gradebook: generate.Gradebook, jobs: int = 1
+) -> typing.List[PhaseTiming]:
+    """Time update-student-sheets (with every student stale) on a populated gradebook."""
+    with _configured(backend, gradebook), _profiling.collecting() as profiler:
+        with student_teacher_gradebook.Session() as session:
+            student_teacher_gradebook.__main__._update_student_sheets(
+                session, jobs, force=True, diff=False
+            )
+    return _timings(backend, "update-student-sheets", profiler)
+
+
+def run(
+    directory: pathlib.Path,
+    students: int,
+    sheets: int,
+    columns: int,
+    sparsity: float = 0.0,
+    seed: int = 0,
+    backends: typing.Optional[typing.Iterable[str]] = None,
+) -> typing.List[PhaseTiming]:
+    """Generate a gradebook per backend under directory, then populate and update it."""
+    timings = []
+    for backend in backends or available_backends():
+        with student_teacher_gradebook.Session(backend) as session:
+            gradebook = generate.generate(
+                directory / backend, students, sheets, columns, sparsity, seed, session=session
+            )
+        timings.extend(run_populate(backend, gradebook))
+        timings.extend(run_update(backend, gradebook))
+    return timings
@@ -4,13 +4,17 @@ import datetime
 import hashlib
 import logging
 import pathlib
-import shutil
 import typing
 
-import win32com
-import win32com.client as win32
-
-from student_teacher_gradebook import _config
+from student_teacher_gradebook import (
+    _backends,
+    _config,
+    _extraction,
+    _parse_cache,
+    _profiling,
+    _projection,
+    _roster,
+)
 
 _MODULE_LOGGER = logging.getLogger(__name__)
 _MODULE_LOGGER.addHandler(logging.NullHandler())
@@ -18,81 +22,95 @@ _StrOrPath = typing.Union[str, pathlib.Path]
 
 EXCEL_FIRST_ROW_OF_DATA = 1
 _TABLE_OFFSET = 1
+_ROSTER_FIRST_ROW = EXCEL_FIRST_ROW_OF_DATA + _TABLE_OFFSET
+_ROSTER_WRITE_CHUNK_ROWS = 500
 
 
-def _get_win32com_cache_path():
-    return pathlib.Path(win32com.__gen_path__)
-
 def clear_win32com_cache():
-    path = _get_win32com_cache_path()
-    shutil.rmtree(path)
+    """Delete the code win32com generates for the Excel type library."""
+    from student_teacher_gradebook._backends import excel
 
-class _VBA_Consts:  # noqa: N801
-    xlUp = -4162  # noqa: N815 - matching Excel convention
+    excel.clear_win32com_cache()
 
 
-def _excel_column_number_to_name(column_number):
-    """Type convert from integer to base 26 (A=1).
+# Column letters to numbers and back (A is 1), shared with the backends.
+_excel_column_number_to_name = _backends.column_name
+_excel_column_name_to_number = _backends.column_number
 
-    >>> _excel_column_number_to_name(1)
-    'A'
 
-    >>> _excel_column_number_to_name(2)
-    'B'
+class Session:
+    """One spreadsheet application shared by every workbook opened during a run.
 
-    >>> _excel_column_number_to_name(26)
-    'Z'
-
-    >>> _excel_column_number_to_name(27)
-    'AA'
-    """
-    output = ""
-    index = column_number - 1
-    while index >= 0:
-        character = chr((index % 26) + ord("A"))
-        output = output + character
-        index = index // 26 - 1
-
-    return output[::-1]
-
-
-def _excel_column_name_to_number(column_name: str):
-    """Type convert from base 26 (A=1) to decimal.
-
-    >>> _excdel_column_name_to_number('A')
-    1
-    >>> _excdel_column_name_to_number('B')
-    2
-    >>> _excdel_column_name_to_number('Z')
-    26
-    >>> _excdel_column_name_to_number('AA')
-    27
+    The application is started on first use and shut down by :meth:`close` (or on leaving
+    the ``with`` block), so a run pays the start-up cost once instead of once per workbook.
     """
-    result = 0
-    for i, char in enumerate(column_name[::-1]):
-        result += 26**i * (ord(char) - ord("A") + 1)
-    return result
+
+    def __init__(self, backend: typing.Optional[str] = None, new_instance: bool = False) -> None:
+        """Prepare a session for backend (default: the configured backend).
+
+        Pass new_instance for a session that must not share its application with other
+        processes, e.g. in a worker process.
+        """
+        self._backend = backend or _config.BACKEND
+        self._new_instance = new_instance
+        self._app: typing.Optional[_backends.Application] = None
+        self._parse_caches: typing.Dict[pathlib.Path, _parse_cache.ParseCache] = {}
+
+    @property
+    def backend(self) -> str:
+        """Name of the backend the session uses."""
+        return self._backend
+
+    @property
+    def app(self) -> _backends.Application:
+        """The running application, started if needed."""
+        if self._app is None:
+            self._app = _backends.get_application(self._backend, new_instance=self._new_instance)
+        return self._app
+
+    def parse_cache(
+        self, path: pathlib.Path, workbook: _backends.Workbook
+    ) -> _parse_cache.ParseCache:
+        """The parse cache of the workbook at path, opened as workbook.
+
+        It is kept for the session, so a workbook opened again (by ``watch``, say) reuses
+        what was already parsed and decoded instead of loading the cache file again.
+        """
+        cache = self._parse_caches.get(path)
+        if cache is None:
+            cache = self._parse_caches[path] = _parse_cache.ParseCache(path, workbook)
+        else:
+            cache.attach(workbook)
+        return cache
+
+    def bulk_edit(self) -> typing.ContextManager[None]:
+        """Context in which the application defers redrawing and recalculation."""
+        return self.app.bulk_edit()
+
+    def close(self):
+        """Shut the application down, if it was started."""
+        if self._app is not None:
+            self._app.quit()
+        self._app = None
+
+    def __enter__(self):
+        """Use the session for the duration of the context."""
+        return self
+
+    def __exit__(self, *exc):
+        """Close the session after the context."""
+        self.close()
 
 
 class _BaseWorkBook:
-    def __init__(self, path: _StrOrPath) -> None:
+    def __init__(self, path: _StrOrPath, session: typing.Optional[Session] = None) -> None:
         self._path = pathlib.Path(path).resolve()
-        self._workbook = None
-        try:
-            self._app = win32.gencache.EnsureDispatch("Excel.Application")
-        except AttributeError:
-            _MODULE_LOGGER.warning("Failed to load win32com - likely a cache problem. Clearing the cache.")
-            clear_win32com_cache()
-            import importlib
-            import sys
-            for module in list(sys.modules):
-                if module.startswith("win32com.") or module.startswith("win32."):
-                    del sys.modules[module]
-            importlib.reload(win32com)
-            importlib.reload(win32)
-            importlib.reload(win32.gencache)
-        self._app = win32.gencache.EnsureDispatch("Excel.Application")
-        self._app.Visible = True
+        self._workbook: typing.Optional[_backends.Workbook] = None
+        # Without a shared session, the workbook runs (and closes) its own.
+        self._owns_session = session is None
+        self._session = session if session is not None else Session()
+        self._parse_cache: typing.Optional[_parse_cache.ParseCache] = None
+        self._changed_sheets: typing.Set[str] = set()  # lower-cased names edited since opening
 
     def _workbook_must_be_opened(inner):  # noqa: N805 - class-level decorator.
         def wrapper(self, *args, **kwargs):
@@ -102,19 +120,20 @@ class _BaseWorkBook:
 
         return wrapper
 
-    @staticmethod
-    def _open_workbook(xlapp, xlfile):
-        xlwb = xlapp.Workbooks.Open(xlfile)
-        return xlwb
-
     def open(self):
-        self._workbook = _BaseWorkBook._open_workbook(self._app, str(self._path))
+        _profiling.count("workbook_opens")
+        with _profiling.phase("open", path=self._path.name):
+            self._workbook = self._session.app.open_workbook(self._path)
 
     def save(self):
-        self._workbook.Save()
+        _profiling.count("workbook_saves")
+        with _profiling.phase("save", path=self._path.name):
+            self._workbook.save()
 
     def close(self):
-        self._workbook.Close()
+        self._workbook.close()
+        if self._owns_session:
+            self._session.close()
 
     @_workbook_must_be_opened
     def set_column_range(
@@ -124,11 +143,12 @@ class _BaseWorkBook:
         column_index: typing.Union[int, str],
         values: typing.Iterable[typing.Any],
     ):
-        sheet = self._workbook.Worksheets(sheet_name)
         if isinstance(column_index, str):
             column_index = _excel_column_name_to_number(column_index)
-        for i, value in enumerate(values):
-            sheet.Cells(start_row_index + i, column_index).Value = value
+        rows = [[value] for value in values]
+        _profiling.count("cells_written", len(rows))
+        self._changed_sheets.add(sheet_name.lower())
+        self._workbook.set_block(sheet_name, start_row_index, column_index, rows)
 
     @_workbook_must_be_opened
     def set_row_range(
@@ -138,63 +158,158 @@ class _BaseWorkBook:
         row_index: int,
         values: typing.Iterable[typing.Any],
     ):
-        sheet = self._workbook.Worksheets(sheet_name)
+        self.set_block_range(sheet_name, start_column_index, row_index, [values])
+
+    @_workbook_must_be_opened
+    def set_block_range(
+        self,
+        sheet_name: str,
+        start_column_index: typing.Union[int, str],
+        start_row_index: int,
+        rows: typing.Iterable[typing.Iterable[typing.Any]],
+    ):
+        """Write a 2D array of values (as text, like set_row_range) in one call."""
         if isinstance(start_column_index, str):
             start_column_index = _excel_column_name_to_number(start_column_index)
-        for i, value in enumerate(values):
-            sheet.Cells(row_index, start_column_index + i).Value = str(value)
+        block = [[str(value) for value in row] for row in rows]
+        if _profiling.is_enabled():
+            _profiling.count("cells_written", sum(len(row) for row in block))
+        self._changed_sheets.add(sheet_name.lower())
+        self._workbook.set_block(sheet_name, start_row_index, start_column_index, block)
 
     @_workbook_must_be_opened
-    def get_cells_value_range(
+    def set_typed_block_range(
+        self,
+        sheet_name: str,
+        start_column_index: typing.Union[int, str],
+        start_row_index: int,
+        rows: typing.Iterable[typing.Sequence[typing.Any]],
+    ):
+        """Write a 2D array of values, keeping numbers, dates and text as they are.
+
+        None and "" leave a cell blank, and text that Excel would read as something else (e.g.
+        "8/10" as a date) stays text; see :meth:`_backends.Workbook.write_rows`. The backend
+        may only read rows when the workbook is saved, so they must not change before then.
+        """
+        if isinstance(start_column_index, str):
+            start_column_index = _excel_column_name_to_number(start_column_index)
+        if _profiling.is_enabled() and isinstance(rows, typing.Sequence):
+            _profiling.count("cells_written", sum(len(row) for row in rows))
+        self._changed_sheets.add(sheet_name.lower())
+        self._workbook.write_rows(sheet_name, start_row_index, start_column_index, rows)
+
+    @_workbook_must_be_opened
+    def get_block_range(
         self,
         sheet_name: str,
         start_row_index: int,
         column_index: typing.Union[int, str],
         end_row_index: typing.Optional[int] = None,
-    ):
-        sheet = self._workbook.Worksheets(sheet_name)
+        end_column_index: typing.Optional[typing.Union[int, str]] = None,
+    ) -> typing.List[typing.List[typing.Any]]:
+        """Read a 2D array of values in one call, by default to the end of the used range."""
+        if isinstance(column_index, str):
+            column_index = _excel_column_name_to_number(column_index)
+        if isinstance(end_column_index, str):
+            end_column_index = _excel_column_name_to_number(end_column_index)
+        block = self._workbook.get_block(
+            sheet_name, start_row_index, column_index, end_row_index, end_column_index
+        )
+        if _profiling.is_enabled():
+            _profiling.count("cells_read", sum(len(row) for row in block))
+        return block
+
+    @_workbook_must_be_opened
+    def iter_rows(
+        self,
+        sheet_name: str,
+        start_row_index: int = 1,
+        column_index: typing.Union[int, str] = "A",
+        end_column_index: typing.Optional[typing.Union[int, str]] = None,
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        """Stream (row index, values) for each non-empty row, stopping at the last one."""
+        if isinstance(column_index, str):
+            column_index = _excel_column_name_to_number(column_index)
+        if isinstance(end_column_index, str):
+            end_column_index = _excel_column_name_to_number(end_column_index)
+        rows = self._workbook.iter_rows(sheet_name, start_row_index, column_index, end_column_index)
+        if _profiling.is_enabled():
+            rows = _profiling.counting_rows(rows)
+        yield from rows
+
+    @_workbook_must_be_opened
+    def get_rows(
+        self,
+        sheet_name: str,
+        row_indices: typing.Iterable[int],
+        column_index: typing.Union[int, str] = "A",
+        end_column_index: typing.Optional[typing.Union[int, str]] = None,
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        """Fetch (row index, values) for just the given rows, skipping any that are empty."""
         if isinstance(column_index, str):
             column_index = _excel_column_name_to_number(column_index)
-        if end_row_index is None:
-            end_row_index = sheet.UsedRange.Rows.Count
+        if isinstance(end_column_index, str):
+            end_column_index = _excel_column_name_to_number(end_column_index)
+        rows = self._workbook.get_rows(sheet_name, row_indices, column_index, end_column_index)
+        if _profiling.is_enabled():
+            rows = _profiling.counting_rows(rows)
+        yield from rows
 
-        end_column_index = sheet.UsedRange.Columns.Count
+    @_workbook_must_be_opened
+    def cached(
+        self,
+        kind: str,
+        sheet_name: str,
+        parse: typing.Callable[[], typing.Any],
+        codec: "_parse_cache.Codec",
+        extra: typing.Optional[str] = None,
+    ) -> typing.Any:
+        """Result of parse, which reads sheet_name, from the parse cache where it is still valid.
+
+        kind names what parse produces, codec stores it and extra is anything else it depends
+        on. Without a parse cache, or once the sheet has been edited, parse is simply called.
+        """
+        if self._parse_cache is None or sheet_name.lower() in self._changed_sheets:
+            return parse()
+        return self._parse_cache.fetch(kind, sheet_name, parse, codec, extra)
 
-        for i in range(start_row_index, end_row_index + 1):
-            values = [sheet.Cells(i, j).Value for j in range(column_index, end_column_index + 1)]
-            yield values
+    @_workbook_must_be_opened
+    def get_cells_value_range(
+        self,
+        sheet_name: str,
+        start_row_index: int,
+        column_index: typing.Union[int, str],
+        end_row_index: typing.Optional[int] = None,
+    ):
+        yield from self.get_block_range(sheet_name, start_row_index, column_index, end_row_index)
 
     @_workbook_must_be_opened
     def worksheet_names(self):
-        for sheet in self._workbook.Worksheets:
-            yield sheet.Name
+        yield from self._workbook.worksheet_names()
 
     @_workbook_must_be_opened
     def remove_sheet(self, worksheet_name: str):
-        self._app.DisplayAlerts = False
-        try:
-            self._workbook.Sheets(worksheet_name).Delete()
-        finally:
-            self._app.DisplayAlerts = True
+        self._changed_sheets.add(worksheet_name.lower())
+        with _profiling.phase("remove_sheet"):
+            self._workbook.remove_sheet(worksheet_name)
 
     @_workbook_must_be_opened
     def copy_sheet_from(
         self, source_workbook: pathlib.Path, sheet_index=1, *_, new_name="progress_new"
     ):
-        _temp_workbook = self._open_workbook(self._app, str(source_workbook))
-        try:
-            _temp_workbook.Sheets(sheet_index).Name = new_name
-            _temp_workbook.Sheets(sheet_index).Copy(Before=self._workbook.Sheets(1))
-        finally:
-            _temp_workbook.Close(SaveChanges=False)
+        self._changed_sheets.add(new_name.lower())
+        with _profiling.phase("copy_sheet_from"):
+            self._workbook.copy_sheet_from(source_workbook, sheet_index, new_name)
 
     @_workbook_must_be_opened
     def add_sheet(self, worksheet_name: str):
-        self._workbook.Sheets.Add().Name = worksheet_name
+        self._changed_sheets.add(worksheet_name.lower())
+        self._workbook.add_sheet(worksheet_name)
 
     @_workbook_must_be_opened
     def rename_sheet(self, old_name: str, new_name: str):
-        self._workbook.Sheets(old_name).Name = new_name
+        self._changed_sheets.update((old_name.lower(), new_name.lower()))
+        self._workbook.rename_sheet(old_name, new_name)
 
 
 def _to_snake_case(value: str) -> str:
@@ -212,6 +327,10 @@ class Config(typing.NamedTuple):
     student_template_filename: str
     student_filename_format_string: str
     skip_n_rows_when_copying_student_data: typing.Optional[str] = None
+    # Which sheets and columns are published; see _projection.
+    include_sheets: typing.Optional[str] = None
+    exclude_sheets: typing.Optional[str] = None
+    sheet_columns: typing.Optional[str] = None
 
 
 class StudentData(typing.NamedTuple):
@@ -222,46 +341,96 @@ class StudentData(typing.NamedTuple):
     student_file: typing.Optional[pathlib.Path]
 
 
+def _encode_config(config: Config) -> typing.Dict[str, typing.Any]:
+    return {field: _parse_cache.encode_value(value) for field, value in config._asdict().items()}
+
+
+def _decode_config(data: typing.Dict[str, typing.Any]) -> Config:
+    return Config(**{field: _parse_cache.decode_value(value) for field, value in data.items()})
+
+
+def _encode_roster(roster: typing.Tuple[typing.Tuple[StudentData, ...], typing.Tuple[int, ...]]):
+    students, rows = roster
+    return {
+        "students": [
+            [_parse_cache.encode_value(value) for value in student] for student in students
+        ],
+        "rows": list(rows),
+    }
+
+
+def _decode_roster(data: typing.Dict[str, typing.Any]):
+    students = tuple(
+        StudentData(*(_parse_cache.decode_value(value) for value in student))
+        for student in data["students"]
+    )
+    rows = tuple(int(row) for row in data["rows"])
+    if len(rows) != len(students):
+        raise ValueError("Mismatched roster students and rows")
+    return students, rows
+
+
+_CONFIG_CODEC = _parse_cache.Codec(_encode_config, _decode_config)
+_ROSTER_CODEC = _parse_cache.Codec(_encode_roster, _decode_roster)
+
+
 class StudentWorkbook(_BaseWorkBook):
     """Class to load and work on a student's workbook."""
 
-    def __init__(self, path: pathlib.Path) -> None:
+    def __init__(self, path: pathlib.Path, session: typing.Optional[Session] = None) -> None:
         """Initialize student workbook."""
-        super().__init__(path)
+        super().__init__(path, session)
 
 
 class MainWorkbook(_BaseWorkBook):
     """Model for interacting with the main workbook."""
 
-    def __init__(self, path: pathlib.Path) -> None:
-        """Initialize Excel app and prep to load config."""
-        super().__init__(path)
+    def __init__(self, path: pathlib.Path, session: typing.Optional[Session] = None) -> None:
+        """Prep to load config; student workbooks are opened in the same session."""
+        super().__init__(path, session)
 
         self._config = None
         self.student_workbooks: typing.Tuple[str, ...] = ()
-        self._roster: typing.Tuple[StudentData, ...] = ()
+        self._roster = _roster.Roster()
 
-    def __del__(self):
-        """Make sure we close out if we haven't already."""
-        self._app.Quit()
+    def open(self):
+        """Open the workbook and the parse cache kept beside it (unless disabled)."""
+        super().open()
+        if _config.PARSE_CACHE:
+            self._parse_cache = self._session.parse_cache(self._path, self._workbook)
+
+    def save(self):
+        """Save the workbook, then the parse cache (re-keyed to the saved file)."""
+        super().save()
+        if self._parse_cache is not None:
+            self._parse_cache.save(self._changed_sheets)
 
     def _load_config(self):
-        config_sheet = self._workbook.Worksheets(_config.CONFIG_SHEET_NAME)
-        max_rows = config_sheet.UsedRange.Rows.Count
+        with _profiling.phase("load_config"):
+            # Keyed by the fields too: a Config cached before a field was added lacks it.
+            self._config = self.cached(
+                "config",
+                _config.CONFIG_SHEET_NAME,
+                self._read_config,
+                _CONFIG_CODEC,
+                extra=",".join(Config._fields),
+            )
 
+    def _read_config(self):
         _config_keys = Config._fields
 
         config_sheet_data = {}
-        for i in range(1, max_rows + 1):
-            key = (config_sheet.Cells(i, 1).Value or "").rstrip(":")
-            value = config_sheet.Cells(i, 2).Value
+        for key, value in self.get_block_range(
+            _config.CONFIG_SHEET_NAME, start_row_index=1, column_index="A", end_column_index="B"
+        ):
+            key = (key or "").rstrip(":")
             if not key:
                 continue
             key = _to_snake_case(key)
             if key in _config_keys:
                 config_sheet_data[key] = value
         try:
-            self._config = Config(**config_sheet_data)
+            return Config(**config_sheet_data)
         except TypeError:
             _MODULE_LOGGER.warning(
                 "Error, all required keys must be provided on the %s sheet.",
@@ -269,14 +438,25 @@ class MainWorkbook(_BaseWorkBook):
             )
             raise
 
-        self._load_roster()
-
     def _load_roster(self):
+        with _profiling.phase("load_roster"):
+            students, rows = self.cached(
+                "roster", _config.ROSTER_SHEET_NAME, self._read_roster, _ROSTER_CODEC
+            )
+            self._roster = _roster.Roster(students, rows)
+
+    def _read_roster(self):
         roster = []
-        for row in self.get_cells_value_range(
-            _config.ROSTER_SHEET_NAME, start_row_index=2, column_index="A"
+        roster_rows = []
+        for row_index, data in enumerate(
+            self.get_block_range(
+                _config.ROSTER_SHEET_NAME,
+                start_row_index=_ROSTER_FIRST_ROW,
+                column_index="A",
+                end_column_index="C",
+            ),
+            start=_ROSTER_FIRST_ROW,
         ):
-            data = row[:3]
             if data[1] is None:
                 continue
             if data[0] is None:
@@ -284,8 +464,9 @@ class MainWorkbook(_BaseWorkBook):
                     (datetime.datetime.now().isoformat() + "-" + data[1]).encode("UTF-8")
                 ).hexdigest()[:8]
             roster.append(StudentData(*data))
+            roster_rows.append(row_index)
 
-        self._roster = tuple(roster)
+        return tuple(roster), tuple(roster_rows)
 
     @contextlib.contextmanager
     def open_student_workbook(self, student: StudentData):
@@ -293,41 +474,67 @@ class MainWorkbook(_BaseWorkBook):
         target_file = student.student_file
         if not pathlib.Path(target_file).is_absolute():
             target_file = _config.TEACHER_BOOK.parent / target_file
+        student_workbook = StudentWorkbook(target_file, session=self._session)
+        student_workbook.open()
         try:
-            student_workbook = StudentWorkbook(student.student_file)
-            student_workbook.open()
             yield student_workbook
-        except Exception as e:
-            print(e)
-            raise
         finally:
-            student_workbook._workbook.Close()
+            student_workbook.close()
+
+    def iter_student_values(
+        self, sheet_names: typing.Iterable[str]
+    ) -> typing.Iterator[typing.Tuple[str, str, typing.List[typing.Any]]]:
+        """Stream (sheet name, student name, values) for each student row with any values.
+
+        Blank cells within a row are given as "".
+        """
+        engine = _extraction.ExtractionEngine(
+            self, self.roster, _projection.from_config(self.config)
+        )
+        yield from engine.iter_records(sheet_names)
 
     def get_student_values_from_sheets(self, sheet_names: typing.Iterable[str]):
-        """Load student data for all sheets in sheet_names."""
-        student_names = set([student.name for student in self.roster])
-        student_data_mapping: typing.Dict[str, list] = {}
-        for sheet_name in sheet_names:
-            for row in self.get_cells_value_range(
-                sheet_name=sheet_name, start_row_index=1, column_index="A"
-            ):
-                if row[0] in student_names and any(val is not None for val in row[1:]):
-                    name = row[0]
-                    values = [val if val is not None else "" for val in row[1:]]
-                    if name not in student_data_mapping:
-                        student_data_mapping[name] = []
-                    student_data_mapping[name].append([sheet_name] + values)
-        return student_data_mapping
+        """Load student data for all sheets in sheet_names, reading the columns Config selects."""
+        engine = _extraction.ExtractionEngine(
+            self, self.roster, _projection.from_config(self.config)
+        )
+        return engine.extract(sheet_names)
 
     def update_student_values(self, student_index, student: StudentData):
         """Update student in roster sheet."""
-        self.set_row_range(
-            _config.ROSTER_SHEET_NAME,
-            "A",
-            student_index + EXCEL_FIRST_ROW_OF_DATA + _TABLE_OFFSET,
-            student,
-        )
-        self._load_roster()
+        self.update_students([(student_index, student)])
+
+    def update_students(
+        self,
+        updates: typing.Iterable[typing.Tuple[int, StudentData]],
+        chunk_size: int = _ROSTER_WRITE_CHUNK_ROWS,
+    ):
+        """Update several students in the roster sheet at once.
+
+        updates are (roster index, student) pairs. Adjacent roster rows are written together,
+        up to chunk_size rows per write, and the loaded roster (with its indexes) is updated in
+        place rather than read back from the sheet.
+        """
+        rows: typing.Dict[int, StudentData] = {}
+        for student_index, student in updates:
+            self._roster.replace(student_index, student)
+            rows[self._roster.row(student_index)] = student
+
+        row_indices = sorted(rows)
+        start = 0
+        for end in range(1, len(row_indices) + 1):
+            if (
+                end == len(row_indices)
+                or row_indices[end] != row_indices[end - 1] + 1
+                or end - start == chunk_size
+            ):
+                self.set_block_range(
+                    _config.ROSTER_SHEET_NAME,
+                    "A",
+                    row_indices[start],
+                    [rows[row_index] for row_index in row_indices[start:end]],
+                )
+                start = end
 
     @property
     def config(self):
@@ -335,25 +542,29 @@ class MainWorkbook(_BaseWorkBook):
         return self._config
 
     @property
-    def roster(self):
-        """Object representing the current roster."""
-        return tuple(self._roster)  # makes a copy on property read for iterating.
+    def roster(self) -> _roster.Roster:
+        """The current roster, indexed by name, ID and student workbook."""
+        return self._roster
 
     @property
-    def roster_as_mapping(self):
-        """Student name to student in roster."""
-        return {s.name: s for s in self.roster}
+    def roster_as_mapping(self) -> typing.Mapping[str, StudentData]:
+        """Student name to student in roster (a read-only view of the roster's index)."""
+        return self._roster.by_name
 
     def __enter__(self):
-        """Open workbook and load config."""
+        """Open workbook and load config and roster."""
         self.open()
         self._load_config()
+        self._load_roster()
         return self
 
     def __exit__(self, *exc):
-        """After context, save and close workbook."""
+        """After context, save the workbook (if it was edited) and close it."""
         if self._workbook is not None:
-            _MODULE_LOGGER.info("Saving changes to main workbook")
-            self.save()
+            if self._changed_sheets:
+                _MODULE_LOGGER.info("Saving changes to main workbook")
+                self.save()
+            elif self._parse_cache is not None:
+                self._parse_cache.save()
             self.close()
         self._workbook = None
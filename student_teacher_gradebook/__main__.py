@@ -1,12 +1,25 @@
 """A utility script for a teacher to track all students' assignments in one main spreadsheet and copy out to individual spreadsheets for students."""  # noqa: W505 - docs
+import functools
+import glob
 import logging
 import pathlib
-import shutil
+import typing
 
 import click
 
 import student_teacher_gradebook
 import student_teacher_gradebook._config
+from student_teacher_gradebook import (
+    _extraction,
+    _journal,
+    _manifest,
+    _profiling,
+    _projection,
+    _provisioning,
+    _publishing,
+    _staging,
+    _watching,
+)
 
 _MODULE_LOGGER = logging.getLogger(__name__)
 
@@ -16,15 +29,121 @@ def _cli():
     ...
 
 
+def _profile_options(command):
+    """Add the --profile and --profile-trace options to command."""
+
+    @functools.wraps(command)
+    def checked(*args, profile, profile_trace, **kwargs):
+        if profile_trace is not None and profile is None:
+            raise click.UsageError("--profile-trace needs --profile.")
+        return command(*args, profile=profile, profile_trace=profile_trace, **kwargs)
+
+    checked = click.option(
+        "--profile-trace",
+        type=click.Path(dir_okay=False, writable=True, path_type=pathlib.Path),
+        help="With --profile, also write the timed phases here as a Chrome trace.",
+    )(checked)
+    return click.option(
+        "--profile",
+        type=click.Path(dir_okay=False, writable=True, path_type=pathlib.Path),
+        help="Write phase timings and I/O counts for this run to PATH as JSON.",
+    )(checked)
+
+
 @_cli.command()
-def update_student_sheets():
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of student workbooks to write in parallel, each in its own worker process.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Rewrite every student workbook, even those unchanged since the last run.",
+)
+@click.option(
+    "--diff",
+    is_flag=True,
+    help="Write only the changed cells into each student's existing Progress sheet, keeping its "
+    "formatting and notes.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue a run that stopped part way, skipping the student workbooks it completed "
+    "(as long as they are unchanged since).",
+)
+@click.option(
+    "--staged",
+    is_flag=True,
+    help="Write the student workbooks to staging copies and move them into place together at "
+    "the end, only if every student succeeded.",
+)
+@_profile_options
+def update_student_sheets(jobs, force, diff, resume, staged, profile, profile_trace):
     """Update students' sheets."""
+    with _profiling.profiling(
+        profile, profile_trace
+    ), student_teacher_gradebook.Session() as session:
+        _update_student_sheets(session, jobs, force, diff, resume, staged)
+
+
+def _update_student_sheets(session, jobs, force, diff, resume=False, staged=False):
+    book = _load_book(
+        session,
+        student_teacher_gradebook._config.TEACHER_BOOK,
+        template=student_teacher_gradebook._config.STUDENT_TEMPLATE,
+        diff=diff,
+    )
+    report = _publish_books(session, [book], jobs, force, resume, staged)[book.teacher_book]
+    if report.failed:
+        raise click.ClickException(_failure_message(report.failed, staged))
+
+
+def _failure_message(failed, staged):
+    hint = (
+        "No student workbooks were changed."
+        if staged
+        else "Run again with --resume to retry just those."
+    )
+    return f"Failed to update {len(failed)} student workbook(s): {', '.join(failed)}. {hint}"
+
+
+class _Book(typing.NamedTuple):
+    """A teacher workbook, read and ready to publish."""
+
+    teacher_book: pathlib.Path
+    jobs: typing.List[_publishing.PublishJob]
+    manifest: _manifest.Manifest
+    journal: _journal.Journal
+    unassigned: typing.List[str]  # students with data but no workbook in the roster
+
+
+class _BookReport(typing.NamedTuple):
+    """Names of the students whose workbooks publishing updated, skipped or failed, for a book."""
+
+    updated: typing.List[str]
+    skipped: typing.List[str]
+    failed: typing.List[str]
+
+
+def _load_book(session, teacher_book, template=None, diff=False, template_digests=None):
+    """Read teacher_book and plan a publish job for each student with data in it.
+
+    template defaults to the one the book's Config names, beside the book. template_digests
+    (template path to hash) saves hashing a template shared by several books again.
+    """
     _MODULE_LOGGER.info("Loading main workbook...")
-    with student_teacher_gradebook.MainWorkbook(
-        student_teacher_gradebook._config.TEACHER_BOOK
-    ) as main_workbook:
+    with student_teacher_gradebook.MainWorkbook(teacher_book, session=session) as main_workbook:
         # for each other worksheet besides 'Roster' and 'Config'
         print("Loading data...")
+        try:
+            projection = _projection.from_config(main_workbook.config)
+        except ValueError as error:
+            raise click.ClickException(f"{teacher_book}: {error}") from error
         worksheets_to_process = [
             ws
             for ws in main_workbook.worksheet_names()
@@ -33,79 +152,390 @@ def update_student_sheets():
                 student_teacher_gradebook._config.CONFIG_SHEET_NAME,
                 student_teacher_gradebook._config.ROSTER_SHEET_NAME,
             }
+            and projection.includes(ws)
+        ]
+        extraction = _extraction.ExtractionEngine(main_workbook, main_workbook.roster, projection)
+        with _profiling.phase("extraction"):
+            student_data_mapping = extraction.extract(worksheets_to_process)
+        _MODULE_LOGGER.info(
+            "Read %d rows (%d cells) from %d sheets",
+            extraction.rows_read,
+            extraction.cells_read,
+            len(worksheets_to_process),
+        )
+        config = main_workbook.config
+        roster = main_workbook.roster_as_mapping
+
+    if template is None:
+        template = teacher_book.parent / (
+            config.student_template_filename
+            or student_teacher_gradebook._config.STUDENT_TEMPLATE.name
+        )
+    template = template.resolve()
+    template_digests = {} if template_digests is None else template_digests
+    with _profiling.phase("manifest"):
+        if template not in template_digests:
+            template_digests[template] = _manifest.file_digest(template)
+        template_digest = template_digests[template]
+        config_digest = _manifest.config_digest(config)
+        manifest = _manifest.Manifest(
+            _manifest.manifest_path(teacher_book),
+            template_digest=template_digest,
+            config_digest=config_digest,
+        )
+    journal = _journal.Journal(
+        _journal.journal_path(teacher_book),
+        template_digest=template_digest,
+        config_digest=config_digest,
+    )
+    start_row = student_teacher_gradebook.EXCEL_FIRST_ROW_OF_DATA + int(
+        config.skip_n_rows_when_copying_student_data or 0
+    )
+    publish_jobs = [
+        _publishing.PublishJob(
+            student_name=student_name,
+            # Relative to the teacher workbook, as documented.
+            student_file=(teacher_book.parent / roster[student_name].student_file).resolve(),
+            template=template,
+            start_row=start_row,
+            rows=data,
+        )
+        for student_name, data in student_data_mapping.items()
+        if roster[student_name].student_file is not None
+    ]
+    unassigned = [
+        student_name
+        for student_name in student_data_mapping
+        if roster[student_name].student_file is None
+    ]
+    if diff:
+        # A workbook last published under another template or Config is rebuilt instead.
+        publish_jobs = [
+            (
+                job._replace(diff=True, published_width=manifest.published_width(job))
+                if manifest.has_published(job)
+                else job
+            )
+            for job in publish_jobs
         ]
-        student_data_mapping = main_workbook.get_student_values_from_sheets(worksheets_to_process)
-
-        for student_name, data in student_data_mapping.items():
-            student = main_workbook.roster_as_mapping[student_name]
-            with main_workbook.open_student_workbook(student) as student_book:
-                temp_new_sheet_name = "Progress_new"
-                sheet_name = "Progress"
-                student_book.copy_sheet_from(
-                    student_teacher_gradebook._config.STUDENT_TEMPLATE.resolve(),
-                    new_name=temp_new_sheet_name,
+    return _Book(teacher_book, publish_jobs, manifest, journal, unassigned)
+
+
+def _publish_books(session, books, jobs, force, resume, staged):
+    """Publish the jobs of books together, returning a :class:`_BookReport` per teacher book.
+
+    Each book's manifest and journal are consulted (as --force and --resume say) and updated.
+    """
+    reports = {book.teacher_book: _BookReport([], [], []) for book in books}
+    for book in books:
+        for student_name in book.unassigned:
+            print(
+                f"Failed to update {student_name}:\nNo student workbook is listed in the Roster; "
+                "run populate-student-sheets to create one."
+            )
+            reports[book.teacher_book].failed.append(student_name)
+
+    claims = {}
+    for book in books:
+        for job in book.jobs:
+            claims.setdefault(job.student_file, []).append(book.teacher_book)
+    shared = {path: claimants for path, claimants in claims.items() if len(claimants) > 1}
+    if shared:
+        # Each book's Progress sheet holds only its own rows, so a workbook shared by two books
+        # would be overwritten by whichever was published last.
+        raise click.ClickException(
+            "Student workbooks named by more than one teacher workbook: "
+            + "; ".join(
+                f"{path} (by {', '.join(str(book) for book in claimants)})"
+                for path, claimants in shared.items()
+            )
+            + ". Give each teacher workbook its own student workbooks."
+        )
+    planned = [(job, book) for book in books for job in book.jobs]
+
+    carried_over = {book.teacher_book: [] for book in books}
+    if resume:
+        completed = {book.teacher_book: book.journal.completed() for book in books}
+        remaining = []
+        for job, book in planned:
+            if book.journal.is_completed(job, completed[book.teacher_book]):
+                carried_over[book.teacher_book].append(
+                    completed[book.teacher_book][job.student_name]
                 )
-                # student_book.add_sheet(temp_new_sheet_name)
-                for sheet in student_book.worksheet_names():
-                    if sheet == temp_new_sheet_name:
-                        continue
-                    student_book.remove_sheet(sheet)
-                student_book.rename_sheet(temp_new_sheet_name, sheet_name)
-                for i, value in enumerate(data):
-                    student_book.set_row_range(
-                        sheet_name=sheet_name,
-                        start_column_index="A",
-                        row_index=student_teacher_gradebook.EXCEL_FIRST_ROW_OF_DATA
-                        + i
-                        + (main_workbook.config.skip_n_rows_when_copying_student_data or 0),
-                        values=value,
-                    )
-                student_book.save()
+                book.manifest.record(job)
+            else:
+                remaining.append((job, book))
+        print(f"Resuming: {len(planned) - len(remaining)} student workbook(s) already completed.")
+        planned = remaining
+    if not force:
+        stale = []
+        for job, book in planned:
+            if book.manifest.is_current(job):
+                reports[book.teacher_book].skipped.append(job.student_name)
+            else:
+                stale.append((job, book))
+        if len(stale) < len(planned):
+            print(f"Skipping {len(planned) - len(stale)} unchanged student workbook(s).")
+        planned = stale
+
+    staging = _staging.StagingArea() if staged else None
+    by_file = {}  # the file each job is written to: (job, book)
+    publish_jobs = []
+    for job, book in planned:
+        if staging is not None:
+            written = job._replace(student_file=staging.stage(job.student_file))
+        else:
+            written = job
+        by_file[written.student_file] = (job, book)
+        publish_jobs.append(written)
+
+    staged_jobs = []
+    failed = any(report.failed for report in reports.values())  # e.g. a student with no workbook
+    finished = False
+    for book in books:
+        book.journal.start(carried_over[book.teacher_book])
+    try:
+        with _profiling.phase("publish"):
+            for result in _publish(session, publish_jobs, jobs):
+                _profiling.record("publish_student", result.seconds, student=result.student_name)
+                _profiling.add_counts(result.counters or {})
+                _profiling.add_phases(result.phases or {})
+                job, book = by_file[result.student_file]
+                if result.error is None:
+                    print(f"Updated {result.student_name} ({result.rows_written} rows)")
+                    if staging is None:
+                        _commit(job, book, reports)
+                    else:
+                        staging.written(job.student_file)
+                        staged_jobs.append((job, book))
+                else:
+                    print(f"Failed to update {result.student_name}:\n{result.error}")
+                    failed = True
+                    reports[book.teacher_book].failed.append(job.student_name)
+        if staging is not None and not failed:
+            with _profiling.phase("commit"):
+                moved = staging.commit()
+            print(f"Published {moved} student workbook(s).")
+            for job, book in staged_jobs:
+                _commit(job, book, reports)
+        finished = True
+    finally:
+        if staging is not None:
+            staging.discard()
+        for book in books:
+            # Kept after failures or an interruption, for --resume.
+            book.journal.close(finished=finished and not reports[book.teacher_book].failed)
+            book.manifest.save()
+    return reports
+
+
+def _commit(job, book, reports):
+    """Record that job's workbook was published for the book it came from."""
+    book.journal.commit(job)
+    book.manifest.record(job)
+    reports[book.teacher_book].updated.append(job.student_name)
+
+
+def _publish(session, publish_jobs, jobs):
+    """Publish each job, here or in jobs worker processes, yielding the results."""
+    if jobs > 1:
+        yield from _publishing.publish_in_parallel(publish_jobs, jobs, session.backend)
+        return
+    with session.bulk_edit():
+        yield from _publishing.publish_pipelined(session, publish_jobs)
+
+
+@_cli.command()
+@click.argument("teacher_books", nargs=-1, required=True)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of student workbooks to write in parallel, shared by all teacher workbooks.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Rewrite every student workbook, even those unchanged since the last run.",
+)
+@click.option(
+    "--diff",
+    is_flag=True,
+    help="Write only the changed cells into each student's existing Progress sheet.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue a run that stopped part way, skipping the student workbooks it completed.",
+)
+@click.option(
+    "--staged",
+    is_flag=True,
+    help="Move the student workbooks into place together at the end, only if every student "
+    "succeeded.",
+)
+@_profile_options
+def batch(teacher_books, jobs, force, diff, resume, staged, profile, profile_trace):
+    """Update students' sheets for several teacher workbooks at once.
+
+    Each TEACHER_BOOKS argument is a teacher workbook, a glob pattern, or a directory, which
+    is searched (with its subdirectories) for files named like the teacher workbook.
+    """
+    paths = _find_teacher_books(teacher_books)
+    if not paths:
+        raise click.ClickException("No teacher workbooks found.")
+    unreadable = []
+    with _profiling.profiling(
+        profile, profile_trace
+    ), student_teacher_gradebook.Session() as session:
+        books = []
+        template_digests = {}
+        for path in paths:
+            print(f"Reading {path}...")
+            try:
+                books.append(
+                    _load_book(session, path, diff=diff, template_digests=template_digests)
+                )
+            except Exception as error:
+                _MODULE_LOGGER.debug("Could not read %s", path, exc_info=True)
+                print(f"Could not read {path}: {error}")
+                unreadable.append(path)
+        reports = _publish_books(session, books, jobs, force, resume, staged)
+
+    print("Results:")
+    for path in paths:
+        if path in unreadable:
+            print(f"  {path}: could not be read")
+            continue
+        report = reports[path]
+        line = (
+            f"  {path}: {len(report.updated)} updated, {len(report.skipped)} unchanged, "
+            f"{len(report.failed)} failed"
+        )
+        print(line + (f" ({', '.join(report.failed)})" if report.failed else ""))
+    failed_books = len(unreadable) + sum(1 for report in reports.values() if report.failed)
+    if failed_books:
+        raise click.ClickException(f"{failed_books} teacher workbook(s) had failures.")
+
+
+def _find_teacher_books(arguments):
+    """Teacher workbooks named by arguments (see batch), resolved, without duplicates."""
+    name = student_teacher_gradebook._config.TEACHER_BOOK.name
+    found = []
+    for argument in arguments:
+        path = pathlib.Path(argument)
+        if path.is_dir():
+            matches = sorted(path.rglob(name))
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = sorted(pathlib.Path(match) for match in glob.glob(argument, recursive=True))
+        # Skip the lock files Excel keeps beside open workbooks.
+        found.extend(match.resolve() for match in matches if not match.name.startswith("~$"))
+    return list(dict.fromkeys(found))
 
 
 @_cli.command()
-def populate_student_sheets():
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Number of student files to create at once.",
+)
+@_profile_options
+def populate_student_sheets(jobs, profile, profile_trace):
     """Generate students' sheets from template."""
+    with _profiling.profiling(profile, profile_trace):
+        _populate_student_sheets(jobs)
+
+
+def _populate_student_sheets(jobs):
     _MODULE_LOGGER.info("Loading main workbook...")
-    with student_teacher_gradebook.MainWorkbook(
-        student_teacher_gradebook._config.TEACHER_BOOK
+    teacher_book = student_teacher_gradebook._config.TEACHER_BOOK
+    with student_teacher_gradebook.Session() as session, student_teacher_gradebook.MainWorkbook(
+        teacher_book, session=session
     ) as main_workbook:
-        for i, student in enumerate(main_workbook.roster):
-            print("Evaluating:", student)
-            if student.student_file is None:
-                _MODULE_LOGGER.info("Student %s does not have a student sheet yet.", student.name)
-                try:
-                    student_file = main_workbook.config.student_filename_format_string.format(
-                        **student._asdict()
-                    )
-                except KeyError:
-                    _MODULE_LOGGER.warning(
-                        "Error, invalid student template name in %s sheet. Valid place holder values are: %s",
-                        student_teacher_gradebook._config.CONFIG_SHEET_NAME,
-                        student._fields,
-                    )
-                    raise
-
-            if not pathlib.Path(student_file).is_file():
-                if student.student_file is not None:
-                    _MODULE_LOGGER.warning(
-                        "File for student %s is missing, recreating.", student.name
-                    )
-                _MODULE_LOGGER.info(
-                    "Creating student sheet for %s from %s",
-                    student.name,
-                    main_workbook.config.student_template_filename,
-                )
-                shutil.copy2(
-                    student_teacher_gradebook._config.SOURCE_DIR
-                    / main_workbook.config.student_template_filename,
-                    student_file,
-                )
-            if student.student_file is None:
-                new_student_data = student_teacher_gradebook.StudentData(
-                    **{**student._asdict(), "student_file": student_file}
-                )
-                main_workbook.update_student_values(i, new_student_data)
+        with _profiling.phase("plan"):
+            steps = _provisioning.plan(
+                main_workbook.roster, main_workbook.config, teacher_book.resolve().parent
+            )
+        new_files = [step.path for step in steps if step.needs_copy]
+        with _profiling.phase("copy_files", files=len(new_files)):
+            _provisioning.copy_files(
+                student_teacher_gradebook._config.SOURCE_DIR
+                / main_workbook.config.student_template_filename,
+                new_files,
+                workers=jobs,
+                hardlink=student_teacher_gradebook._config.HARDLINK_NEW_STUDENT_FILES,
+            )
+        _profiling.count("files_created", len(new_files))
+        with _profiling.phase("update_roster"):
+            main_workbook.update_students(
+                (step.student_index, step.student._replace(student_file=step.student_file))
+                for step in steps
+                if step.needs_roster_update
+            )
+
+
+@_cli.command()
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of student workbooks to write in parallel, each in its own worker process.",
+)
+@click.option(
+    "--diff",
+    is_flag=True,
+    help="Write only the changed cells into each student's existing Progress sheet.",
+)
+@click.option(
+    "--poll-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=1.0,
+    show_default=True,
+    help="Seconds between checks of the teacher workbook.",
+)
+@click.option(
+    "--debounce",
+    type=click.FloatRange(min=0),
+    default=2.0,
+    show_default=True,
+    help="Seconds the teacher workbook must go unchanged before a save is acted on.",
+)
+def watch(jobs, diff, poll_interval, debounce):
+    """Update students' sheets each time the teacher workbook is saved, until interrupted."""
+    teacher_book = student_teacher_gradebook._config.TEACHER_BOOK
+    # One session for the whole watch, so e.g. Excel is started only once and the parse
+    # cache stays in memory. Unchanged sheets come from that cache (by fingerprint or by a
+    # hash of their values) and unchanged students are skipped by the manifest, so each save
+    # costs only what it changed.
+    with student_teacher_gradebook.Session() as session:
+        stamp = _watching.file_stamp(teacher_book)
+        _watch_cycle(session, jobs, diff)
+        print(f"Watching {teacher_book} for changes (press Ctrl+C to stop)...")
+        try:
+            for stamp in _watching.saves(teacher_book, stamp, poll_interval, debounce):
+                print(f"{teacher_book.name} changed, updating student sheets...")
+                _watch_cycle(session, jobs, diff)
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+
+
+def _watch_cycle(session, jobs, diff):
+    try:
+        _update_student_sheets(session, jobs, force=False, diff=diff)
+    except click.ClickException as error:
+        print(error.format_message())
+    except Exception as error:  # e.g. caught mid-save; the next save gets another try
+        _MODULE_LOGGER.debug("Update failed", exc_info=True)
+        print(f"Could not update student sheets: {error}")
 
 
 @_cli.command()
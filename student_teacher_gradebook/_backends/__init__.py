@@ -0,0 +1,295 @@
+"""Pluggable spreadsheet backends used by the workbook models.
+
+A backend provides an :class:`Application` (something that can open workbooks) and the
+:class:`Workbook` handles it returns. Backend modules are only imported when selected, so
+the pure-Python backend works on hosts without pywin32/Excel.
+
+Besides the built-in backends, a backend module can be added with :func:`register` or by an
+installed package, through an entry point in the ``student_teacher_gradebook.backends``
+group naming the module (only looked up when a backend name is not otherwise known). A
+backend module provides ``create_application(new_instance=False)``.
+"""
+import abc
+import contextlib
+import importlib
+import pathlib
+import re
+import typing
+
+ENTRY_POINT_GROUP = "student_teacher_gradebook.backends"
+
+_BACKEND_MODULES = {
+    "excel": "student_teacher_gradebook._backends.excel",
+    "memory": "student_teacher_gradebook._backends.memory",
+    "ooxml": "student_teacher_gradebook._backends.ooxml",
+}
+_entry_points_loaded = False
+
+# Text that Excel turns into something else when assigned to a General-formatted cell:
+# numbers, currency, percentages, dates and times ("8/10", "Oct 10", "10-Oct"), booleans,
+# formulas and error values.
+_EXCEL_CONVERTED_TEXT_RE = re.compile(
+    r"\s*(?:[-+=$(.%#\d]|(?:true|false)\s*$"
+    r"|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?[\s/-]*\d)",
+    re.IGNORECASE,
+)
+
+
+def column_name(column: int) -> str:
+    """The letters of a column number: 1 is A, 26 is Z and 27 is AA."""
+    name = ""
+    while column > 0:
+        column, remainder = divmod(column - 1, 26)
+        name = chr(remainder + ord("A")) + name
+    return name
+
+
+def column_number(name: str) -> int:
+    """The number of a column's letters: A is 1, Z is 26 and AA is 27."""
+    number = 0
+    for char in name:
+        number = number * 26 + ord(char) - ord("A") + 1
+    return number
+
+
+def trim_trailing_blanks(values: typing.List[typing.Any]) -> typing.List[typing.Any]:
+    """The values, less any trailing None entries."""
+    end = len(values)
+    while end and values[end - 1] is None:
+        end -= 1
+    return values[:end]
+
+
+def excel_would_convert(text: str) -> bool:
+    """Whether Excel would store text assigned to a General-formatted cell as something else."""
+    return _EXCEL_CONVERTED_TEXT_RE.match(text) is not None
+
+
+def _runs(indices: typing.Sequence[int]) -> typing.Iterator[typing.Tuple[int, int]]:
+    """(first, last) of each run of consecutive numbers in sorted indices."""
+    start = 0
+    for position in range(1, len(indices) + 1):
+        if position == len(indices) or indices[position] != indices[position - 1] + 1:
+            yield indices[start], indices[position - 1]
+            start = position
+
+
+class Workbook(abc.ABC):
+    """Handle to a single open workbook.
+
+    Row and column indices are 1-based, matching Excel.
+    """
+
+    @abc.abstractmethod
+    def save(self) -> None:
+        """Write the workbook back to its file."""
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Release the workbook without saving."""
+
+    @abc.abstractmethod
+    def worksheet_names(self) -> typing.List[str]:
+        """Names of the worksheets, in tab order."""
+
+    @abc.abstractmethod
+    def used_range(self, sheet_name: str) -> typing.Tuple[int, int]:
+        """Number of (rows, columns) in use on the sheet."""
+
+    @abc.abstractmethod
+    def get_value(self, sheet_name: str, row: int, column: int) -> typing.Any:
+        """Value of a single cell."""
+
+    @abc.abstractmethod
+    def set_value(self, sheet_name: str, row: int, column: int, value: typing.Any) -> None:
+        """Assign a single cell."""
+
+    @abc.abstractmethod
+    def get_block(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        last_row: typing.Optional[int] = None,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.List[typing.List[typing.Any]]:
+        """Values of a rectangular block, one list per row, in a single call.
+
+        A missing last row/column extends the block to the end of the used range.
+        """
+
+    def iter_rows(
+        self,
+        sheet_name: str,
+        first_row: int = 1,
+        first_column: int = 1,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        """Yield (row index, values) for each row holding at least one value, in order.
+
+        Rows are padded to last_column; without one, each row ends at its last cell. Backends
+        that can should override this to read incrementally instead of as one block.
+        """
+        block = self.get_block(sheet_name, first_row, first_column, last_column=last_column)
+        for row_index, values in enumerate(block, start=first_row):
+            if any(value is not None for value in values):
+                yield row_index, trim_trailing_blanks(values) if last_column is None else values
+
+    def get_rows(
+        self,
+        sheet_name: str,
+        row_indices: typing.Iterable[int],
+        first_column: int = 1,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        """Yield (row index, values) for those of the given rows holding a value, in order.
+
+        Values are cut off as for :meth:`iter_rows`. The default reads each run of consecutive
+        rows as one block.
+        """
+        for first, last in _runs(sorted({int(row) for row in row_indices})):
+            block = self.get_block(sheet_name, first, first_column, last, last_column)
+            for row_index, values in enumerate(block, start=first):
+                if any(value is not None for value in values):
+                    yield row_index, trim_trailing_blanks(values) if last_column is None else values
+
+    @abc.abstractmethod
+    def set_block(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        rows: typing.Sequence[typing.Sequence[typing.Any]],
+    ) -> None:
+        """Assign a block of cells in a single call; short rows are padded with blanks."""
+
+    def format_as_text(
+        self, sheet_name: str, first_row: int, last_row: int, columns: typing.Iterable[int]
+    ) -> None:
+        """Format the given columns, from first_row to last_row, as text.
+
+        Text later assigned there is kept as text rather than read as a number or date.
+        Backends that always store assigned text as is need not override this.
+        """
+
+    def write_rows(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        rows: typing.Iterable[typing.Sequence[typing.Any]],
+    ) -> None:
+        """Write rows of values, keeping numbers, dates and text as they are.
+
+        None and "" leave a cell blank, and short rows are padded with blanks. Text that Excel
+        would read as something else (see :func:`excel_would_convert`) stays text: the columns
+        holding any are first formatted as text within the block, in one call, and then the
+        block is assigned in one call. Backends may instead read rows only when the workbook
+        is saved, e.g. to write them straight into the file.
+        """
+        block = [list(row) for row in rows]
+        if not block:
+            return
+        text_columns = {
+            first_column + offset
+            for row in block
+            for offset, value in enumerate(row)
+            if isinstance(value, str) and excel_would_convert(value)
+        }
+        if text_columns:
+            self.format_as_text(
+                sheet_name, first_row, first_row + len(block) - 1, sorted(text_columns)
+            )
+        self.set_block(sheet_name, first_row, first_column, block)
+
+    @abc.abstractmethod
+    def copy_sheet_from(
+        self, source_workbook: pathlib.Path, sheet_index: int, new_name: str
+    ) -> None:
+        """Copy a sheet from another workbook file in front of the first sheet."""
+
+    @abc.abstractmethod
+    def remove_sheet(self, sheet_name: str) -> None:
+        """Delete a sheet."""
+
+    @abc.abstractmethod
+    def rename_sheet(self, old_name: str, new_name: str) -> None:
+        """Rename a sheet."""
+
+    @abc.abstractmethod
+    def add_sheet(self, sheet_name: str) -> None:
+        """Add an empty sheet."""
+
+    def sheet_fingerprint(self, sheet_name: str) -> typing.Optional[str]:
+        """A value that changes whenever the saved values of the sheet may have changed.
+
+        None if the backend cannot tell for this sheet (e.g. it has unsaved edits), in which
+        case only the contents of the whole file identify it.
+        """
+        return None
+
+
+class Application(abc.ABC):
+    """A spreadsheet application capable of opening workbooks."""
+
+    # Whether workbooks may be opened, edited and saved on several threads at once (each
+    # workbook on one thread at a time). COM automation, for one, is tied to its thread.
+    thread_safe = False
+
+    @abc.abstractmethod
+    def open_workbook(self, path: pathlib.Path) -> Workbook:
+        """Open the workbook at path."""
+
+    @abc.abstractmethod
+    def quit(self) -> None:
+        """Shut the application down."""
+
+    @contextlib.contextmanager
+    def bulk_edit(self) -> typing.Iterator[None]:
+        """Suspend screen updates/recalculation for the duration of many writes, if supported."""
+        yield
+
+
+def register(name: str, module_name: str) -> None:
+    """Make the backend module called module_name available as backend name."""
+    _BACKEND_MODULES[name] = module_name
+
+
+def _load_entry_points() -> None:
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    import importlib.metadata  # only needed for backends from other packages
+
+    entry_points = importlib.metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        group = entry_points.select(group=ENTRY_POINT_GROUP)
+    else:  # Python < 3.10
+        group = entry_points.get(ENTRY_POINT_GROUP, ())
+    for entry_point in group:
+        _BACKEND_MODULES.setdefault(entry_point.name, entry_point.value)
+
+
+def backend_names() -> typing.List[str]:
+    """Names of every known backend, including those from other packages."""
+    _load_entry_points()
+    return sorted(_BACKEND_MODULES)
+
+
+def get_application(name: str, new_instance: bool = False) -> Application:
+    """Create the application for the backend called name.
+
+    With new_instance, the application is not shared with any other process (e.g., a fresh
+    Excel rather than one already running), so several processes can work side by side.
+    """
+    if name not in _BACKEND_MODULES:
+        _load_entry_points()
+    try:
+        module_name = _BACKEND_MODULES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown backend {name!r}, expected one of: {', '.join(backend_names())}"
+        ) from None
+    module = importlib.import_module(module_name)
+    return module.create_application(new_instance=new_instance)
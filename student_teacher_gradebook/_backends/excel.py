@@ -0,0 +1,287 @@
+"""Backend that drives Microsoft Excel through pywin32's COM automation.
+
+pywin32 is imported on first use, so this module (and :class:`ExcelApplication` with a
+stand-in ``dispatch``) can be imported and exercised on hosts without it.
+"""
+import contextlib
+import functools
+import importlib
+import logging
+import pathlib
+import shutil
+import sys
+import typing
+
+from student_teacher_gradebook import _backends, _config
+
+_MODULE_LOGGER = logging.getLogger(__name__)
+_MODULE_LOGGER.addHandler(logging.NullHandler())
+
+
+class _VBA_Consts:  # noqa: N801
+    xlUp = -4162  # noqa: N815 - matching Excel convention
+    xlCalculationManual = -4135  # noqa: N815 - matching Excel convention
+    xlFormulas = -4123  # noqa: N815 - matching Excel convention
+    xlByRows = 1  # noqa: N815 - matching Excel convention
+    xlByColumns = 2  # noqa: N815 - matching Excel convention
+    xlPrevious = 2  # noqa: N815 - matching Excel convention
+
+
+_ITER_ROWS_CHUNK = 1000
+
+
+def _get_win32com_cache_path():
+    import win32com
+
+    return pathlib.Path(win32com.__gen_path__)
+
+
+def clear_win32com_cache():
+    """Delete the code win32com generates for the Excel type library."""
+    path = _get_win32com_cache_path()
+    shutil.rmtree(path)
+
+
+def _ensure_dispatch(new_instance: bool = False):
+    import win32com
+    import win32com.client as win32
+
+    try:
+        if new_instance:
+            return win32.gencache.EnsureDispatch(win32.DispatchEx("Excel.Application"))
+        return win32.gencache.EnsureDispatch("Excel.Application")
+    except AttributeError:
+        _MODULE_LOGGER.warning(
+            "Failed to load win32com - likely a cache problem. Clearing the cache."
+        )
+        clear_win32com_cache()
+        for module in list(sys.modules):
+            if module.startswith("win32com.") or module.startswith("win32."):
+                del sys.modules[module]
+        importlib.reload(win32com)
+        client = importlib.import_module("win32com.client")
+        if new_instance:
+            return client.gencache.EnsureDispatch(client.DispatchEx("Excel.Application"))
+        return client.gencache.EnsureDispatch("Excel.Application")
+
+
+def _last_value_cell(sheet, search_order: int):
+    """Last cell holding a value or formula, searching by row or by column.
+
+    Unlike UsedRange, this ignores cells that are merely formatted.
+    """
+    return sheet.Cells.Find(
+        What="*",
+        LookIn=_VBA_Consts.xlFormulas,
+        SearchOrder=search_order,
+        SearchDirection=_VBA_Consts.xlPrevious,
+    )
+
+
+class ExcelWorkbook(_backends.Workbook):
+    """An open Excel workbook."""
+
+    def __init__(
+        self, app, workbook, open_source: typing.Callable[[pathlib.Path], typing.Any]
+    ) -> None:
+        """Wrap the COM workbook opened by app; open_source opens workbooks to copy from."""
+        self._app = app
+        self._workbook = workbook
+        self._open_source = open_source
+
+    def save(self) -> None:
+        """Save the workbook."""
+        self._workbook.Save()
+
+    def close(self) -> None:
+        """Close the workbook."""
+        self._workbook.Close()
+
+    def worksheet_names(self) -> typing.List[str]:
+        """Names of the worksheets, in tab order."""
+        return [sheet.Name for sheet in self._workbook.Worksheets]
+
+    def used_range(self, sheet_name: str) -> typing.Tuple[int, int]:
+        """Row and column count of the sheet's UsedRange."""
+        used_range = self._workbook.Worksheets(sheet_name).UsedRange
+        return used_range.Rows.Count, used_range.Columns.Count
+
+    def get_value(self, sheet_name: str, row: int, column: int) -> typing.Any:
+        """Value of a single cell."""
+        return self._workbook.Worksheets(sheet_name).Cells(row, column).Value
+
+    def set_value(self, sheet_name: str, row: int, column: int, value: typing.Any) -> None:
+        """Assign a single cell."""
+        self._workbook.Worksheets(sheet_name).Cells(row, column).Value = value
+
+    def get_block(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        last_row: typing.Optional[int] = None,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.List[typing.List[typing.Any]]:
+        """Read the block through one Range.Value call."""
+        sheet = self._workbook.Worksheets(sheet_name)
+        if last_row is None or last_column is None:
+            used_range = sheet.UsedRange
+            if last_row is None:
+                last_row = used_range.Row + used_range.Rows.Count - 1
+            if last_column is None:
+                last_column = used_range.Column + used_range.Columns.Count - 1
+        if last_row < first_row or last_column < first_column:
+            return []
+        values = sheet.Range(
+            sheet.Cells(first_row, first_column), sheet.Cells(last_row, last_column)
+        ).Value
+        if not isinstance(values, tuple):  # a single cell comes back as a bare value
+            return [[values]]
+        return [list(row) for row in values]
+
+    def iter_rows(
+        self,
+        sheet_name: str,
+        first_row: int = 1,
+        first_column: int = 1,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        """Yield the rows holding values, reading a chunk of rows per Range.Value call."""
+        sheet = self._workbook.Worksheets(sheet_name)
+        last_row = _last_value_cell(sheet, _VBA_Consts.xlByRows)
+        if last_row is None:
+            return
+        trim = last_column is None
+        if last_column is None:
+            last_column = _last_value_cell(sheet, _VBA_Consts.xlByColumns).Column
+        for chunk_start in range(first_row, last_row.Row + 1, _ITER_ROWS_CHUNK):
+            chunk_end = min(chunk_start + _ITER_ROWS_CHUNK - 1, last_row.Row)
+            block = self.get_block(sheet_name, chunk_start, first_column, chunk_end, last_column)
+            for row_index, values in enumerate(block, start=chunk_start):
+                if any(value is not None for value in values):
+                    yield row_index, _backends.trim_trailing_blanks(values) if trim else values
+
+    def get_rows(
+        self,
+        sheet_name: str,
+        row_indices: typing.Iterable[int],
+        first_column: int = 1,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        """Yield the given rows, reading no further right than the sheet's last value."""
+        if last_column is None:
+            last_cell = _last_value_cell(
+                self._workbook.Worksheets(sheet_name), _VBA_Consts.xlByColumns
+            )
+            if last_cell is None:
+                return
+            rows = super().get_rows(sheet_name, row_indices, first_column, last_cell.Column)
+            for row_index, values in rows:
+                yield row_index, _backends.trim_trailing_blanks(values)
+        else:
+            yield from super().get_rows(sheet_name, row_indices, first_column, last_column)
+
+    def set_block(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        rows: typing.Sequence[typing.Sequence[typing.Any]],
+    ) -> None:
+        """Write the block through one Range.Value assignment."""
+        width = max((len(row) for row in rows), default=0)
+        if not width:
+            return
+        sheet = self._workbook.Worksheets(sheet_name)
+        sheet.Range(
+            sheet.Cells(first_row, first_column),
+            sheet.Cells(first_row + len(rows) - 1, first_column + width - 1),
+        ).Value = tuple(tuple(row) + (None,) * (width - len(row)) for row in rows)
+
+    def format_as_text(
+        self, sheet_name: str, first_row: int, last_row: int, columns: typing.Iterable[int]
+    ) -> None:
+        """Set the "@" number format with one Range.NumberFormat call per run of columns."""
+        sheet = self._workbook.Worksheets(sheet_name)
+        for first_column, last_column in _backends._runs(sorted(columns)):
+            sheet.Range(
+                sheet.Cells(first_row, first_column), sheet.Cells(last_row, last_column)
+            ).NumberFormat = "@"
+
+    def copy_sheet_from(
+        self, source_workbook: pathlib.Path, sheet_index: int, new_name: str
+    ) -> None:
+        """Copy a sheet of source_workbook in front of the first sheet."""
+        self._open_source(source_workbook).Sheets(sheet_index).Copy(Before=self._workbook.Sheets(1))
+        self._workbook.Sheets(1).Name = new_name
+
+    def remove_sheet(self, sheet_name: str) -> None:
+        """Delete a sheet without Excel's confirmation prompt."""
+        self._app.DisplayAlerts = False
+        try:
+            self._workbook.Sheets(sheet_name).Delete()
+        finally:
+            self._app.DisplayAlerts = True
+
+    def rename_sheet(self, old_name: str, new_name: str) -> None:
+        """Rename a sheet."""
+        self._workbook.Sheets(old_name).Name = new_name
+
+    def add_sheet(self, sheet_name: str) -> None:
+        """Add an empty sheet."""
+        self._workbook.Sheets.Add().Name = sheet_name
+
+
+class ExcelApplication(_backends.Application):
+    """A running instance of Excel."""
+
+    def __init__(
+        self,
+        dispatch: typing.Optional[typing.Callable[[], typing.Any]] = None,
+        visible: bool = False,
+    ) -> None:
+        """Start (or attach to) Excel through dispatch; hidden unless visible is set."""
+        self._app = (dispatch or _ensure_dispatch)()
+        self._app.Visible = visible
+        self._sources: typing.Dict[pathlib.Path, typing.Any] = {}
+
+    def _open_source(self, path: pathlib.Path):
+        # Workbooks copied from (the student template) stay open, read-only, until quit.
+        path = pathlib.Path(path).resolve()
+        if path not in self._sources:
+            self._sources[path] = self._app.Workbooks.Open(str(path), ReadOnly=True)
+        return self._sources[path]
+
+    def open_workbook(self, path: pathlib.Path) -> ExcelWorkbook:
+        """Open the workbook at path."""
+        return ExcelWorkbook(self._app, self._app.Workbooks.Open(str(path)), self._open_source)
+
+    def quit(self) -> None:
+        """Close the workbooks kept open for copying from, then quit Excel."""
+        for workbook in self._sources.values():
+            workbook.Close(SaveChanges=False)
+        self._sources.clear()
+        self._app.Quit()
+
+    @contextlib.contextmanager
+    def bulk_edit(self) -> typing.Iterator[None]:
+        """Turn off screen updating and automatic calculation, restoring them afterwards.
+
+        Excel only accepts a Calculation change while a workbook is open.
+        """
+        screen_updating, calculation = self._app.ScreenUpdating, self._app.Calculation
+        self._app.ScreenUpdating = False
+        self._app.Calculation = _VBA_Consts.xlCalculationManual
+        try:
+            yield
+        finally:
+            self._app.Calculation = calculation
+            self._app.ScreenUpdating = screen_updating
+
+
+def create_application(new_instance: bool = False) -> ExcelApplication:
+    """Entry point used by the backend lookup."""
+    return ExcelApplication(
+        dispatch=functools.partial(_ensure_dispatch, new_instance=new_instance),
+        visible=_config.EXCEL_VISIBLE,
+    )
@@ -0,0 +1,246 @@
+"""In-memory stand-in backend, for exercising workbook logic without files or Excel.
+
+Workbooks live in :data:`WORKBOOKS` keyed by resolved path, and every workbook method call
+is tallied in :data:`CALLS` so tests can assert how chatty an operation is.
+"""
+import collections
+import copy
+import functools
+import pathlib
+import typing
+
+from student_teacher_gradebook import _backends
+
+_Sheet = typing.Dict[typing.Tuple[int, int], typing.Any]
+
+WORKBOOKS: typing.Dict[pathlib.Path, typing.Dict[str, _Sheet]] = {}
+"""Saved workbooks: sheet name (in tab order) to {(row, column): value}."""
+
+CALLS: typing.Counter[str] = collections.Counter()
+"""Number of calls to each workbook method since the last :func:`reset`."""
+
+
+def reset() -> None:
+    """Forget all workbooks and call counts."""
+    WORKBOOKS.clear()
+    CALLS.clear()
+
+
+def add_workbook(
+    path: pathlib.Path, sheets: typing.Mapping[str, typing.Sequence[typing.Sequence[typing.Any]]]
+) -> None:
+    """Store a workbook given as sheet name to rows of values (starting at A1)."""
+    WORKBOOKS[pathlib.Path(path).resolve()] = {
+        name: {
+            (row_index, column_index): value
+            for row_index, row in enumerate(rows, start=1)
+            for column_index, value in enumerate(row, start=1)
+            if value is not None
+        }
+        for name, rows in sheets.items()
+    }
+
+
+def sheet_rows(path: pathlib.Path, sheet_name: str) -> typing.List[typing.List[typing.Any]]:
+    """Rows of a stored sheet, from A1 to the end of its used range."""
+    cells = WORKBOOKS[pathlib.Path(path).resolve()][sheet_name]
+    rows, columns = _used_range(cells)
+    return [
+        [cells.get((row, column)) for column in range(1, columns + 1)] for row in range(1, rows + 1)
+    ]
+
+
+def _used_range(cells: _Sheet) -> typing.Tuple[int, int]:
+    rows = max((row for row, _ in cells), default=1)
+    columns = max((column for _, column in cells), default=1)
+    return rows, columns
+
+
+def _counted(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        CALLS[method.__name__] += 1
+        return method(*args, **kwargs)
+
+    return wrapper
+
+
+class MemoryWorkbook(_backends.Workbook):
+    """A working copy of a stored workbook; changes are stored on save."""
+
+    def __init__(self, path: pathlib.Path) -> None:
+        """Check out the workbook stored for path."""
+        self._path = pathlib.Path(path).resolve()
+        try:
+            self._sheets = copy.deepcopy(WORKBOOKS[self._path])
+        except KeyError:
+            raise FileNotFoundError(self._path) from None
+
+    @_counted
+    def save(self) -> None:
+        """Store the working copy."""
+        WORKBOOKS[self._path] = copy.deepcopy(self._sheets)
+
+    @_counted
+    def close(self) -> None:
+        """Drop the working copy."""
+
+    @_counted
+    def worksheet_names(self) -> typing.List[str]:
+        """Names of the worksheets, in tab order."""
+        return list(self._sheets)
+
+    @_counted
+    def used_range(self, sheet_name: str) -> typing.Tuple[int, int]:
+        """Last row and column holding a value."""
+        return _used_range(self._sheets[sheet_name])
+
+    @_counted
+    def get_value(self, sheet_name: str, row: int, column: int) -> typing.Any:
+        """Value of a single cell."""
+        return self._sheets[sheet_name].get((int(row), int(column)))
+
+    @_counted
+    def set_value(self, sheet_name: str, row: int, column: int, value: typing.Any) -> None:
+        """Assign a single cell."""
+        self._set(sheet_name, int(row), int(column), value)
+
+    @_counted
+    def get_block(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        last_row: typing.Optional[int] = None,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.List[typing.List[typing.Any]]:
+        """Values of a rectangular block, one list per row."""
+        cells = self._sheets[sheet_name]
+        used_rows, used_columns = _used_range(cells)
+        return [
+            [
+                cells.get((row, column))
+                for column in range(int(first_column), int(last_column or used_columns) + 1)
+            ]
+            for row in range(int(first_row), int(last_row or used_rows) + 1)
+        ]
+
+    @_counted
+    def iter_rows(
+        self,
+        sheet_name: str,
+        first_row: int = 1,
+        first_column: int = 1,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        """Yield the rows holding values, from a snapshot of the sheet."""
+        return self._rows(sheet_name, first_row, first_column, last_column)
+
+    def _rows(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        last_column: typing.Optional[int],
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        rows: typing.Dict[int, typing.Dict[int, typing.Any]] = {}
+        for (row, column), value in self._sheets[sheet_name].items():
+            if (
+                row >= int(first_row)
+                and column >= int(first_column)
+                and (last_column is None or column <= int(last_column))
+            ):
+                rows.setdefault(row, {})[column] = value
+        for row in sorted(rows):
+            end = int(last_column or max(rows[row]))
+            yield row, [rows[row].get(column) for column in range(int(first_column), end + 1)]
+
+    @_counted
+    def get_rows(
+        self,
+        sheet_name: str,
+        row_indices: typing.Iterable[int],
+        first_column: int = 1,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        """Yield just the given rows that hold values."""
+        wanted = {int(row) for row in row_indices}
+        for row_index, values in self._rows(sheet_name, 1, first_column, last_column):
+            if row_index in wanted:
+                yield row_index, values
+
+    @_counted
+    def set_block(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        rows: typing.Sequence[typing.Sequence[typing.Any]],
+    ) -> None:
+        """Assign a block of cells."""
+        width = max((len(row) for row in rows), default=0)
+        for row_offset, row in enumerate(rows):
+            for column_offset in range(width):
+                value = row[column_offset] if column_offset < len(row) else None
+                self._set(
+                    sheet_name,
+                    int(first_row) + row_offset,
+                    int(first_column) + column_offset,
+                    value,
+                )
+
+    @_counted
+    def format_as_text(
+        self, sheet_name: str, first_row: int, last_row: int, columns: typing.Iterable[int]
+    ) -> None:
+        """Nothing to do; values are stored as assigned."""
+
+    def _set(self, sheet_name: str, row: int, column: int, value: typing.Any) -> None:
+        if value is None or value == "":
+            self._sheets[sheet_name].pop((row, column), None)
+        else:
+            self._sheets[sheet_name][(row, column)] = value
+
+    @_counted
+    def copy_sheet_from(
+        self, source_workbook: pathlib.Path, sheet_index: int, new_name: str
+    ) -> None:
+        """Copy a sheet of another stored workbook in front of the first sheet."""
+        source = WORKBOOKS[pathlib.Path(source_workbook).resolve()]
+        sheet = copy.deepcopy(list(source.values())[sheet_index - 1])
+        self._sheets = {new_name: sheet, **self._sheets}
+
+    @_counted
+    def remove_sheet(self, sheet_name: str) -> None:
+        """Delete a sheet."""
+        del self._sheets[sheet_name]
+
+    @_counted
+    def rename_sheet(self, old_name: str, new_name: str) -> None:
+        """Rename a sheet, keeping its position."""
+        self._sheets = {
+            (new_name if name == old_name else name): sheet for name, sheet in self._sheets.items()
+        }
+
+    @_counted
+    def add_sheet(self, sheet_name: str) -> None:
+        """Add an empty sheet in front of the first sheet."""
+        self._sheets = {sheet_name: {}, **self._sheets}
+
+
+class MemoryApplication(_backends.Application):
+    """Opens workbooks from :data:`WORKBOOKS`."""
+
+    def open_workbook(self, path: pathlib.Path) -> MemoryWorkbook:
+        """Check out the stored workbook at path."""
+        CALLS["open_workbook"] += 1
+        return MemoryWorkbook(path)
+
+    def quit(self) -> None:
+        """Nothing to shut down."""
+
+
+def create_application(new_instance: bool = False) -> MemoryApplication:
+    """Entry point used by the backend lookup; every application is independent anyway."""
+    CALLS["create_application"] += 1
+    return MemoryApplication()
@@ -0,0 +1,1462 @@
+"""Backend that reads and writes .xlsx packages directly, without Excel.
+
+Only the parts of the package this tool edits are modelled: the sheet list, shared strings,
+the cell data of each worksheet and (when copying sheets between workbooks) the style
+tables. Everything else in a part is carried through verbatim, as are untouched parts.
+"""
+import codecs
+import copy
+import datetime
+import functools
+import html
+import io
+import logging
+import os
+import pathlib
+import posixpath
+import re
+import struct
+import tempfile
+import typing
+import zipfile
+
+from student_teacher_gradebook import _backends
+
+_MODULE_LOGGER = logging.getLogger(__name__)
+_MODULE_LOGGER.addHandler(logging.NullHandler())
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_DOC_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_OFFICE_DOCUMENT_REL_TYPE = _DOC_REL_NS + "/officeDocument"
+_WORKSHEET_REL_TYPE = _DOC_REL_NS + "/worksheet"
+_SHARED_STRINGS_REL_TYPE = _DOC_REL_NS + "/sharedStrings"
+_STYLES_REL_TYPE = _DOC_REL_NS + "/styles"
+_CALC_CHAIN_REL_TYPE = _DOC_REL_NS + "/calcChain"
+_CONTENT_TYPE_PREFIX = "application/vnd.openxmlformats-officedocument.spreadsheetml."
+_WORKSHEET_CONTENT_TYPE = _CONTENT_TYPE_PREFIX + "worksheet+xml"
+_SHARED_STRINGS_CONTENT_TYPE = _CONTENT_TYPE_PREFIX + "sharedStrings+xml"
+_CONTENT_TYPES_PART = "[Content_Types].xml"
+_XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_EMPTY_WORKSHEET = (
+    _XML_DECLARATION + f'<worksheet xmlns="{_MAIN_NS}" xmlns:r="{_DOC_REL_NS}">'
+    '<dimension ref="A1"/><sheetViews><sheetView workbookViewId="0"/></sheetViews>'
+    '<sheetFormatPr defaultRowHeight="15"/><sheetData/>'
+    '<pageMargins left="0.7" right="0.7" top="0.75" bottom="0.75" header="0.3" footer="0.3"/>'
+    "</worksheet>"
+)
+
+_ATTRIBUTE_RE = re.compile(r'([\w:.-]+)\s*=\s*"([^"]*)"')
+_ROW_RE = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.S)
+_ROW_INDEX_RE = re.compile(r'\br="(\d+)"')
+_CELL_RE = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.S)
+_VALUE_RE = re.compile(r"<v(?:\s[^>]*)?>(.*?)</v>", re.S)
+_TEXT_RE = re.compile(r"<t(?:\s[^>]*)?>(.*?)</t>", re.S)
+_PHONETIC_RE = re.compile(r"<rPh\b.*?</rPh>", re.S)
+_SHEET_DATA_RE = re.compile(r"<sheetData\b[^>]*?(?:/>|>.*?</sheetData>)", re.S)
+_DIMENSION_RE = re.compile(r"<dimension\b[^>]*/>")
+_SHEETS_RE = re.compile(r"<sheets\b[^>]*?(?:/>|>(.*?)</sheets>)", re.S)
+_SHEET_RE = re.compile(r"<sheet\b([^>]*?)/>")
+_DEFINED_NAMES_RE = re.compile(r"<definedNames\b[^>]*?(?:/>|>(.*?)</definedNames>)", re.S)
+_DEFINED_NAME_RE = re.compile(r"<definedName\b([^>]*?)(?:/>|>(.*?)</definedName>)", re.S)
+_ACTIVE_TAB_RE = re.compile(r'\b(activeTab|firstSheet)="(\d+)"')
+_RELATIONSHIP_RE = re.compile(r"<Relationship\b([^>]*?)/>")
+_CONTENT_TYPE_RE = re.compile(r"<(Default|Override)\b([^>]*?)/>")
+_SHARED_STRING_ITEM_RE = re.compile(r"<si\b[^>]*?(?:/>|>.*?</si>)", re.S)
+_CELL_REFERENCE_RE = re.compile(r"([A-Z]+)(\d+)")
+_NUMBER_RE = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_RELATIONSHIP_ELEMENTS_RE = re.compile(
+    r"<(tableParts|drawing|legacyDrawing|legacyDrawingHF|picture|oleObjects|controls)\b"
+    r"[^>]*?(?:/>|>.*?</\1>)",
+    re.S,
+)
+_RELATIONSHIP_ATTRIBUTE_RE = re.compile(r'\s+r:id="[^"]*"')
+
+# Number formats Excel ships with that render dates/times.
+_BUILTIN_DATE_FORMAT_IDS = frozenset(list(range(14, 23)) + [45, 46, 47])
+_FIRST_CUSTOM_NUMBER_FORMAT_ID = 164
+# Built-in number formats given to assigned values, as Excel does.
+_TEXT_FORMAT_ID = 49  # @
+_DATE_FORMAT_ID = 14  # m/d/yyyy
+_DATE_TIME_FORMAT_ID = 22  # m/d/yyyy h:mm
+_EXCEL_EPOCH = datetime.datetime(1899, 12, 30)
+_MAX_SHEET_NAME_LENGTH = 31
+_DATA_DESCRIPTOR_FLAG = 0x08
+_STREAM_WRITE_CHARS = 1 << 16
+
+
+def _attributes(text: str) -> typing.Dict[str, str]:
+    return dict(_ATTRIBUTE_RE.findall(text))
+
+
+def _format_attributes(attributes: typing.Mapping[str, str]) -> str:
+    return "".join(f' {key}="{value}"' for key, value in attributes.items())
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _escape_attribute(text: str) -> str:
+    return _escape(text).replace('"', "&quot;")
+
+
+def _split_reference(reference: str) -> typing.Tuple[int, int]:
+    match = _CELL_REFERENCE_RE.match(reference)
+    return int(match.group(2)), _backends.column_number(match.group(1))
+
+
+def _text_content(xml: str) -> str:
+    return "".join(html.unescape(text) for text in _TEXT_RE.findall(_PHONETIC_RE.sub("", xml)))
+
+
+def _format_number(value: typing.Union[int, float]) -> str:
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _to_excel_serial(value: typing.Union[datetime.date, datetime.datetime]) -> float:
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime(value.year, value.month, value.day)
+    return (value.replace(tzinfo=None) - _EXCEL_EPOCH) / datetime.timedelta(days=1)
+
+
+def _from_excel_serial(value: float) -> datetime.datetime:
+    return _EXCEL_EPOCH + datetime.timedelta(days=value)
+
+
+def _is_date_format_code(code: str) -> bool:
+    code = re.sub(r'"[^"]*"|\\.|\[[^\]]*\]', "", code)
+    return bool(re.search(r"[dmyhs]", code, re.I)) and code.lower() != "general"
+
+
+def _coerce(value: typing.Any) -> typing.Any:
+    """Mirror Excel's handling of an assigned value.
+
+    Empty text clears the cell and text that reads as a plain number is stored as a number.
+    """
+    if isinstance(value, str):
+        if not value.strip():
+            return None
+        if _NUMBER_RE.fullmatch(value.strip()):
+            return float(value)
+    return value
+
+
+def _resolve_target(source_part: str, target: str) -> str:
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def _relative_target(source_part: str, part: str) -> str:
+    return posixpath.relpath(part, posixpath.dirname(source_part) or ".")
+
+
+def _relationships_part(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", name + ".rels")
+
+
+def _section_items(xml: str, section: str, item: str) -> typing.Tuple[typing.List[str], bool]:
+    match = re.search(rf"<{section}\b[^>]*?(?:/>|>(.*?)</{section}>)", xml, re.S)
+    if match is None:
+        return [], False
+    items = re.findall(rf"<{item}\b[^>]*?(?:/>|>.*?</{item}>)", match.group(1) or "", re.S)
+    return items, True
+
+
+def _replace_attribute(xml: str, name: str, mapping: typing.Mapping[str, str]) -> str:
+    def _replace(match):
+        return f'{match.group(1)}{name}="{mapping.get(match.group(2), match.group(2))}"'
+
+    return re.sub(rf'(\s){name}="([^"]*)"', _replace, xml, count=1)
+
+
+def _strip_relationships(xml: str) -> str:
+    return _RELATIONSHIP_ATTRIBUTE_RE.sub("", _RELATIONSHIP_ELEMENTS_RE.sub("", xml))
+
+
+def _remap_styles(
+    xml: str,
+    style_mapping: typing.Mapping[str, str],
+    differential_mapping: typing.Mapping[str, str],
+) -> str:
+    xml = re.sub(
+        r'(<col\b[^>]*?\sstyle=")(\d+)"',
+        lambda match: f'{match.group(1)}{style_mapping.get(match.group(2), match.group(2))}"',
+        xml,
+    )
+    return re.sub(
+        r'(<cfRule\b[^>]*?\sdxfId=")(\d+)"',
+        lambda match: (
+            f'{match.group(1)}{differential_mapping.get(match.group(2), match.group(2))}"'
+        ),
+        xml,
+    )
+
+
+class _Relationships:
+    """A .rels part."""
+
+    def __init__(self, part: str, xml: typing.Optional[str]) -> None:
+        self.part = part
+        self.items: typing.List[typing.Dict[str, str]] = [
+            _attributes(match.group(1)) for match in _RELATIONSHIP_RE.finditer(xml or "")
+        ]
+
+    def by_id(self, rel_id: str) -> typing.Dict[str, str]:
+        return next(item for item in self.items if item["Id"] == rel_id)
+
+    def by_type(self, rel_type: str) -> typing.Optional[typing.Dict[str, str]]:
+        return next((item for item in self.items if item["Type"] == rel_type), None)
+
+    def add(self, rel_type: str, target: str) -> str:
+        existing = {item["Id"] for item in self.items}
+        number = len(self.items) + 1
+        while f"rId{number}" in existing:
+            number += 1
+        rel_id = f"rId{number}"
+        self.items.append({"Id": rel_id, "Type": rel_type, "Target": target})
+        return rel_id
+
+    def remove(self, rel_id: str) -> None:
+        self.items = [item for item in self.items if item["Id"] != rel_id]
+
+    def to_xml(self) -> str:
+        relationships = "".join(f"<Relationship{_format_attributes(item)}/>" for item in self.items)
+        return f'{_XML_DECLARATION}<Relationships xmlns="{_PKG_REL_NS}">{relationships}</Relationships>'
+
+
+class _ContentTypes:
+    """The [Content_Types].xml part."""
+
+    def __init__(self, xml: str) -> None:
+        self._head = xml[: xml.index(">", xml.index("<Types")) + 1]
+        self.items: typing.List[typing.Tuple[str, typing.Dict[str, str]]] = [
+            (match.group(1), _attributes(match.group(2)))
+            for match in _CONTENT_TYPE_RE.finditer(xml)
+        ]
+
+    def add_override(self, part: str, content_type: str) -> None:
+        self.items.append(("Override", {"PartName": "/" + part, "ContentType": content_type}))
+
+    def remove_override(self, part: str) -> None:
+        self.items = [
+            (kind, item) for kind, item in self.items if item.get("PartName") != "/" + part
+        ]
+
+    def to_xml(self) -> str:
+        entries = "".join(f"<{kind}{_format_attributes(item)}/>" for kind, item in self.items)
+        return f"{self._head}{entries}</Types>"
+
+
+class _Styles:
+    """The style tables of styles.xml that cells and conditional formats refer to."""
+
+    _SECTIONS = (
+        ("numFmts", "numFmt"),
+        ("fonts", "font"),
+        ("fills", "fill"),
+        ("borders", "border"),
+        ("cellXfs", "xf"),
+        ("dxfs", "dxf"),
+    )
+    # Elements that may follow each optional section, used to insert a missing one.
+    _FOLLOWERS = {
+        "numFmts": ("fonts",),
+        "dxfs": ("tableStyles", "colors", "extLst", "/styleSheet"),
+    }
+
+    def __init__(self, xml: str) -> None:
+        self.xml = xml
+        self.items: typing.Dict[str, typing.List[str]] = {}
+        self._present: typing.Dict[str, bool] = {}
+        for section, item in self._SECTIONS:
+            self.items[section], self._present[section] = _section_items(xml, section, item)
+        self.number_formats = {
+            _attributes(item)["numFmtId"]: html.unescape(_attributes(item).get("formatCode", ""))
+            for item in self.items["numFmts"]
+        }
+        self._date_styles: typing.Optional[typing.List[bool]] = None
+        self._formatted_styles: typing.Dict[typing.Tuple[str, int], str] = {}
+
+    def is_date(self, style_index: int) -> bool:
+        if self._date_styles is None:
+            self._date_styles = []
+            for xf in self.items["cellXfs"]:
+                number_format_id = _attributes(xf[: xf.index(">")]).get("numFmtId", "0")
+                if int(number_format_id) in _BUILTIN_DATE_FORMAT_IDS:
+                    self._date_styles.append(True)
+                elif number_format_id in self.number_formats:
+                    self._date_styles.append(
+                        _is_date_format_code(self.number_formats[number_format_id])
+                    )
+                else:
+                    self._date_styles.append(False)
+        return 0 <= style_index < len(self._date_styles) and self._date_styles[style_index]
+
+    def is_text(self, style_index: int) -> bool:
+        xfs = self.items["cellXfs"]
+        if not 0 <= style_index < len(xfs):
+            return False
+        xf = xfs[style_index]
+        number_format_id = _attributes(xf[: xf.index(">")]).get("numFmtId", "0")
+        return (
+            int(number_format_id) == _TEXT_FORMAT_ID
+            or self.number_formats.get(number_format_id) == "@"
+        )
+
+    def with_number_format(
+        self, style: typing.Optional[str], number_format_id: int
+    ) -> typing.Optional[str]:
+        """Index of a cell style like style (or the default one) but with a built-in number format.
+
+        The style is added if it is missing. None if there is no cell style to base it on.
+        """
+        base = style or "0"
+        key = (base, number_format_id)
+        if key not in self._formatted_styles:
+            xfs = self.items["cellXfs"]
+            if not 0 <= int(base) < len(xfs):
+                return None
+            xf = xfs[int(base)]
+            tag_end = xf.index(">")
+            if xf[tag_end - 1] == "/":
+                tag_end -= 1
+            attributes = _attributes(xf[:tag_end])
+            if attributes.get("numFmtId") == str(number_format_id):
+                self._formatted_styles[key] = base
+            else:
+                attributes.update(numFmtId=str(number_format_id), applyNumberFormat="1")
+                formatted = f"<xf{_format_attributes(attributes)}{xf[tag_end:]}"
+                if formatted not in xfs:
+                    xfs.append(formatted)
+                    self._date_styles = None
+                self._formatted_styles[key] = str(xfs.index(formatted))
+        return self._formatted_styles[key]
+
+    def _merge_items(self, section: str, items: typing.Iterable[str]) -> typing.Dict[str, str]:
+        mapping = {}
+        existing = self.items[section]
+        for index, item in enumerate(items):
+            if item not in existing:
+                existing.append(item)
+            mapping[str(index)] = str(existing.index(item))
+        return mapping
+
+    def import_styles(
+        self, other: "_Styles"
+    ) -> typing.Tuple[typing.Dict[str, str], typing.Dict[str, str]]:
+        """Append the styles of other that are missing here.
+
+        Returns the mappings of other's cell style and differential style indices to ours.
+        """
+        number_format_mapping = {}
+        for number_format_id, code in other.number_formats.items():
+            match = next((key for key, value in self.number_formats.items() if value == code), None)
+            if match is None:
+                match = str(
+                    max(
+                        [_FIRST_CUSTOM_NUMBER_FORMAT_ID - 1]
+                        + [int(key) for key in self.number_formats]
+                    )
+                    + 1
+                )
+                self.number_formats[match] = code
+                self.items["numFmts"].append(
+                    f'<numFmt numFmtId="{match}" formatCode="{_escape_attribute(code)}"/>'
+                )
+            number_format_mapping[number_format_id] = match
+
+        font_mapping = self._merge_items("fonts", other.items["fonts"])
+        fill_mapping = self._merge_items("fills", other.items["fills"])
+        border_mapping = self._merge_items("borders", other.items["borders"])
+        cell_xfs = []
+        for xf in other.items["cellXfs"]:
+            xf = _replace_attribute(xf, "numFmtId", number_format_mapping)
+            xf = _replace_attribute(xf, "fontId", font_mapping)
+            xf = _replace_attribute(xf, "fillId", fill_mapping)
+            xf = _replace_attribute(xf, "borderId", border_mapping)
+            # Named cell styles are not carried over; fall back to "Normal".
+            cell_xfs.append(re.sub(r'(\s)xfId="[^"]*"', r'\1xfId="0"', xf, count=1))
+        dxfs = [
+            _replace_attribute(dxf, "numFmtId", number_format_mapping)
+            for dxf in other.items["dxfs"]
+        ]
+        self._date_styles = None
+        return self._merge_items("cellXfs", cell_xfs), self._merge_items("dxfs", dxfs)
+
+    def to_xml(self) -> str:
+        xml = self.xml
+        for section, _ in self._SECTIONS:
+            items = self.items[section]
+            if not self._present[section]:
+                if not items:
+                    continue
+                follower = next(
+                    f"<{name}" for name in self._FOLLOWERS[section] if f"<{name}" in xml
+                )
+                index = xml.index(follower)
+                xml = f'{xml[:index]}<{section} count="0"/>{xml[index:]}'
+            match = re.search(rf"<{section}\b([^>]*?)(?:/>|>.*?</{section}>)", xml, re.S)
+            attributes = _attributes(match.group(1))
+            attributes["count"] = str(len(items))
+            replacement = f"<{section}{_format_attributes(attributes)}>{''.join(items)}</{section}>"
+            xml = xml[: match.start()] + replacement + xml[match.end() :]
+        return xml
+
+
+class _Cell:
+    __slots__ = ("value", "style", "xml")
+
+    def __init__(self, value, style: typing.Optional[str], xml: typing.Optional[str]) -> None:
+        self.value = value
+        self.style = style
+        # The cell's original markup, reused verbatim until the cell is assigned.
+        self.xml = xml
+
+
+class _Row:
+    __slots__ = ("attributes", "cells")
+
+    def __init__(self, attributes: typing.Dict[str, str]) -> None:
+        self.attributes = attributes
+        self.cells: typing.Dict[int, _Cell] = {}
+
+
+def _parse_row(
+    row_match: "re.Match[str]",
+    previous_index: int,
+    decode: typing.Callable,
+    last_column: typing.Optional[int] = None,
+) -> typing.Tuple[int, _Row]:
+    """Parse a <row> match; cells past last_column are left out (cells are stored in order)."""
+    attributes = _attributes(row_match.group(1))
+    row_index = int(attributes.pop("r", previous_index + 1))
+    attributes.pop("spans", None)
+    row = _Row(attributes)
+    column_index = 0
+    for cell_match in _CELL_RE.finditer(row_match.group(2) or ""):
+        cell_attributes = _attributes(cell_match.group(1))
+        if "r" in cell_attributes:
+            _, column_index = _split_reference(cell_attributes["r"])
+        else:
+            column_index += 1
+        if last_column is not None and column_index > last_column:
+            break
+        style = cell_attributes.get("s")
+        value = decode(cell_attributes.get("t", "n"), style, cell_match.group(2) or "")
+        row.cells[column_index] = _Cell(value, style, cell_match.group(0))
+    return row_index, row
+
+
+def _stream_rows(
+    stream: typing.BinaryIO,
+    decode: typing.Callable,
+    chunk_size: int = 1 << 16,
+    wanted_rows: typing.Optional[typing.AbstractSet[int]] = None,
+    last_column: typing.Optional[int] = None,
+) -> typing.Iterator[typing.Tuple[int, _Row]]:
+    """Parse the rows of a worksheet part chunk by chunk, holding at most one chunk of text.
+
+    With wanted_rows, other rows are skipped unparsed and reading stops after the last one.
+    """
+    last_wanted = max(wanted_rows, default=0) if wanted_rows is not None else None
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    row_index = 0
+    in_sheet_data = False
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += decoder.decode(chunk, final=not chunk)
+        if not in_sheet_data:
+            start = buffer.find("<sheetData")
+            if start < 0:
+                buffer = buffer[-len("<sheetData") :]  # keep a tag split across chunks
+                if not chunk:
+                    return
+                continue
+            in_sheet_data = True
+            buffer = buffer[start:]
+        position = 0
+        for row_match in _ROW_RE.finditer(buffer):
+            position = row_match.end()
+            if wanted_rows is not None:
+                reference = _ROW_INDEX_RE.search(row_match.group(1))
+                row_index = int(reference.group(1)) if reference else row_index + 1
+                if row_index > last_wanted:
+                    return
+                if row_index not in wanted_rows:
+                    continue
+                row_index -= 1  # so _parse_row infers the same index when r is absent
+            row_index, row = _parse_row(row_match, row_index, decode, last_column)
+            yield row_index, row
+        buffer = buffer[position:]
+        if "</sheetData>" in buffer or "<sheetData/>" in buffer or not chunk:
+            return
+
+
+def _row_style(row: _Row) -> typing.Optional[str]:
+    """The style a new cell in row gets: like Excel, that of formatting applied to the row."""
+    return row.attributes.get("s") if row.attributes.get("customFormat") == "1" else None
+
+
+def _row_xml(row_index: int, row: _Row, cell_xml: typing.Callable) -> str:
+    attributes = _format_attributes(row.attributes)
+    if not row.cells:
+        return f'<row r="{row_index}"{attributes}/>' if attributes else ""
+    cells = (
+        row.cells[column].xml or cell_xml(row_index, column, row.cells[column])
+        for column in sorted(row.cells)
+    )
+    return f'<row r="{row_index}"{attributes}>{"".join(cells)}</row>'
+
+
+def _width(rows: typing.Iterable[typing.Sequence[typing.Any]]) -> int:
+    """Length of the longest of rows if they can be read more than once, else 0."""
+    if not isinstance(rows, typing.Sequence):
+        return 0
+    return max((len(row) for row in rows), default=0)
+
+
+def _write_chunks(file: typing.BinaryIO, texts: typing.Iterable[str]) -> None:
+    """Write texts to file as UTF-8, gathered into writes of about _STREAM_WRITE_CHARS."""
+    buffer: typing.List[str] = []
+    size = 0
+    for text in texts:
+        buffer.append(text)
+        size += len(text)
+        if size >= _STREAM_WRITE_CHARS:
+            file.write("".join(buffer).encode("utf-8"))
+            buffer.clear()
+            size = 0
+    file.write("".join(buffer).encode("utf-8"))
+
+
+class _Worksheet:
+    """A worksheet part; the cell data is modelled, the surrounding markup is kept as-is."""
+
+    def __init__(self, xml: str, decode: typing.Callable) -> None:
+        match = _SHEET_DATA_RE.search(xml)
+        self.head = xml[: match.start()]
+        self.tail = xml[match.end() :]
+        self.dirty = False
+        self.rows: typing.Dict[int, _Row] = {}
+        # (first row, first column, rows) given to write_rows, to be written when saved.
+        self.stream: typing.Optional[typing.Tuple[int, int, typing.Iterable]] = None
+        row_index = 0
+        for row_match in _ROW_RE.finditer(match.group(0)):
+            row_index, self.rows[row_index] = _parse_row(row_match, row_index, decode)
+
+    def used_range(self) -> typing.Tuple[int, int]:
+        rows = [index for index, row in self.rows.items() if row.cells]
+        columns = [max(row.cells) for row in self.rows.values() if row.cells]
+        return max(rows, default=1), max(columns, default=1)
+
+    def get_block(
+        self, first_row: int, first_column: int, last_row: int, last_column: int
+    ) -> typing.List[typing.List[typing.Any]]:
+        block = []
+        for row_index in range(first_row, last_row + 1):
+            row = self.rows.get(row_index)
+            cells = row.cells if row is not None else {}
+            block.append(
+                [
+                    cells[column].value if column in cells else None
+                    for column in range(first_column, last_column + 1)
+                ]
+            )
+        return block
+
+    def get(self, row: int, column: int) -> typing.Any:
+        cell = self.rows[row].cells.get(column) if row in self.rows else None
+        return None if cell is None else cell.value
+
+    def style(self, row: int, column: int) -> typing.Optional[str]:
+        if row not in self.rows:
+            return None
+        cell = self.rows[row].cells.get(column)
+        return cell.style if cell is not None else _row_style(self.rows[row])
+
+    def set(self, row: int, column: int, value: typing.Any) -> None:
+        self.dirty = True
+        if row not in self.rows:
+            self.rows[row] = _Row({})
+        cells = self.rows[row].cells
+        if column not in cells and value is None:
+            return
+        style = self.style(row, column)
+        if value is None and style is None:
+            del cells[column]
+        else:
+            cells[column] = _Cell(value, style, None)
+
+    def set_style(self, row: int, column: int, style: str) -> None:
+        self.dirty = True
+        if row not in self.rows:
+            self.rows[row] = _Row({})
+        cell = self.rows[row].cells.get(column)
+        self.rows[row].cells[column] = _Cell(None if cell is None else cell.value, style, None)
+
+    def to_xml(self, cell_xml: typing.Callable) -> str:
+        parts = ["<sheetData>"]
+        for row_index in sorted(self.rows):
+            parts.append(_row_xml(row_index, self.rows[row_index], cell_xml))
+        parts.append("</sheetData>")
+
+        reference = "A1"
+        if any(row.cells for row in self.rows.values()):
+            rows, columns = self.used_range()
+            reference = f"A1:{_backends.column_name(columns)}{rows}"
+        head = _DIMENSION_RE.sub(f'<dimension ref="{reference}"/>', self.head, count=1)
+        return head + "".join(parts) + self.tail
+
+
+class _SheetEntry:
+    """A <sheet> element of workbook.xml."""
+
+    __slots__ = ("name", "attributes", "original_index")
+
+    def __init__(
+        self, name: str, attributes: typing.Dict[str, str], original_index: typing.Optional[int]
+    ) -> None:
+        self.name = name
+        self.attributes = attributes
+        self.original_index = original_index
+
+    @property
+    def rel_id(self) -> str:
+        return self.attributes["r:id"]
+
+    def to_xml(self) -> str:
+        attributes = dict(self.attributes, name=_escape_attribute(self.name))
+        return f"<sheet{_format_attributes(attributes)}/>"
+
+
+class _SheetImage(typing.NamedTuple):
+    """A parsed worksheet (cells, column widths, formats) and the styles it refers to."""
+
+    worksheet: _Worksheet
+    styles: _Styles
+
+
+def _load_sheet_image(path: pathlib.Path, sheet_index: int) -> _SheetImage:
+    source = OoxmlWorkbook(path)
+    try:
+        entry = source._sheets[sheet_index - 1]
+        worksheet = source._worksheet(entry.name)
+        if source._read_bytes(_relationships_part(source._sheet_part(entry))) is not None:
+            _MODULE_LOGGER.info(
+                "Sheet %r of %s has related parts (tables, drawings, ...), not copying them.",
+                entry.name,
+                path,
+            )
+            worksheet.head = _strip_relationships(worksheet.head)
+            worksheet.tail = _strip_relationships(worksheet.tail)
+        return _SheetImage(worksheet, source._styles_table())
+    finally:
+        source.close()
+
+
+def _copy_compressed(
+    source: zipfile.ZipFile, info: zipfile.ZipInfo, output: zipfile.ZipFile
+) -> bool:
+    """Append a member to output exactly as stored in source, without recompressing it.
+
+    zipfile has no public way to write compressed data as is, so this appends to output's
+    file and directory itself. Returns False (copying nothing) for members this cannot handle,
+    i.e. ZIP64 ones, and if :func:`_raw_copy_works` finds zipfile laid out differently.
+    """
+    if max(info.file_size, info.compress_size, info.header_offset) >= zipfile.ZIP64_LIMIT:
+        return False
+    if not _raw_copy_works():
+        return False
+    return _append_raw(source, info, output)
+
+
+def _append_raw(source: zipfile.ZipFile, info: zipfile.ZipInfo, output: zipfile.ZipFile) -> bool:
+    source.fp.seek(info.header_offset)
+    header = source.fp.read(30)
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    source.fp.seek(name_length + extra_length, os.SEEK_CUR)
+    data = source.fp.read(info.compress_size)
+
+    copied = copy.copy(info)
+    copied.flag_bits &= ~_DATA_DESCRIPTOR_FLAG  # sizes and CRC go in the local header
+    copied.header_offset = output.fp.tell()
+    output.fp.write(copied.FileHeader())
+    output.fp.write(data)
+    output.start_dir = output.fp.tell()
+    output.filelist.append(copied)
+    output.NameToInfo[copied.filename] = copied
+    output._didModify = True
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def _raw_copy_works() -> bool:
+    """Whether :func:`_append_raw` works with this Python's zipfile, checked once in memory.
+
+    It relies on undocumented ZipFile attributes; if they change, members are recompressed
+    through the public API instead.
+    """
+    data = b"<check/>" * 64
+    try:
+        source_buffer, output_buffer = io.BytesIO(), io.BytesIO()
+        with zipfile.ZipFile(source_buffer, "w", zipfile.ZIP_DEFLATED) as source:
+            source.writestr("check.xml", data)
+        with zipfile.ZipFile(source_buffer) as source, zipfile.ZipFile(
+            output_buffer, "w", zipfile.ZIP_DEFLATED
+        ) as output:
+            _append_raw(source, source.getinfo("check.xml"), output)
+            output.writestr("after.xml", data)
+        with zipfile.ZipFile(output_buffer) as output:
+            return (
+                output.testzip() is None
+                and output.namelist() == ["check.xml", "after.xml"]
+                and output.read("check.xml") == data
+            )
+    except Exception:  # any failure means the layout is not the one expected
+        _MODULE_LOGGER.debug("Raw zip member copy unavailable", exc_info=True)
+        return False
+
+
+class OoxmlWorkbook(_backends.Workbook):
+    """An .xlsx package opened for reading and editing."""
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        load_sheet_image: typing.Callable[[pathlib.Path, int], _SheetImage] = _load_sheet_image,
+    ) -> None:
+        """Read the package structure of the workbook at path.
+
+        load_sheet_image supplies the sheets copied in from other workbooks, e.g. from a cache.
+        """
+        self._path = pathlib.Path(path)
+        self._load_sheet_image = load_sheet_image
+        self._zip: typing.Optional[zipfile.ZipFile] = zipfile.ZipFile(self._path)
+        self._modified_parts: typing.Dict[str, typing.Optional[bytes]] = {}
+
+        package_relationships = _Relationships("", self._read_text("_rels/.rels"))
+        self._workbook_part = _resolve_target(
+            "", package_relationships.by_type(_OFFICE_DOCUMENT_REL_TYPE)["Target"]
+        )
+        self._workbook_xml = self._read_text(self._workbook_part)
+        self._relationships = _Relationships(
+            _relationships_part(self._workbook_part),
+            self._read_text(_relationships_part(self._workbook_part)),
+        )
+        self._content_types = _ContentTypes(self._read_text(_CONTENT_TYPES_PART))
+        sheets_match = _SHEETS_RE.search(self._workbook_xml)
+        self._sheets = []
+        for index, match in enumerate(_SHEET_RE.finditer(sheets_match.group(1) or "")):
+            attributes = _attributes(match.group(1))
+            name = html.unescape(attributes.pop("name"))
+            self._sheets.append(_SheetEntry(name, attributes, index))
+        self._worksheets: typing.Dict[str, _Worksheet] = {}
+        self._shared_strings: typing.Optional[typing.List[str]] = None
+        self._shared_string_items: typing.List[str] = []
+        self._shared_string_indices: typing.Optional[typing.Dict[str, int]] = None
+        self._styles: typing.Optional[_Styles] = None
+        self._workbook_dirty = False
+        self._shared_strings_dirty = False
+        self._styles_dirty = False
+
+    # --- package plumbing -------------------------------------------------------------
+
+    def _read_bytes(self, part: str) -> typing.Optional[bytes]:
+        if part in self._modified_parts:
+            return self._modified_parts[part]
+        try:
+            return self._zip.read(part)
+        except KeyError:
+            return None
+
+    def _read_text(self, part: str) -> typing.Optional[str]:
+        data = self._read_bytes(part)
+        return None if data is None else data.decode("utf-8")
+
+    def _part_by_type(self, rel_type: str) -> typing.Optional[str]:
+        relationship = self._relationships.by_type(rel_type)
+        if relationship is None:
+            return None
+        return _resolve_target(self._workbook_part, relationship["Target"])
+
+    def _sheet_entry(self, sheet_name: str) -> _SheetEntry:
+        for entry in self._sheets:
+            if entry.name.lower() == sheet_name.lower():
+                return entry
+        raise KeyError(f"No sheet named {sheet_name!r} in {self._path}")
+
+    def _sheet_part(self, entry: _SheetEntry) -> str:
+        return _resolve_target(
+            self._workbook_part, self._relationships.by_id(entry.rel_id)["Target"]
+        )
+
+    def _worksheet_model(self, sheet_name: str) -> _Worksheet:
+        part = self._sheet_part(self._sheet_entry(sheet_name))
+        if part not in self._worksheets:
+            self._worksheets[part] = _Worksheet(self._read_text(part), self._decode)
+        return self._worksheets[part]
+
+    def _worksheet(self, sheet_name: str) -> _Worksheet:
+        """The sheet's model, with any rows given to write_rows written into it."""
+        worksheet = self._worksheet_model(sheet_name)
+        if worksheet.stream is not None:
+            self._write_stream(worksheet)
+        return worksheet
+
+    def _styles_table(self) -> _Styles:
+        if self._styles is None:
+            xml = self._read_text(self._part_by_type(_STYLES_REL_TYPE) or "")
+            self._styles = _Styles(xml or f'<styleSheet xmlns="{_MAIN_NS}"/>')
+        return self._styles
+
+    def _formatted_style(
+        self, style: typing.Optional[str], number_format_id: int
+    ) -> typing.Optional[str]:
+        styles = self._styles_table()
+        count = len(styles.items["cellXfs"])
+        formatted = styles.with_number_format(style, number_format_id)
+        if len(styles.items["cellXfs"]) != count:
+            self._styles_dirty = True
+        return formatted
+
+    def _assign(self, worksheet: _Worksheet, row: int, column: int, value: typing.Any) -> None:
+        """Store an assigned value the way Excel would.
+
+        Values are converted by :func:`_coerce`, except that text is kept as is in cells
+        formatted as text, and a date gets a date format if its cell has none.
+        """
+        coerced = _coerce(value)
+        if isinstance(value, str) and isinstance(coerced, float):
+            style = worksheet.style(row, column)
+            if style is not None and self._styles_table().is_text(int(style)):
+                coerced = value
+        worksheet.set(row, column, coerced)
+        if isinstance(coerced, datetime.date):
+            style = worksheet.style(row, column)
+            date_style = self._date_style(style, coerced)
+            if date_style != style:
+                worksheet.set_style(row, column, date_style)
+
+    def _date_style(
+        self, style: typing.Optional[str], value: datetime.date
+    ) -> typing.Optional[str]:
+        """Style for value in a cell with style: style, with a date format if it has none."""
+        if style is not None and self._styles_table().is_date(int(style)):
+            return style
+        date_format = (
+            _DATE_TIME_FORMAT_ID if isinstance(value, datetime.datetime) else _DATE_FORMAT_ID
+        )
+        return self._formatted_style(style, date_format) or style
+
+    def _typed(
+        self, style: typing.Optional[str], value: typing.Any
+    ) -> typing.Tuple[typing.Any, typing.Optional[str]]:
+        """(value, style) to store for a value given to write_rows in a cell with style.
+
+        Text stays text, with the text format if Excel would read it as something else; ""
+        is a blank, and a date gets a date format if the cell has none.
+        """
+        if isinstance(value, str):
+            if not value:
+                return None, style
+            if _backends.excel_would_convert(value):
+                return value, self._formatted_style(style, _TEXT_FORMAT_ID) or style
+        elif isinstance(value, datetime.date):
+            return value, self._date_style(style, value)
+        return value, style
+
+    def _write_stream(self, worksheet: _Worksheet) -> None:
+        """Write the rows given to write_rows into the worksheet's model."""
+        first_row, first_column, rows = worksheet.stream
+        worksheet.stream = None
+        width = _width(rows)
+        for row_index, values in enumerate(rows, start=first_row):
+            padding = [None] * (width - len(values))
+            for column, value in enumerate([*values, *padding], start=first_column):
+                style = worksheet.style(row_index, column)
+                value, typed_style = self._typed(style, value)
+                worksheet.set(row_index, column, value)
+                if typed_style != style:
+                    worksheet.set_style(row_index, column, typed_style)
+
+    def _streamed_row(
+        self, row: typing.Optional[_Row], first_column: int, values: typing.Sequence, width: int
+    ) -> _Row:
+        """A copy of row (None if missing) with values written from first_column on."""
+        merged = _Row({} if row is None else row.attributes)
+        if row is not None:
+            merged.cells = dict(row.cells)
+        padding = [None] * (width - len(values))
+        for column, value in enumerate([*values, *padding], start=first_column):
+            cell = merged.cells.get(column)
+            style = cell.style if cell is not None else _row_style(merged)
+            value, style = self._typed(style, value)
+            if value is None and (cell is None or style is None):
+                merged.cells.pop(column, None)  # as _Worksheet.set leaves a blank
+            else:
+                merged.cells[column] = _Cell(value, style, None)
+        return merged
+
+    def _streamed_sheet_xml(self, worksheet: _Worksheet) -> typing.Iterator[str]:
+        """The worksheet part, with the rows given to write_rows read one at a time.
+
+        The rows are merged in order with the rows the model holds (e.g. from the template),
+        and their text is written inline so the shared strings table does not grow.
+        """
+        first_row, first_column, rows = worksheet.stream
+        width = _width(rows)
+        if width:
+            last_row, last_column = worksheet.used_range()
+            last_row = max(last_row, first_row + len(rows) - 1)
+            last_column = max(last_column, first_column + width - 1)
+            dimension = f'<dimension ref="A1:{_backends.column_name(last_column)}{last_row}"/>'
+        else:
+            dimension = ""  # optional, and unknown until every row has been read
+        yield _DIMENSION_RE.sub(dimension, worksheet.head, count=1)
+        yield "<sheetData>"
+        model_rows = sorted(worksheet.rows)
+        position = 0
+        for row_index, values in enumerate(rows, start=first_row):
+            while position < len(model_rows) and model_rows[position] < row_index:
+                yield _row_xml(
+                    model_rows[position], worksheet.rows[model_rows[position]], self._cell_xml
+                )
+                position += 1
+            if position < len(model_rows) and model_rows[position] == row_index:
+                position += 1
+            row = self._streamed_row(worksheet.rows.get(row_index), first_column, values, width)
+            yield _row_xml(row_index, row, self._inline_cell_xml)
+        for row_index in model_rows[position:]:
+            yield _row_xml(row_index, worksheet.rows[row_index], self._cell_xml)
+        yield "</sheetData>"
+        yield worksheet.tail
+
+    def _load_shared_strings(self) -> typing.List[str]:
+        if self._shared_strings is None:
+            part = self._part_by_type(_SHARED_STRINGS_REL_TYPE)
+            xml = self._read_text(part) if part else None
+            self._shared_string_items = _SHARED_STRING_ITEM_RE.findall(xml or "")
+            self._shared_strings = [_text_content(item) for item in self._shared_string_items]
+        return self._shared_strings
+
+    def _shared_string_index(self, text: str) -> int:
+        strings = self._load_shared_strings()
+        if self._shared_string_indices is None:
+            self._shared_string_indices = {}
+            for index, value in enumerate(strings):
+                self._shared_string_indices.setdefault(value, index)
+        if text not in self._shared_string_indices:
+            self._shared_string_indices[text] = len(strings)
+            strings.append(text)
+            space = ' xml:space="preserve"' if text != text.strip() else ""
+            self._shared_string_items.append(f"<si><t{space}>{_escape(text)}</t></si>")
+            self._shared_strings_dirty = True
+        return self._shared_string_indices[text]
+
+    def _decode(self, cell_type: str, style: typing.Optional[str], xml: str) -> typing.Any:
+        if cell_type == "inlineStr":
+            return _text_content(xml)
+        match = _VALUE_RE.search(xml)
+        if match is None:
+            return None
+        text = html.unescape(match.group(1))
+        if cell_type == "s":
+            return self._load_shared_strings()[int(text)]
+        if cell_type in ("str", "e"):
+            return text
+        if cell_type == "b":
+            return text == "1"
+        number = float(text)
+        if style is not None and self._styles_table().is_date(int(style)):
+            return _from_excel_serial(number)
+        return number
+
+    def _cell_xml(self, row: int, column: int, cell: _Cell) -> str:
+        reference = f"{_backends.column_name(column)}{row}"
+        style = f' s="{cell.style}"' if cell.style is not None else ""
+        value = cell.value
+        if value is None:
+            return f'<c r="{reference}"{style}/>'
+        if isinstance(value, bool):
+            return f'<c r="{reference}"{style} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            value = _to_excel_serial(value)
+        if isinstance(value, (int, float)) and value == value and abs(value) != float("inf"):
+            return f'<c r="{reference}"{style}><v>{_format_number(value)}</v></c>'
+        index = self._shared_string_index(str(value))
+        return f'<c r="{reference}"{style} t="s"><v>{index}</v></c>'
+
+    def _inline_cell_xml(self, row: int, column: int, cell: _Cell) -> str:
+        """Like :meth:`_cell_xml`, but text is written into the cell, not the shared strings."""
+        if not isinstance(cell.value, str):
+            return self._cell_xml(row, column, cell)
+        reference = f"{_backends.column_name(column)}{row}"
+        style = f' s="{cell.style}"' if cell.style is not None else ""
+        space = ' xml:space="preserve"' if cell.value != cell.value.strip() else ""
+        text = _escape(cell.value)
+        return f'<c r="{reference}"{style} t="inlineStr"><is><t{space}>{text}</t></is></c>'
+
+    def _add_part(self, part: str, content_type: str, data: str) -> None:
+        self._modified_parts[part] = data.encode("utf-8")
+        self._content_types.add_override(part, content_type)
+
+    def _remove_part(self, part: str) -> None:
+        self._modified_parts[part] = None
+        self._content_types.remove_override(part)
+        self._worksheets.pop(part, None)
+
+    def _new_part_name(self, pattern: str) -> str:
+        taken = {
+            part
+            for part in set(self._zip.namelist()) | set(self._modified_parts)
+            if self._read_bytes(part) is not None
+        }
+        number = 1
+        while pattern.format(number) in taken:
+            number += 1
+        return pattern.format(number)
+
+    def _add_sheet_entry(self, name: str, part: str, xml: str) -> _Worksheet:
+        self._check_new_name(name)
+        self._add_part(part, _WORKSHEET_CONTENT_TYPE, xml)
+        rel_id = self._relationships.add(
+            _WORKSHEET_REL_TYPE, _relative_target(self._workbook_part, part)
+        )
+        sheet_id = max((int(entry.attributes["sheetId"]) for entry in self._sheets), default=0)
+        attributes = {"sheetId": str(sheet_id + 1), "r:id": rel_id}
+        self._sheets.insert(0, _SheetEntry(name, attributes, None))
+        self._workbook_dirty = True
+        worksheet = self._worksheets[part] = _Worksheet(xml, self._decode)
+        return worksheet
+
+    def _check_new_name(self, name: str) -> None:
+        if not name or len(name) > _MAX_SHEET_NAME_LENGTH or re.search(r"[\\/?*\[\]:]", name):
+            raise ValueError(f"Invalid sheet name {name!r}")
+        if any(entry.name.lower() == name.lower() for entry in self._sheets):
+            raise ValueError(f"A sheet named {name!r} already exists in {self._path}")
+
+    def _workbook_to_xml(self) -> str:
+        xml = self._workbook_xml
+        positions = {
+            entry.original_index: index
+            for index, entry in enumerate(self._sheets)
+            if entry.original_index is not None
+        }
+
+        def _defined_name(match):
+            attributes = _attributes(match.group(1))
+            if "localSheetId" in attributes:
+                if int(attributes["localSheetId"]) not in positions:
+                    return ""
+                attributes["localSheetId"] = str(positions[int(attributes["localSheetId"])])
+            return (
+                f"<definedName{_format_attributes(attributes)}>{match.group(2) or ''}</definedName>"
+            )
+
+        def _defined_names(match):
+            names = _DEFINED_NAME_RE.sub(_defined_name, match.group(1) or "")
+            return f"<definedNames>{names}</definedNames>" if names else ""
+
+        def _tab(match):
+            index = int(match.group(2))
+            return f'{match.group(1)}="{index if index < len(self._sheets) else 0}"'
+
+        xml = _DEFINED_NAMES_RE.sub(_defined_names, xml, count=1)
+        xml = _ACTIVE_TAB_RE.sub(_tab, xml)
+        sheets = "".join(entry.to_xml() for entry in self._sheets)
+        return _SHEETS_RE.sub(lambda _: f"<sheets>{sheets}</sheets>", xml, count=1)
+
+    def _shared_strings_to_xml(self) -> str:
+        count = len(self._shared_string_items)
+        return (
+            f'{_XML_DECLARATION}<sst xmlns="{_MAIN_NS}" count="{count}" uniqueCount="{count}">'
+            f"{''.join(self._shared_string_items)}</sst>"
+        )
+
+    def _serialize(self) -> typing.Dict[str, typing.Optional[bytes]]:
+        parts = dict(self._modified_parts)
+        for part, worksheet in self._worksheets.items():
+            if worksheet.dirty and worksheet.stream is None:
+                parts[part] = worksheet.to_xml(self._cell_xml).encode("utf-8")
+        if self._shared_strings_dirty:
+            part = self._part_by_type(_SHARED_STRINGS_REL_TYPE)
+            if part is None:
+                part = posixpath.join(posixpath.dirname(self._workbook_part), "sharedStrings.xml")
+                self._relationships.add(
+                    _SHARED_STRINGS_REL_TYPE, _relative_target(self._workbook_part, part)
+                )
+                self._content_types.add_override(part, _SHARED_STRINGS_CONTENT_TYPE)
+                self._workbook_dirty = True
+            parts[part] = self._shared_strings_to_xml().encode("utf-8")
+        if self._styles_dirty:
+            parts[self._part_by_type(_STYLES_REL_TYPE)] = self._styles.to_xml().encode("utf-8")
+        if self._workbook_dirty:
+            parts[self._workbook_part] = self._workbook_to_xml().encode("utf-8")
+            parts[self._relationships.part] = self._relationships.to_xml().encode("utf-8")
+            parts[_CONTENT_TYPES_PART] = self._content_types.to_xml().encode("utf-8")
+        return parts
+
+    # --- Workbook interface -------------------------------------------------------------
+
+    def save(self) -> None:
+        """Write the package to a temporary file, then move it over the original.
+
+        Rows given to write_rows are written straight into the file as they are read.
+        """
+        streamed = {
+            part: worksheet
+            for part, worksheet in self._worksheets.items()
+            if worksheet.stream is not None
+        }
+        handle, temp_name = tempfile.mkstemp(
+            dir=self._path.parent, prefix=f".{self._path.stem}.", suffix=".tmp"
+        )
+        os.close(handle)
+        try:
+            with zipfile.ZipFile(temp_name, "w", zipfile.ZIP_DEFLATED) as output:
+                # First, as writing their cells can add styles and shared strings.
+                names = set(self._zip.namelist())
+                for part, worksheet in streamed.items():
+                    with output.open(
+                        self._zip.getinfo(part) if part in names else part, "w"
+                    ) as file:
+                        _write_chunks(file, self._streamed_sheet_xml(worksheet))
+                parts = self._serialize()
+                for info in self._zip.infolist():
+                    if info.filename in streamed:
+                        continue
+                    if info.filename in parts:
+                        data = parts.pop(info.filename)
+                        if data is not None:
+                            output.writestr(info, data)
+                    elif not _copy_compressed(self._zip, info, output):
+                        output.writestr(info, self._zip.read(info))
+                for part, data in parts.items():
+                    if data is not None and part not in streamed:
+                        output.writestr(part, data)
+            self._zip.close()
+            os.replace(temp_name, self._path)
+        except BaseException:
+            pathlib.Path(temp_name).unlink(missing_ok=True)
+            raise
+        self._zip = zipfile.ZipFile(self._path)
+        self._modified_parts = {}
+        for part in streamed:
+            del self._worksheets[part]  # read back from the file when next needed
+        for worksheet in self._worksheets.values():
+            worksheet.dirty = False
+        self._workbook_dirty = self._shared_strings_dirty = self._styles_dirty = False
+        self._workbook_xml = self._read_text(self._workbook_part)
+        for index, entry in enumerate(self._sheets):
+            entry.original_index = index
+
+    def close(self) -> None:
+        """Release the file; unsaved changes are discarded."""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def sheet_fingerprint(self, sheet_name: str) -> typing.Optional[str]:
+        """CRC and size of the sheet's saved part and of the shared strings and styles it uses.
+
+        These come from the zip directory, so nothing is decompressed.
+        """
+        part = self._sheet_part(self._sheet_entry(sheet_name))
+        worksheet = self._worksheets.get(part)
+        if (
+            (worksheet is not None and worksheet.dirty)
+            or self._shared_strings_dirty
+            or self._styles_dirty
+        ):
+            return None
+        fingerprint = []
+        for name in (
+            part,
+            self._part_by_type(_SHARED_STRINGS_REL_TYPE),
+            self._part_by_type(_STYLES_REL_TYPE),
+        ):
+            if name in self._modified_parts:
+                return None
+            try:
+                info = self._zip.getinfo(name)
+            except KeyError:  # no such part (or no part name at all)
+                fingerprint.append("-")
+                continue
+            fingerprint.append(f"{info.CRC:08x}:{info.file_size}")
+        return "/".join(fingerprint)
+
+    def worksheet_names(self) -> typing.List[str]:
+        """Names of the worksheets, in tab order."""
+        return [
+            entry.name
+            for entry in self._sheets
+            if self._relationships.by_id(entry.rel_id)["Type"] == _WORKSHEET_REL_TYPE
+        ]
+
+    def used_range(self, sheet_name: str) -> typing.Tuple[int, int]:
+        """Last row and column holding a cell (at least 1x1, like Excel's UsedRange)."""
+        return self._worksheet(sheet_name).used_range()
+
+    def get_value(self, sheet_name: str, row: int, column: int) -> typing.Any:
+        """Value of a single cell."""
+        return self._worksheet(sheet_name).get(int(row), int(column))
+
+    def set_value(self, sheet_name: str, row: int, column: int, value: typing.Any) -> None:
+        """Assign a single cell, converting the value the way Excel would."""
+        self._assign(self._worksheet(sheet_name), int(row), int(column), value)
+
+    def get_block(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        last_row: typing.Optional[int] = None,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.List[typing.List[typing.Any]]:
+        """Values of a rectangular block, one list per row."""
+        worksheet = self._worksheet(sheet_name)
+        used_rows, used_columns = worksheet.used_range()
+        return worksheet.get_block(
+            int(first_row),
+            int(first_column),
+            used_rows if last_row is None else int(last_row),
+            used_columns if last_column is None else int(last_column),
+        )
+
+    def iter_rows(
+        self,
+        sheet_name: str,
+        first_row: int = 1,
+        first_column: int = 1,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        """Yield the rows holding values, streaming the worksheet XML unless already loaded."""
+        yield from self._iter_rows(sheet_name, int(first_row), int(first_column), last_column)
+
+    def get_rows(
+        self,
+        sheet_name: str,
+        row_indices: typing.Iterable[int],
+        first_column: int = 1,
+        last_column: typing.Optional[int] = None,
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        """Yield just the given rows, parsing no other rows and stopping after the last one."""
+        wanted = {int(row) for row in row_indices}
+        yield from self._iter_rows(sheet_name, 1, int(first_column), last_column, wanted)
+
+    def _iter_rows(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        last_column: typing.Optional[int],
+        wanted_rows: typing.Optional[typing.AbstractSet[int]] = None,
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        last_column = None if last_column is None else int(last_column)
+        part = self._sheet_part(self._sheet_entry(sheet_name))
+        if part in self._worksheets or part in self._modified_parts:
+            rows = self._worksheet(sheet_name).rows
+            if wanted_rows is None:
+                selected = sorted(rows.items())
+            else:
+                selected = [(index, rows[index]) for index in sorted(wanted_rows) if index in rows]
+            yield from self._row_values(selected, first_row, first_column, last_column)
+            return
+        with self._zip.open(part) as stream:
+            rows = _stream_rows(
+                stream, self._decode, wanted_rows=wanted_rows, last_column=last_column
+            )
+            yield from self._row_values(rows, first_row, first_column, last_column)
+
+    @staticmethod
+    def _row_values(
+        rows: typing.Iterable[typing.Tuple[int, _Row]],
+        first_row: int,
+        first_column: int,
+        last_column: typing.Optional[int],
+    ) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+        for row_index, row in rows:
+            if row_index < first_row:
+                continue
+            cells = {
+                column: cell.value
+                for column, cell in row.cells.items()
+                if cell.value is not None
+                and column >= first_column
+                and (last_column is None or column <= last_column)
+            }
+            if not cells:
+                continue
+            end = max(cells) if last_column is None else last_column
+            yield row_index, [cells.get(column) for column in range(first_column, end + 1)]
+
+    def set_block(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        rows: typing.Sequence[typing.Sequence[typing.Any]],
+    ) -> None:
+        """Assign a block of cells, converting values the way Excel would."""
+        worksheet = self._worksheet(sheet_name)
+        width = max((len(row) for row in rows), default=0)
+        for row_offset, row in enumerate(rows):
+            for column_offset in range(width):
+                value = row[column_offset] if column_offset < len(row) else None
+                self._assign(
+                    worksheet,
+                    int(first_row) + row_offset,
+                    int(first_column) + column_offset,
+                    value,
+                )
+
+    def write_rows(
+        self,
+        sheet_name: str,
+        first_row: int,
+        first_column: int,
+        rows: typing.Iterable[typing.Sequence[typing.Any]],
+    ) -> None:
+        """Write rows when the workbook is saved, straight from rows into the file.
+
+        Rows are read one at a time and merged with the sheet's other rows as the part is
+        written, so the sheet is never held in memory whole; reading or changing the sheet
+        first writes them into its model instead. Short rows are padded with blanks only if
+        rows is a sequence. Text is stored as text, with the text format if Excel would read
+        it as something else, and a date gets a date format if its cell has none.
+        """
+        worksheet = self._worksheet(sheet_name)
+        worksheet.stream = (int(first_row), int(first_column), rows)
+        worksheet.dirty = True
+
+    def format_as_text(
+        self, sheet_name: str, first_row: int, last_row: int, columns: typing.Iterable[int]
+    ) -> None:
+        """Give each cell of the columns from first_row to last_row the text number format."""
+        worksheet = self._worksheet(sheet_name)
+        columns = [int(column) for column in columns]
+        for row in range(int(first_row), int(last_row) + 1):
+            for column in columns:
+                style = worksheet.style(row, column)
+                text_style = self._formatted_style(style, _TEXT_FORMAT_ID)
+                if text_style is not None and text_style != style:
+                    worksheet.set_style(row, column, text_style)
+
+    def copy_sheet_from(
+        self, source_workbook: pathlib.Path, sheet_index: int, new_name: str
+    ) -> None:
+        """Copy a sheet from another workbook file in front of the first sheet."""
+        image = self._load_sheet_image(pathlib.Path(source_workbook), sheet_index)
+        worksheet = image.worksheet
+        head, tail = worksheet.head, worksheet.tail
+
+        style_mapping: typing.Dict[str, str] = {}
+        if image.styles.xml != self._styles_table().xml:
+            style_mapping, differential_mapping = self._styles_table().import_styles(image.styles)
+            self._styles_dirty = True
+            head, tail = (
+                _remap_styles(text, style_mapping, differential_mapping) for text in (head, tail)
+            )
+
+        part = self._new_part_name(
+            posixpath.join(posixpath.dirname(self._workbook_part), "worksheets/sheet{}.xml")
+        )
+        new_sheet = self._add_sheet_entry(new_name, part, head + "<sheetData/>" + tail)
+        for row_index, row in worksheet.rows.items():
+            new_row = new_sheet.rows[row_index] = _Row(dict(row.attributes))
+            if "s" in new_row.attributes:
+                new_row.attributes["s"] = style_mapping.get(
+                    new_row.attributes["s"], new_row.attributes["s"]
+                )
+            for column_index, cell in row.cells.items():
+                xml = cell.xml
+                if xml is not None and _attributes(xml[: xml.index(">")]).get("t") == "s":
+                    # Shared string indices refer to the source's table; re-intern the text.
+                    xml = None
+                elif xml is not None and cell.style in style_mapping:
+                    xml = _replace_attribute(xml, "s", style_mapping)
+                style = style_mapping.get(cell.style, cell.style)
+                new_row.cells[column_index] = _Cell(cell.value, style, xml)
+        new_sheet.dirty = True
+
+    def remove_sheet(self, sheet_name: str) -> None:
+        """Delete a sheet along with the parts only it refers to."""
+        entry = self._sheet_entry(sheet_name)
+        if len(self._sheets) == 1:
+            raise ValueError(f"Cannot remove {sheet_name!r}, a workbook must keep one sheet.")
+        part = self._sheet_part(entry)
+        relationships_part = _relationships_part(part)
+        for relationship in _Relationships(
+            relationships_part, self._read_text(relationships_part)
+        ).items:
+            if relationship.get("TargetMode") != "External":
+                self._remove_part(_resolve_target(part, relationship["Target"]))
+        if self._read_bytes(relationships_part) is not None:
+            self._modified_parts[relationships_part] = None
+        self._remove_part(part)
+        self._relationships.remove(entry.rel_id)
+        self._sheets.remove(entry)
+
+        calc_chain = self._relationships.by_type(_CALC_CHAIN_REL_TYPE)
+        if calc_chain is not None:
+            # Excel rebuilds the calculation chain; a stale one makes it "repair" the file.
+            self._remove_part(_resolve_target(self._workbook_part, calc_chain["Target"]))
+            self._relationships.remove(calc_chain["Id"])
+        self._workbook_dirty = True
+
+    def rename_sheet(self, old_name: str, new_name: str) -> None:
+        """Rename a sheet."""
+        entry = self._sheet_entry(old_name)
+        if entry.name.lower() != new_name.lower():
+            self._check_new_name(new_name)
+        entry.name = new_name
+        self._workbook_dirty = True
+
+    def add_sheet(self, sheet_name: str) -> None:
+        """Add an empty sheet in front of the first sheet."""
+        part = self._new_part_name(
+            posixpath.join(posixpath.dirname(self._workbook_part), "worksheets/sheet{}.xml")
+        )
+        self._add_sheet_entry(sheet_name, part, _EMPTY_WORKSHEET)
+
+
+class OoxmlApplication(_backends.Application):
+    """Opens workbooks as plain files; there is no process to manage.
+
+    Sheets copied from other workbooks (e.g. the student template) are parsed once and kept
+    for later copies, until the source file changes.
+    """
+
+    thread_safe = True
+
+    def __init__(self) -> None:
+        """Start with an empty sheet cache."""
+        self._sheet_images: typing.Dict[typing.Tuple, _SheetImage] = {}
+
+    def _sheet_image(self, path: pathlib.Path, sheet_index: int) -> _SheetImage:
+        path = path.resolve()
+        stat = path.stat()
+        key = (path, sheet_index, stat.st_size, stat.st_mtime_ns)
+        if key not in self._sheet_images:
+            self._sheet_images[key] = _load_sheet_image(path, sheet_index)
+        return self._sheet_images[key]
+
+    def open_workbook(self, path: pathlib.Path) -> OoxmlWorkbook:
+        """Open the workbook at path."""
+        return OoxmlWorkbook(path, load_sheet_image=self._sheet_image)
+
+    def quit(self) -> None:
+        """Drop the sheet cache."""
+        self._sheet_images.clear()
+
+
+def create_application(new_instance: bool = False) -> OoxmlApplication:
+    """Entry point used by the backend lookup; every application is independent anyway."""
+    return OoxmlApplication()
@@ -1,4 +1,5 @@
 import pathlib
+import sys
 import typing
 
 from decouple import config
@@ -27,3 +28,17 @@ CONFIG_SHEET_NAME: typing.Optional[str] = config(
 ROSTER_SHEET_NAME: typing.Optional[str] = config(
     "STUDENT_TEACHER_GRADEBOOK__ROSTER_SHEET_NAME", default="Roster"
 )
+
+
+BACKEND: str = config(
+    "STUDENT_TEACHER_GRADEBOOK__BACKEND",
+    default="excel" if sys.platform == "win32" else "ooxml",
+)
+
+EXCEL_VISIBLE: bool = config("STUDENT_TEACHER_GRADEBOOK__EXCEL_VISIBLE", default=False, cast=bool)
+
+HARDLINK_NEW_STUDENT_FILES: bool = config(
+    "STUDENT_TEACHER_GRADEBOOK__HARDLINK_NEW_STUDENT_FILES", default=False, cast=bool
+)
+
+PARSE_CACHE: bool = config("STUDENT_TEACHER_GRADEBOOK__PARSE_CACHE", default=True, cast=bool)
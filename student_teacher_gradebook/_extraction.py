@@ -0,0 +1,104 @@
+"""Pull each student's rows out of the grade sheets of the teacher workbook."""
+import typing
+
+from student_teacher_gradebook import _projection, _roster, _rowstore
+
+if typing.TYPE_CHECKING:
+    import student_teacher_gradebook
+
+_NAME_COLUMN = "A"
+_FIRST_VALUE_COLUMN = "B"
+
+
+class ExtractionEngine:
+    """Finds roster students' rows in grade sheets and reads only those rows.
+
+    For each sheet, column A is read first to find the rows naming a student on the roster.
+    Then only those rows' value columns are fetched, up to the sheet's last non-empty column
+    or, for a sheet the projection selects columns of, just the selected columns.
+    Each sheet's rows are packed into a :class:`_rowstore.SheetRows`, which goes through the
+    workbook's parse cache, so unchanged sheets are not read at all. :attr:`rows_read` and
+    :attr:`cells_read` count what was read from the workbook.
+    """
+
+    def __init__(
+        self,
+        workbook: "student_teacher_gradebook._BaseWorkBook",
+        roster: typing.Iterable["student_teacher_gradebook.StudentData"],
+        projection: typing.Optional[_projection.Projection] = None,
+    ) -> None:
+        """Index the roster by student name (a Roster's own index is used as is).
+
+        projection picks the columns read per sheet.
+        """
+        self._workbook = workbook
+        self._projection = projection or _projection.Projection()
+        if not isinstance(roster, _roster.Roster):
+            roster = _roster.Roster(roster)
+        self._students = roster.by_name
+        # Which rows match depends on the roster's names, so cached records do too.
+        self._roster_key = roster.names_digest
+        self.rows_read = 0
+        self.cells_read = 0
+
+    def _matching_rows(self, sheet_name: str) -> typing.Dict[int, str]:
+        matches = {}
+        for row_index, (name,) in self._workbook.iter_rows(
+            sheet_name, column_index=_NAME_COLUMN, end_column_index=_NAME_COLUMN
+        ):
+            self.rows_read += 1
+            self.cells_read += 1
+            if name in self._students:
+                matches[row_index] = self._students[name].name  # shared, not one per sheet
+        return matches
+
+    def iter_records(
+        self, sheet_names: typing.Iterable[str]
+    ) -> typing.Iterator[typing.Tuple[str, str, typing.List[typing.Any]]]:
+        """Yield (sheet name, student name, values) for each student row with any values.
+
+        Blank cells within a row are given as "".
+        """
+        for sheet_name in sheet_names:
+            sheet = self.sheet_rows(sheet_name)
+            for row, name in enumerate(sheet.students):
+                yield sheet_name, name, sheet.values(row)
+
+    def sheet_rows(self, sheet_name: str) -> _rowstore.SheetRows:
+        """The packed student rows of one sheet (from the parse cache if unchanged)."""
+        runs = self._projection.column_runs(sheet_name)
+        return self._workbook.cached(
+            "sheet_rows",
+            sheet_name,
+            lambda: self._read_sheet_rows(sheet_name, runs),
+            _rowstore.CACHE_CODEC,
+            extra=self._roster_key if runs is None else f"{self._roster_key}:{runs}",
+        )
+
+    def _read_sheet_rows(
+        self, sheet_name: str, runs: typing.Optional[_projection.ColumnRuns] = None
+    ) -> _rowstore.SheetRows:
+        sheet = _rowstore.SheetRows(sheet_name)
+        matches = self._matching_rows(sheet_name)
+        if not matches:
+            return sheet
+        if runs is None:
+            rows = self._workbook.get_rows(sheet_name, matches, column_index=_FIRST_VALUE_COLUMN)
+        else:
+            rows = _projection.read_runs(self._workbook, sheet_name, matches, runs)
+        for row_index, values in rows:
+            self.rows_read += 1
+            self.cells_read += len(values)
+            if any(value is not None for value in values):
+                sheet.append(matches[row_index], values)
+        return sheet
+
+    def extract(self, sheet_names: typing.Iterable[str]) -> _rowstore.StudentRows:
+        """Student name to their rows ([sheet name] + values), in a single pass over the sheets.
+
+        The rows are read-only views into the packed sheets; blank cells read as "".
+        """
+        student_rows = _rowstore.StudentRows()
+        for sheet_name in sheet_names:
+            student_rows.add_sheet(self.sheet_rows(sheet_name))
+        return student_rows
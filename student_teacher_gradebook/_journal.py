@@ -0,0 +1,112 @@
+"""Journal of the student workbooks saved by a run, so a run that stops part way can be resumed.
+
+The journal is a JSON-lines file next to the teacher book. Its first line holds a hash of the
+student template and of the Config values; every further line records one student whose
+workbook was saved: the target file, a hash of the rows written and a hash of the file
+afterwards. Each line is on disk before the next student is started, so the journal survives
+the run being killed. It is removed once a run finishes without failures.
+"""
+import json
+import logging
+import os
+import pathlib
+import typing
+
+from student_teacher_gradebook import _manifest, _publishing
+
+_MODULE_LOGGER = logging.getLogger(__name__)
+_MODULE_LOGGER.addHandler(logging.NullHandler())
+
+_VERSION = 1
+
+
+def journal_path(teacher_book: pathlib.Path) -> pathlib.Path:
+    """Where the run journal for teacher_book is kept."""
+    return teacher_book.with_name(teacher_book.name + ".journal.jsonl")
+
+
+def _output_digest(path: pathlib.Path) -> typing.Optional[str]:
+    try:
+        return _manifest.file_digest(path)
+    except FileNotFoundError:
+        return None
+
+
+class Journal:
+    """The run journal, for resuming an earlier run and recording this one."""
+
+    def __init__(self, path: pathlib.Path, template_digest: str, config_digest: str) -> None:
+        """Journal at path for a run under the given template and Config."""
+        self._path = path
+        self._header = {
+            "version": _VERSION,
+            "template": template_digest,
+            "config": config_digest,
+        }
+        self._file: typing.Optional[typing.TextIO] = None
+
+    def completed(self) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        """Student name to entry, for each student an earlier run journaled.
+
+        Empty if there is no journal or it was written under another template or Config. A
+        last line cut short by the run being killed is ignored.
+        """
+        entries: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        try:
+            lines = self._path.read_text(encoding="UTF-8").splitlines()
+        except FileNotFoundError:
+            return entries
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                _MODULE_LOGGER.warning("Ignoring damaged line in run journal %s", self._path)
+        if not records or records[0] != self._header:
+            return {}
+        for record in records[1:]:
+            entries[record["student"]] = record
+        return entries
+
+    def is_completed(
+        self,
+        job: "_publishing.PublishJob",
+        completed: typing.Mapping[str, typing.Mapping[str, typing.Any]],
+    ) -> bool:
+        """Whether completed shows job as done, and the student's file still is as it was left."""
+        entry = completed.get(job.student_name)
+        if (
+            entry is None
+            or entry["file"] != str(job.student_file)
+            or entry["rows"] != _manifest.rows_digest(job.rows)
+        ):
+            return False
+        return _output_digest(job.student_file) == entry["output"]
+
+    def start(self, carried_over: typing.Iterable[typing.Mapping[str, typing.Any]] = ()) -> None:
+        """Start a fresh journal for this run, holding the given entries of an earlier run."""
+        records = [self._header, *carried_over]
+        self._path.write_text(
+            "".join(json.dumps(record) + "\n" for record in records), encoding="UTF-8"
+        )
+        self._file = open(self._path, "a", encoding="UTF-8")
+
+    def commit(self, job: "_publishing.PublishJob") -> None:
+        """Record that job's workbook was saved, and make sure the record is on disk."""
+        record = {
+            "student": job.student_name,
+            "file": str(job.student_file),
+            "rows": _manifest.rows_digest(job.rows),
+            "output": _output_digest(job.student_file),
+        }
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self, finished: bool) -> None:
+        """Stop journaling; if finished (every student done), the journal is removed."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if finished:
+            self._path.unlink(missing_ok=True)
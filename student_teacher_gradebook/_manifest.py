@@ -0,0 +1,124 @@
+"""Record of what was last published to each student workbook, so unchanged ones can be skipped.
+
+The manifest is a JSON file next to the teacher book. It holds a hash of the student template
+and of the Config values (a change to either makes every student stale) and, per student, the
+target file, a hash of the rows written to it, how many columns they spanned, and the file's
+size/mtime after writing.
+"""
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import typing
+
+from student_teacher_gradebook import _publishing
+
+_MODULE_LOGGER = logging.getLogger(__name__)
+_MODULE_LOGGER.addHandler(logging.NullHandler())
+
+_VERSION = 2
+
+
+def manifest_path(teacher_book: pathlib.Path) -> pathlib.Path:
+    """Where the manifest for teacher_book is kept."""
+    return teacher_book.with_name(teacher_book.name + ".manifest.json")
+
+
+def _json_digest(value: typing.Any) -> str:
+    data = json.dumps(value, default=str, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("UTF-8")).hexdigest()
+
+
+def rows_digest(rows: typing.Iterable[typing.Iterable[typing.Any]]) -> str:
+    """Hash of a student's rows, as recorded when they are published."""
+    return _json_digest([list(row) for row in rows])
+
+
+def file_digest(path: pathlib.Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fin:
+        for chunk in iter(lambda: fin.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_digest(config: typing.NamedTuple) -> str:
+    """Hash of the Config values."""
+    return _json_digest(config._asdict())
+
+
+def _file_stamp(path: pathlib.Path) -> typing.Optional[typing.List[int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class Manifest:
+    """What was published to each student workbook under the current template and Config."""
+
+    def __init__(self, path: pathlib.Path, template_digest: str, config_digest: str) -> None:
+        """Load the manifest at path, dropping its entries if the template or Config changed."""
+        self._path = path
+        self._template_digest = template_digest
+        self._config_digest = config_digest
+        self._students: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        try:
+            saved = json.loads(path.read_text(encoding="UTF-8"))
+        except FileNotFoundError:
+            return
+        except ValueError:
+            _MODULE_LOGGER.warning("Ignoring unreadable manifest %s", path)
+            return
+        if (
+            saved.get("version") == _VERSION
+            and saved.get("template") == template_digest
+            and saved.get("config") == config_digest
+        ):
+            self._students = saved.get("students", {})
+
+    def has_published(self, job: "_publishing.PublishJob") -> bool:
+        """Whether the student's workbook was published under the current template and Config."""
+        entry = self._students.get(job.student_name)
+        return entry is not None and entry["file"] == str(job.student_file)
+
+    def published_width(self, job: "_publishing.PublishJob") -> int:
+        """How many columns were last published to the student's workbook (0 if unknown)."""
+        entry = self._students.get(job.student_name)
+        if entry is None or entry["file"] != str(job.student_file):
+            return 0
+        return entry["width"]
+
+    def is_current(self, job: "_publishing.PublishJob") -> bool:
+        """Whether the student's workbook still holds exactly job's rows."""
+        entry = self._students.get(job.student_name)
+        if entry is None or entry["file"] != str(job.student_file):
+            return False
+        stamp = _file_stamp(job.student_file)
+        return (
+            stamp is not None and stamp == entry["stamp"] and entry["rows"] == rows_digest(job.rows)
+        )
+
+    def record(self, job: "_publishing.PublishJob") -> None:
+        """Note that job was just published."""
+        self._students[job.student_name] = {
+            "file": str(job.student_file),
+            "rows": rows_digest(job.rows),
+            "width": max((len(row) for row in job.rows), default=0),
+            "stamp": _file_stamp(job.student_file),
+        }
+
+    def save(self) -> None:
+        """Write the manifest (atomically, so an interrupted run cannot corrupt it)."""
+        data = {
+            "version": _VERSION,
+            "template": self._template_digest,
+            "config": self._config_digest,
+            "students": self._students,
+        }
+        temp_path = self._path.with_name(self._path.name + ".tmp")
+        temp_path.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="UTF-8")
+        os.replace(temp_path, self._path)
@@ -0,0 +1,254 @@
+"""On-disk cache of what was parsed from the teacher workbook, kept sheet by sheet.
+
+Each entry (the Config, the roster, a grade sheet's student records) is stored with the key
+of the sheet it came from, so editing one grade sheet only re-parses that sheet. The key is
+the backend's fingerprint of the sheet where it has one
+(:meth:`_backends.Workbook.sheet_fingerprint`). Otherwise it is a hash of the sheet's values,
+which is only read again once the whole file has changed (checked by size and mtime, then by
+a hash of the file).
+
+A :class:`ParseCache` can be kept open across several openings of its workbook (see
+:meth:`ParseCache.attach`), as ``watch`` does through its session: values used from it stay
+in memory, so an unchanged sheet costs no decoding either.
+
+The cache is a JSON file beside the workbook. It holds data only, never code, since a teacher
+book often sits in a shared folder where anyone could replace it: each kind of value is
+stored through a :class:`Codec`. Anything unreadable is ignored and rebuilt.
+"""
+import datetime
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import sys
+import typing
+
+from student_teacher_gradebook import _backends, _profiling
+
+_MODULE_LOGGER = logging.getLogger(__name__)
+_MODULE_LOGGER.addHandler(logging.NullHandler())
+
+_VERSION = 4
+
+_EntryId = typing.Tuple[str, str, typing.Optional[str]]  # (kind, sheet name, extra key)
+
+# Cell values JSON has no type for, as {tag: ISO text}; checked in order (a datetime is a date).
+_TAGGED_TYPES = (
+    ("datetime", datetime.datetime),
+    ("date", datetime.date),
+    ("time", datetime.time),
+)
+
+
+class Codec(typing.NamedTuple):
+    """How one kind of cached value is stored: encode gives JSON data, decode takes it back.
+
+    Either may raise (TypeError, ValueError, ...): a value that cannot be encoded is not
+    cached, and data that cannot be decoded is a cache miss.
+    """
+
+    encode: typing.Callable[[typing.Any], typing.Any]
+    decode: typing.Callable[[typing.Any], typing.Any]
+
+
+def encode_value(value: typing.Any) -> typing.Any:
+    """A cell value as JSON data; raises TypeError for a value of another type."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    for tag, kind in _TAGGED_TYPES:
+        if isinstance(value, kind):
+            return {tag: value.isoformat()}
+    raise TypeError(f"Cannot cache a {type(value).__name__}")
+
+
+def decode_value(data: typing.Any) -> typing.Any:
+    """The cell value encoded as data by :func:`encode_value`."""
+    if isinstance(data, dict):
+        ((tag, text),) = data.items()
+        return dict(_TAGGED_TYPES)[tag].fromisoformat(text)
+    if data is None or isinstance(data, (bool, int, float, str)):
+        return data
+    raise TypeError(f"Not a cached cell value: {data!r}")
+
+
+def cache_path(workbook_path: pathlib.Path) -> pathlib.Path:
+    """Where the parse cache for workbook_path is kept."""
+    return workbook_path.with_name(workbook_path.name + ".cache.json")
+
+
+class ParseCache:
+    """Parsed values of one workbook, valid while the sheets they came from are unchanged."""
+
+    def __init__(self, workbook_path: pathlib.Path, workbook: _backends.Workbook) -> None:
+        """Load the cache kept for the workbook at workbook_path, opened as workbook."""
+        self._workbook_path = workbook_path
+        self._workbook = workbook
+        self._path = cache_path(workbook_path)
+        self._file_stamp: typing.Optional[typing.Tuple[int, int, str]] = None
+        # Entry to (sheet key, encoded value); values are decoded only when fetched.
+        self._entries: typing.Dict[_EntryId, typing.Tuple[typing.Any, typing.Any]] = {}
+        self._values: typing.Dict[_EntryId, typing.Any] = {}  # decoded or parsed already
+        self._live: typing.Set[_EntryId] = set()  # validated or computed this run
+        self._keys: typing.Dict[str, typing.Any] = {}
+        # Hashes of sheets' values, and the digest of the file they were taken from.
+        self._sheet_hashes: typing.Dict[str, str] = {}
+        self._hashed_file: typing.Optional[str] = None
+        try:
+            saved = json.loads(self._path.read_text(encoding="UTF-8"))
+            if saved["version"] != _VERSION or saved["byteorder"] != sys.byteorder:
+                return
+            entries = {
+                (entry["kind"], entry["sheet"], entry["extra"]): (
+                    tuple(entry["key"]),
+                    entry["value"],
+                )
+                for entry in saved["entries"]
+            }
+            file_stamp = None if saved["file"] is None else tuple(saved["file"])
+            sheet_hashes = {str(name): str(digest) for name, digest in saved["sheets"].items()}
+            hashed_file = saved["hashed_file"]
+        except FileNotFoundError:
+            return
+        except Exception as error:  # truncated, from another version of the code, ...
+            _MODULE_LOGGER.warning("Ignoring unreadable parse cache %s (%s)", self._path, error)
+            return
+        self._file_stamp = file_stamp
+        self._entries = entries
+        self._sheet_hashes = sheet_hashes
+        self._hashed_file = hashed_file
+
+    def attach(self, workbook: _backends.Workbook) -> None:
+        """Use the cache for the workbook opened again, as workbook (e.g. after it was saved)."""
+        self._workbook = workbook
+        self._keys.clear()
+        self._live.clear()
+
+    def _file_digest(self) -> typing.Optional[str]:
+        try:
+            stat = self._workbook_path.stat()
+        except FileNotFoundError:
+            return None
+        if self._file_stamp is None or self._file_stamp[:2] != (stat.st_size, stat.st_mtime_ns):
+            digest = hashlib.sha256()
+            with open(self._workbook_path, "rb") as fin:
+                for chunk in iter(lambda: fin.read(1 << 20), b""):
+                    digest.update(chunk)
+            self._file_stamp = (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+        return self._file_stamp[2]
+
+    def _sheet_hash(self, sheet_name: str) -> typing.Optional[str]:
+        """Hash of the sheet's values, read again only if the file has changed."""
+        digest = self._file_digest()
+        if digest is None:
+            return None
+        if digest != self._hashed_file:
+            self._sheet_hashes.clear()
+            self._hashed_file = digest
+        if sheet_name not in self._sheet_hashes:
+            with _profiling.phase("hash_sheet", sheet=sheet_name):
+                values = hashlib.sha256()
+                for row in self._workbook.iter_rows(sheet_name):
+                    values.update(json.dumps(row, default=str).encode("UTF-8"))
+            self._sheet_hashes[sheet_name] = values.hexdigest()
+        return self._sheet_hashes[sheet_name]
+
+    def _key(self, sheet_name: str) -> typing.Any:
+        if sheet_name not in self._keys:
+            fingerprint = self._workbook.sheet_fingerprint(sheet_name)
+            if fingerprint is not None:
+                self._keys[sheet_name] = ("sheet", fingerprint)
+            else:
+                sheet_hash = self._sheet_hash(sheet_name)
+                self._keys[sheet_name] = None if sheet_hash is None else ("values", sheet_hash)
+        return self._keys[sheet_name]
+
+    def fetch(
+        self,
+        kind: str,
+        sheet_name: str,
+        parse: typing.Callable[[], typing.Any],
+        codec: Codec,
+        extra: typing.Optional[str] = None,
+    ) -> typing.Any:
+        """The cached value of kind for sheet_name, or the result of parse (which is cached).
+
+        codec stores the value; extra is anything else the value depends on, as a string.
+        """
+        key = self._key(sheet_name)
+        if key is None:  # e.g. a workbook not on disk
+            return parse()
+        entry_id = (kind, sheet_name, extra)
+        entry = self._entries.get(entry_id)
+        if entry is not None and entry[0] == key:
+            try:
+                value = (
+                    self._values[entry_id] if entry_id in self._values else codec.decode(entry[1])
+                )
+            except Exception as error:  # altered, or from another version of the code
+                _MODULE_LOGGER.debug("Ignoring unreadable cache entry %s (%s)", entry_id, error)
+            else:
+                _profiling.count("parse_cache_hits")
+                self._values[entry_id] = value
+                self._live.add(entry_id)
+                return value
+        _profiling.count("parse_cache_misses")
+        value = parse()
+        try:
+            self._entries[entry_id] = (key, codec.encode(value))
+        except (TypeError, ValueError) as error:
+            _MODULE_LOGGER.debug("Not caching %s (%s)", entry_id, error)
+            self._entries.pop(entry_id, None)
+            self._values.pop(entry_id, None)
+        else:
+            self._values[entry_id] = value
+            self._live.add(entry_id)
+        return value
+
+    def save(self, changed_sheets: typing.Collection[str] = ()) -> None:
+        """Write the cache, once the workbook has been saved with changed_sheets edited.
+
+        Entries used this run from other sheets still hold, so they are re-keyed to the saved
+        file; entries from changed_sheets are dropped.
+        """
+        if not self._live:
+            return
+        self._keys.clear()
+        changed = {name.lower() for name in changed_sheets}
+        if self._hashed_file is not None:
+            # The saved file differs only in changed_sheets: the other sheets' hashes hold.
+            sheet_hashes = {
+                name: digest
+                for name, digest in self._sheet_hashes.items()
+                if name.lower() not in changed
+            }
+            self._hashed_file = self._file_digest()
+            self._sheet_hashes = sheet_hashes
+        for entry_id in list(self._entries):
+            if entry_id[1].lower() in changed:
+                del self._entries[entry_id]
+                self._values.pop(entry_id, None)
+            elif entry_id in self._live:
+                key = self._key(entry_id[1])
+                if key is None:
+                    del self._entries[entry_id]
+                    self._values.pop(entry_id, None)
+                else:
+                    self._entries[entry_id] = (key, self._entries[entry_id][1])
+        data = {
+            "version": _VERSION,
+            "byteorder": sys.byteorder,  # of the packed arrays some values hold
+            "file": self._file_stamp,
+            "hashed_file": self._hashed_file,
+            "sheets": self._sheet_hashes,
+            "entries": [
+                {"kind": kind, "sheet": sheet_name, "extra": extra, "key": key, "value": value}
+                for (kind, sheet_name, extra), (key, value) in self._entries.items()
+            ],
+        }
+        temp_path = self._path.with_name(self._path.name + ".tmp")
+        try:
+            temp_path.write_text(json.dumps(data, separators=(",", ":")), encoding="UTF-8")
+            os.replace(temp_path, self._path)
+        except OSError as error:  # a cache is never worth failing the run over
+            _MODULE_LOGGER.warning("Could not write parse cache %s (%s)", self._path, error)
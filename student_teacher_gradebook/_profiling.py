@@ -0,0 +1,216 @@
+"""Optional timing and I/O counting for a run (the --profile option of the commands).
+
+Code marks its phases with ``with _profiling.phase(name):`` and its I/O with
+``_profiling.count(name, n)``. Unless a :func:`profiling` block is active those are a
+shared no-op context and an early return, so the instrumentation can stay in place.
+"""
+import collections
+import contextlib
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+import typing
+
+_MODULE_LOGGER = logging.getLogger(__name__)
+_MODULE_LOGGER.addHandler(logging.NullHandler())
+
+_DISABLED = contextlib.nullcontext()
+_ACTIVE: typing.Optional["Profiler"] = None
+
+
+class Span(typing.NamedTuple):
+    """One timed phase; start is in seconds from the start of the run."""
+
+    name: str
+    start: float
+    seconds: float
+    thread: int
+    args: typing.Dict[str, typing.Any]
+
+
+class Profiler:
+    """Collects the phases and counters of one run."""
+
+    def __init__(self) -> None:
+        """Start the run's clock."""
+        self._origin = time.perf_counter()
+        self.spans: typing.List[Span] = []
+        self.counters: typing.Counter[str] = collections.Counter()
+        self._counters_lock = threading.Lock()  # phases may run on worker threads
+
+    @contextlib.contextmanager
+    def phase(self, name: str, **args: typing.Any) -> typing.Iterator[None]:
+        """Time the body as a phase called name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, **args)
+
+    def record(self, name: str, seconds: float, **args: typing.Any) -> None:
+        """Add a phase that took seconds and has just ended (e.g. one timed elsewhere)."""
+        end = time.perf_counter() - self._origin
+        self.spans.append(Span(name, end - seconds, seconds, threading.get_ident(), args))
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add n to the counter called name."""
+        with self._counters_lock:
+            self.counters[name] += n
+
+    def phase_seconds(self) -> typing.Dict[str, typing.List[float]]:
+        """The seconds each run of each phase took, by phase name."""
+        runs: typing.Dict[str, typing.List[float]] = collections.defaultdict(list)
+        for span in self.spans:
+            runs[span.name].append(span.seconds)
+        return dict(runs)
+
+    def summary(self) -> typing.List[typing.Tuple[str, int, float, float]]:
+        """(phase, count, total seconds, max seconds), slowest total first.
+
+        Phases nest (a workbook save inside a student's publish, say), so totals overlap.
+        """
+        rows = [
+            (name, len(times), sum(times), max(times))
+            for name, times in self.phase_seconds().items()
+        ]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def format_summary(self) -> str:
+        """The summary and counters as a text table."""
+        width = max(
+            [len(name) for name in self.counters] + [len(span.name) for span in self.spans] + [5]
+        )
+        lines = [f"{'phase':<{width}} {'count':>7} {'total s':>10} {'max s':>10}"]
+        for name, count, total, longest in self.summary():
+            lines.append(f"{name:<{width}} {count:>7} {total:>10.3f} {longest:>10.3f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<{width}} {value:>7}")
+        return "\n".join(lines)
+
+    def to_json(self) -> typing.Dict[str, typing.Any]:
+        """Everything recorded, as JSON-ready data."""
+        return {
+            "phases": [
+                {"name": name, "count": count, "seconds": total, "max_seconds": longest}
+                for name, count, total, longest in self.summary()
+            ],
+            "counters": dict(self.counters),
+            "spans": [span._asdict() for span in self.spans],
+        }
+
+    def to_chrome_trace(self) -> typing.Dict[str, typing.Any]:
+        """The phases in Chrome's trace event format (for chrome://tracing or Perfetto)."""
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": span.start * 1e6,
+                    "dur": span.seconds * 1e6,
+                    "pid": pid,
+                    "tid": span.thread,
+                    "args": span.args,
+                }
+                for span in self.spans
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+
+def is_enabled() -> bool:
+    """Whether a run is being profiled (for instrumentation that costs something to compute)."""
+    return _ACTIVE is not None
+
+
+def phase(name: str, **args: typing.Any) -> typing.ContextManager[None]:
+    """Time the body as a phase called name, if profiling."""
+    if _ACTIVE is None:
+        return _DISABLED
+    return _ACTIVE.phase(name, **args)
+
+
+def record(name: str, seconds: float, **args: typing.Any) -> None:
+    """Add a phase timed elsewhere (e.g. in a worker process), if profiling."""
+    if _ACTIVE is not None:
+        _ACTIVE.record(name, seconds, **args)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add n to the counter called name, if profiling."""
+    if _ACTIVE is not None:
+        _ACTIVE.count(name, n)
+
+
+def add_counts(counters: typing.Mapping[str, int]) -> None:
+    """Add counters collected elsewhere (e.g. by :func:`collecting` in a worker), if profiling."""
+    if _ACTIVE is not None:
+        for name, n in counters.items():
+            _ACTIVE.count(name, n)
+
+
+def add_phases(phases: typing.Mapping[str, typing.Sequence[float]]) -> None:
+    """Add phases timed elsewhere, as :meth:`Profiler.phase_seconds` gives them, if profiling."""
+    if _ACTIVE is not None:
+        for name, runs in phases.items():
+            for seconds in runs:
+                _ACTIVE.record(name, seconds)
+
+
+@contextlib.contextmanager
+def collecting() -> typing.Iterator[Profiler]:
+    """Profile the body on a profiler of its own and yield it, writing and printing nothing.
+
+    For callers that read the phases themselves, such as the benchmark suite, and for a worker
+    process, whose phases and counts would otherwise be lost (or, if it was forked, added to a
+    copy of the parent's profiler); the parent merges those with :func:`add_phases` and
+    :func:`add_counts`.
+    """
+    global _ACTIVE
+    previous = _ACTIVE
+    profiler = Profiler()
+    _ACTIVE = profiler
+    try:
+        yield profiler
+    finally:
+        _ACTIVE = previous
+
+
+def counting_rows(
+    rows: typing.Iterable[typing.Tuple[int, typing.List[typing.Any]]],
+) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+    """Pass (row index, values) pairs through, counting the cells read."""
+    for row in rows:
+        count("cells_read", len(row[1]))
+        yield row
+
+
+@contextlib.contextmanager
+def profiling(
+    path: typing.Optional[pathlib.Path], trace_path: typing.Optional[pathlib.Path] = None
+) -> typing.Iterator[typing.Optional[Profiler]]:
+    """Profile the body if path is given, then write the results there and print a summary.
+
+    With trace_path, the phases are also written there as a Chrome trace.
+    """
+    global _ACTIVE
+    if path is None:
+        yield None
+        return
+    profiler = Profiler()
+    _ACTIVE = profiler
+    try:
+        with profiler.phase("total"):
+            yield profiler
+    finally:
+        _ACTIVE = None
+        pathlib.Path(path).write_text(json.dumps(profiler.to_json(), indent=1), encoding="UTF-8")
+        if trace_path is not None:
+            pathlib.Path(trace_path).write_text(
+                json.dumps(profiler.to_chrome_trace()), encoding="UTF-8"
+            )
+        _MODULE_LOGGER.info("Wrote profile to %s", path)
+        print(profiler.format_summary())
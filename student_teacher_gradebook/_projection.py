@@ -0,0 +1,118 @@
+"""Which grade sheets, and which of their columns, are read from the teacher workbook.
+
+Set on the Config sheet:
+
+* ``Include Sheets``: comma-separated patterns (``*`` and ``?`` wildcards, any case); only
+  sheets matching one of them are published. Every sheet by default.
+* ``Exclude Sheets``: patterns of sheets never published, even if included.
+* ``Sheet Columns``: ``pattern: columns`` entries separated by ``;``, e.g.
+  ``Quiz*: B:D, F; Homework*: B``. A sheet matching an entry's pattern (the first, if several
+  do) has only those columns published; other sheets have every column, as before. Column A,
+  holding the student names, is always read to find the students' rows.
+"""
+import fnmatch
+import typing
+
+from student_teacher_gradebook import _backends
+
+if typing.TYPE_CHECKING:
+    import student_teacher_gradebook
+
+_NAME_COLUMN = 1
+
+ColumnRuns = typing.Tuple[typing.Tuple[int, int], ...]
+
+
+def _patterns(value: typing.Any) -> typing.Tuple[str, ...]:
+    if value is None:
+        return ()
+    return tuple(pattern.strip().lower() for pattern in str(value).split(",") if pattern.strip())
+
+
+def _matches(sheet_name: str, patterns: typing.Iterable[str]) -> bool:
+    return any(fnmatch.fnmatchcase(sheet_name.lower(), pattern) for pattern in patterns)
+
+
+def _column_runs(text: str) -> ColumnRuns:
+    """Sorted, merged (first, last) column runs of e.g. "B:D, F"."""
+    runs = []
+    for item in text.split(","):
+        first, _, last = item.strip().upper().partition(":")
+        last = last or first
+        if not (first.isalpha() and last.isalpha() and first.isascii() and last.isascii()):
+            raise ValueError(f"Invalid columns {item.strip()!r} in Sheet Columns")
+        first_number, last_number = sorted(_backends.column_number(name) for name in (first, last))
+        if first_number <= _NAME_COLUMN:
+            raise ValueError("Sheet Columns cannot select column A, which holds the names")
+        runs.append((first_number, last_number))
+    merged: typing.List[typing.Tuple[int, int]] = []
+    for first, last in sorted(runs):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(last, merged[-1][1]))
+        else:
+            merged.append((first, last))
+    return tuple(merged)
+
+
+class Projection(typing.NamedTuple):
+    """Sheet patterns to include and exclude, and the column runs to read per sheet pattern."""
+
+    include: typing.Tuple[str, ...] = ()
+    exclude: typing.Tuple[str, ...] = ()
+    columns: typing.Tuple[typing.Tuple[str, ColumnRuns], ...] = ()
+
+    def includes(self, sheet_name: str) -> bool:
+        """Whether sheet_name is published."""
+        if self.include and not _matches(sheet_name, self.include):
+            return False
+        return not _matches(sheet_name, self.exclude)
+
+    def column_runs(self, sheet_name: str) -> typing.Optional[ColumnRuns]:
+        """(first, last) of each run of the sheet's columns to read; None for every column."""
+        for pattern, runs in self.columns:
+            if _matches(sheet_name, [pattern]):
+                return runs
+        return None
+
+
+def from_config(config: typing.Optional["student_teacher_gradebook.Config"]) -> Projection:
+    """The projection set on the Config sheet; raises ValueError if Sheet Columns is malformed."""
+    if config is None:
+        return Projection()
+    columns = []
+    for entry in str(config.sheet_columns or "").split(";"):
+        if not entry.strip():
+            continue
+        pattern, separator, text = entry.partition(":")
+        if not separator or not pattern.strip():
+            raise ValueError(f"Invalid entry {entry.strip()!r} in Sheet Columns")
+        columns.append((pattern.strip().lower(), _column_runs(text)))
+    return Projection(
+        _patterns(config.include_sheets), _patterns(config.exclude_sheets), tuple(columns)
+    )
+
+
+def read_runs(
+    workbook: "student_teacher_gradebook._BaseWorkBook",
+    sheet_name: str,
+    row_indices: typing.Collection[int],
+    runs: ColumnRuns,
+) -> typing.Iterator[typing.Tuple[int, typing.List[typing.Any]]]:
+    """Yield (row index, values of the runs side by side) for the given rows holding a value.
+
+    Each run is read on its own, so the columns between runs are never fetched. Trailing blanks
+    are dropped, as for a row read without a last column.
+    """
+    rows: typing.Dict[int, typing.List[typing.Any]] = {}
+    for position, (first, last) in enumerate(runs):
+        offset = sum(run_last - run_first + 1 for run_first, run_last in runs[:position])
+        for row_index, values in workbook.get_rows(
+            sheet_name, row_indices, column_index=first, end_column_index=last
+        ):
+            row = rows.setdefault(row_index, [None] * offset)
+            row.extend([None] * (offset - len(row)))
+            row.extend(values)
+    for row_index in sorted(rows):
+        values = _backends.trim_trailing_blanks(rows[row_index])
+        if values:
+            yield row_index, values
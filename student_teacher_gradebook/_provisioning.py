@@ -0,0 +1,125 @@
+"""Create missing student workbooks from the template.
+
+Every file to create is planned first, then the copies run concurrently, and only then are the
+new paths recorded in the roster (in one batch, by the caller).
+"""
+import logging
+import os
+import pathlib
+import shutil
+import typing
+
+import student_teacher_gradebook
+from student_teacher_gradebook import _config
+
+_MODULE_LOGGER = logging.getLogger(__name__)
+_MODULE_LOGGER.addHandler(logging.NullHandler())
+
+
+class ProvisionStep(typing.NamedTuple):
+    """What to do for one roster entry."""
+
+    student_index: int
+    student: "student_teacher_gradebook.StudentData"
+    student_file: str  # as recorded in the roster
+    path: pathlib.Path  # the workbook itself: student_file, relative to the teacher book
+    needs_copy: bool
+    needs_roster_update: bool
+
+
+def plan(
+    roster: typing.Iterable["student_teacher_gradebook.StudentData"],
+    config: "student_teacher_gradebook.Config",
+    directory: pathlib.Path,
+) -> typing.List[ProvisionStep]:
+    """Work out each student's workbook and whether it must be created or recorded.
+
+    Student files are relative to directory, the teacher book's folder, unless absolute.
+    """
+    steps = []
+    planned_files: typing.Set[pathlib.Path] = set()
+    for i, student in enumerate(roster):
+        print("Evaluating:", student)
+        student_file = student.student_file
+        if student_file is None:
+            _MODULE_LOGGER.info("Student %s does not have a student sheet yet.", student.name)
+            try:
+                student_file = config.student_filename_format_string.format(**student._asdict())
+            except KeyError:
+                _MODULE_LOGGER.warning(
+                    "Error, invalid student template name in %s sheet. Valid place holder values are: %s",
+                    _config.CONFIG_SHEET_NAME,
+                    student._fields,
+                )
+                raise
+        path = (directory / student_file).resolve()
+        # Two entries resolving to the same file (e.g. a repeated name) only copy it once.
+        needs_copy = not path.is_file() and path not in planned_files
+        if needs_copy:
+            planned_files.add(path)
+            if student.student_file is not None:
+                _MODULE_LOGGER.warning("File for student %s is missing, recreating.", student.name)
+            _MODULE_LOGGER.info(
+                "Creating student sheet for %s from %s",
+                student.name,
+                config.student_template_filename,
+            )
+        steps.append(
+            ProvisionStep(i, student, student_file, path, needs_copy, student.student_file is None)
+        )
+    return steps
+
+
+def _copy_file(source: pathlib.Path, target: pathlib.Path) -> None:
+    """Copy source to target with the cheapest primitive available.
+
+    os.copy_file_range lets the kernel (or a network file server) copy or clone the data
+    without it passing through this process; shutil.copy2 is the fallback.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(source, "rb") as fin, open(target, "wb") as fout:
+                remaining = os.fstat(fin.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fin.fileno(), fout.fileno(), remaining)
+                    if not copied:
+                        break
+                    remaining -= copied
+            if remaining <= 0:
+                shutil.copystat(source, target)
+                return
+        except OSError:  # e.g. unsupported by this filesystem pair; use the portable path
+            pass
+    shutil.copy2(source, target)
+
+
+def _provision_file(source: pathlib.Path, target: pathlib.Path, hardlink: bool) -> None:
+    if hardlink:
+        try:
+            os.link(source, target)
+            return
+        except OSError as error:
+            _MODULE_LOGGER.info("Could not link %s (%s), copying instead.", target, error)
+    _copy_file(source, target)
+
+
+def copy_files(
+    source: pathlib.Path,
+    targets: typing.Iterable[pathlib.Path],
+    workers: int,
+    hardlink: bool = False,
+) -> None:
+    """Create every target from source, at most workers at a time.
+
+    With hardlink, targets are hard links to source where the filesystem allows. That only
+    suits backends that replace files on save (rather than writing them in place).
+    """
+    import concurrent.futures  # imported here to keep CLI startup fast
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_provision_file, source, target, hardlink): target for target in targets
+        }
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+            _MODULE_LOGGER.info("Created %s", futures[future])
@@ -0,0 +1,327 @@
+"""Write students' extracted rows into their workbooks, in this process or a pool of workers."""
+import logging
+import pathlib
+import queue
+import time
+import traceback
+import typing
+
+import student_teacher_gradebook
+from student_teacher_gradebook import _profiling
+
+if typing.TYPE_CHECKING:
+    import asyncio
+    import concurrent.futures
+    import multiprocessing
+
+_MODULE_LOGGER = logging.getLogger(__name__)
+_MODULE_LOGGER.addHandler(logging.NullHandler())
+
+PROGRESS_SHEET_NAME = "Progress"
+_TEMP_SHEET_NAME = "Progress_new"
+_POLL_SECONDS = 0.5
+_PIPELINE_WRITERS = 4
+_PIPELINE_QUEUE_SIZE = 8
+
+
+class PublishJob(typing.NamedTuple):
+    """Everything needed to rewrite one student's workbook."""
+
+    student_name: str
+    student_file: pathlib.Path
+    template: pathlib.Path
+    start_row: int
+    rows: typing.List[typing.List[typing.Any]]
+    diff: bool = False  # update the existing Progress sheet in place, if there is one
+    published_width: int = 0  # columns written last time, compared and cleared with diff
+
+
+class PublishResult(typing.NamedTuple):
+    """Outcome of a :class:`PublishJob`; error holds the traceback text on failure."""
+
+    student_name: str
+    rows_written: int
+    error: typing.Optional[str] = None
+    seconds: float = 0.0  # spent publishing, in the worker
+    student_file: typing.Optional[pathlib.Path] = None  # of the job
+    counters: typing.Optional[typing.Dict[str, int]] = None  # I/O counted in a worker process
+    phases: typing.Optional[typing.Dict[str, typing.List[float]]] = None  # timed in a worker
+
+
+def publish_student(session: "student_teacher_gradebook.Session", job: PublishJob) -> None:
+    """Write job.rows to the student's workbook.
+
+    The student's sheets are replaced with a fresh copy of the template holding job.rows,
+    unless job.diff is set and the workbook already has a Progress sheet: then only the cells
+    that differ from job.rows are written (see :func:`_write_changed_cells`).
+    """
+    student_book = student_teacher_gradebook.StudentWorkbook(job.student_file, session=session)
+    student_book.open()
+    try:
+        if job.diff and PROGRESS_SHEET_NAME in student_book.worksheet_names():
+            if not _write_changed_cells(student_book, job):
+                return  # already up to date; leave the file untouched
+        else:
+            _rebuild_progress_sheet(student_book, job)
+        student_book.save()
+    finally:
+        student_book.close()
+
+
+def _rebuild_progress_sheet(
+    student_book: "student_teacher_gradebook.StudentWorkbook", job: PublishJob
+) -> None:
+    student_book.copy_sheet_from(job.template, new_name=_TEMP_SHEET_NAME)
+    for sheet in student_book.worksheet_names():
+        if sheet == _TEMP_SHEET_NAME:
+            continue
+        student_book.remove_sheet(sheet)
+    student_book.rename_sheet(_TEMP_SHEET_NAME, PROGRESS_SHEET_NAME)
+    student_book.set_typed_block_range(
+        sheet_name=PROGRESS_SHEET_NAME,
+        start_column_index="A",
+        start_row_index=job.start_row,
+        rows=job.rows,
+    )
+
+
+def _same_cell(old: typing.Any, new: typing.Any) -> bool:
+    """Whether old (as read back) already holds new (as it would be written).
+
+    Text that reads as a number may have been stored as a number, so "7" and 7.0 match.
+    """
+    old = "" if old is None else old
+    new = "" if new is None else new
+    if str(old) == str(new):
+        return True
+    try:
+        return float(old) == float(new)
+    except (TypeError, ValueError):
+        return False
+
+
+def _write_changed_cells(
+    student_book: "student_teacher_gradebook.StudentWorkbook", job: PublishJob
+) -> int:
+    """Make the Progress sheet hold job.rows by writing only the cells that differ.
+
+    Only the columns job.rows spans, or the wider job.published_width, are compared, so a
+    column that has gone from every row is cleared, while formatting and anything a student
+    added to the right of their data is kept. Rows past the end of job.rows are cleared
+    within those columns. Each changed row is written in one call, from its first to its last
+    changed cell. Returns the number of cells written.
+    """
+    width = max([len(row) for row in job.rows] + [job.published_width])
+    if not width:
+        return 0
+    old_rows = student_book.get_block_range(
+        PROGRESS_SHEET_NAME, job.start_row, "A", end_column_index=width
+    )
+    cells_written = 0
+    for offset in range(max(len(old_rows), len(job.rows))):
+        new_row = list(job.rows[offset]) if offset < len(job.rows) else []
+        new_row += [""] * (width - len(new_row))
+        old_row = list(old_rows[offset]) if offset < len(old_rows) else []
+        old_row += [None] * (width - len(old_row))
+        changed = [
+            column for column in range(width) if not _same_cell(old_row[column], new_row[column])
+        ]
+        if not changed:
+            continue
+        first, last = changed[0], changed[-1]
+        student_book.set_typed_block_range(
+            PROGRESS_SHEET_NAME, first + 1, job.start_row + offset, [new_row[first : last + 1]]
+        )
+        cells_written += last - first + 1
+    return cells_written
+
+
+def try_publish(session: "student_teacher_gradebook.Session", job: PublishJob) -> PublishResult:
+    """Publish job, reporting a failure in the result instead of raising it."""
+    start = time.perf_counter()
+    try:
+        publish_student(session, job)
+    except Exception:
+        return PublishResult(
+            job.student_name,
+            0,
+            traceback.format_exc(),
+            time.perf_counter() - start,
+            job.student_file,
+        )
+    return PublishResult(
+        job.student_name,
+        len(job.rows),
+        seconds=time.perf_counter() - start,
+        student_file=job.student_file,
+    )
+
+
+def _worker(
+    backend: str, jobs: "multiprocessing.Queue", results: "multiprocessing.Queue", profile: bool
+):
+    with student_teacher_gradebook.Session(backend, new_instance=True) as session:
+        with session.bulk_edit():
+            for job in iter(jobs.get, None):
+                if not profile:
+                    results.put(try_publish(session, job))
+                    continue
+                with _profiling.collecting() as profiler:
+                    result = try_publish(session, job)
+                results.put(
+                    result._replace(
+                        counters=dict(profiler.counters) or None,
+                        phases=profiler.phase_seconds() or None,
+                    )
+                )
+
+
+def publish_in_parallel(
+    jobs: typing.Iterable[PublishJob], workers: int, backend: str
+) -> typing.Iterator[PublishResult]:
+    """Publish jobs from worker processes, yielding each result as it arrives.
+
+    Every worker runs its own backend session. The biggest jobs are handed out first so a
+    large student started last does not leave the other workers idle at the end. When the run
+    is being profiled, each result carries the phases its worker timed and the I/O it counted
+    for the job.
+    """
+    import multiprocessing  # imported here to keep CLI startup fast
+
+    pending = sorted(jobs, key=lambda job: len(job.rows), reverse=True)
+    job_queue: "multiprocessing.Queue" = multiprocessing.Queue()
+    result_queue: "multiprocessing.Queue" = multiprocessing.Queue()
+    for job in pending:
+        job_queue.put(job)
+    processes = [
+        multiprocessing.Process(
+            target=_worker,
+            args=(backend, job_queue, result_queue, _profiling.is_enabled()),
+        )
+        for _ in range(min(workers, len(pending)))
+    ]
+    for process in processes:
+        job_queue.put(None)
+        process.start()
+
+    outstanding = {job.student_file: job for job in pending}
+    try:
+        while outstanding:
+            # Checked before waiting: a worker flushes its results before it exits.
+            workers_alive = any(process.is_alive() for process in processes)
+            try:
+                result = result_queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if workers_alive:
+                    continue
+                # Workers died without reporting.
+                for job in sorted(outstanding.values(), key=lambda job: job.student_name):
+                    yield PublishResult(
+                        job.student_name,
+                        0,
+                        "worker process exited unexpectedly",
+                        student_file=job.student_file,
+                    )
+                return
+            outstanding.pop(result.student_file, None)
+            yield result
+    finally:
+        for process in processes:
+            process.join()
+
+
+def publish_pipelined(
+    session: "student_teacher_gradebook.Session",
+    jobs: typing.Iterable[PublishJob],
+    writers: int = _PIPELINE_WRITERS,
+    queue_size: int = _PIPELINE_QUEUE_SIZE,
+) -> typing.Iterator[PublishResult]:
+    """Publish jobs in this process through an asyncio pipeline, yielding each result.
+
+    A producer feeds the jobs through a bounded queue to writers tasks, which hand each publish
+    (with its blocking open and save) to a pool of as many threads; results come back through
+    a second bounded queue. The writers carry on while the caller handles a result, so disk
+    and network-share waits overlap with that work, and they stop taking jobs once the caller
+    falls queue_size results behind. If the backend is not thread-safe there is one writer,
+    publishing on this thread. Leaving early (e.g. on Ctrl+C) cancels the pipeline once the
+    publishes under way have finished, so no workbook is left half written.
+    """
+    import asyncio  # imported here to keep CLI startup fast
+    import concurrent.futures
+
+    executor = None
+    if session.app.thread_safe:
+        executor = concurrent.futures.ThreadPoolExecutor(writers)
+    else:
+        writers = 1
+    loop = asyncio.new_event_loop()
+    tasks: typing.List["asyncio.Future"] = []
+    try:
+        results = loop.run_until_complete(
+            _start_pipeline(session, jobs, writers, queue_size, executor, tasks)
+        )
+        running = writers
+        while running:
+            # A task of its own, so that it is cancelled with the rest if this is interrupted.
+            get = loop.create_task(results.get())
+            tasks.append(get)
+            result = loop.run_until_complete(get)
+            tasks.remove(get)
+            results.task_done()
+            if result is None:  # a writer ran out of jobs
+                running -= 1
+            else:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        if executor is not None:
+            executor.shutdown(wait=True)
+        loop.close()
+
+
+async def _start_pipeline(
+    session: "student_teacher_gradebook.Session",
+    jobs: typing.Iterable[PublishJob],
+    writers: int,
+    queue_size: int,
+    executor: typing.Optional["concurrent.futures.Executor"],
+    tasks: typing.List["asyncio.Future"],
+) -> "asyncio.Queue":
+    """Start the producer and writer tasks, adding them to tasks; returns the results queue.
+
+    Each writer puts None on the results queue when there are no jobs left.
+    """
+    import asyncio
+
+    # Made here so that they belong to the pipeline's event loop (before Python 3.10).
+    job_queue: "asyncio.Queue[typing.Optional[PublishJob]]" = asyncio.Queue(queue_size)
+    results: "asyncio.Queue[typing.Optional[PublishResult]]" = asyncio.Queue(queue_size)
+
+    async def produce() -> None:
+        for job in jobs:
+            await job_queue.put(job)
+        for _ in range(writers):
+            await job_queue.put(None)
+
+    async def write() -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await job_queue.get()
+            if job is None:
+                await results.put(None)
+                return
+            if executor is None:
+                result = try_publish(session, job)
+            else:
+                result = await loop.run_in_executor(executor, try_publish, session, job)
+            await results.put(result)
+            if executor is None:
+                # Publishing here blocks the loop, so running ahead of the caller gains
+                # nothing and only delays its journaling: wait for it to take the result.
+                await results.join()
+
+    tasks.append(asyncio.ensure_future(produce()))
+    tasks.extend(asyncio.ensure_future(write()) for _ in range(writers))
+    return results
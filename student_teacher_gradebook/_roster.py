@@ -0,0 +1,136 @@
+"""The students listed on the Roster sheet, indexed for lookups by name, ID and workbook."""
+import bisect
+import hashlib
+import pathlib
+import types
+import typing
+
+if typing.TYPE_CHECKING:
+    import student_teacher_gradebook
+
+
+def _keys(
+    student: "student_teacher_gradebook.StudentData",
+) -> typing.Tuple[typing.Hashable, typing.Hashable, typing.Hashable]:
+    """The student's (name, ID, workbook) keys; a student with no workbook has None."""
+    student_file = student.student_file
+    return (
+        student.name,
+        student.id_,
+        None if student_file is None else pathlib.PurePath(student_file),
+    )
+
+
+class Roster(typing.Sequence["student_teacher_gradebook.StudentData"]):
+    """The roster's students in sheet order, with the sheet row each came from.
+
+    Indexes by name, ID and workbook are built when the roster is loaded and kept up to date
+    by :meth:`replace`, so a lookup allocates nothing. Where several students share a key,
+    the index gives the last of them.
+    """
+
+    __slots__ = ("_students", "_rows", "_positions", "_lookups", "_by_name", "_names_digest")
+
+    def __init__(
+        self,
+        students: typing.Iterable["student_teacher_gradebook.StudentData"] = (),
+        rows: typing.Iterable[int] = (),
+    ) -> None:
+        """Index students; rows holds the sheet row of each."""
+        self._students = list(students)
+        self._rows = tuple(rows)
+        # Per key kind (name, ID, workbook): key to the sorted positions of the students with
+        # it, and key to the last of those students.
+        self._positions: typing.Tuple[typing.Dict[typing.Any, typing.List[int]], ...] = (
+            {},
+            {},
+            {},
+        )
+        self._lookups: typing.Tuple[
+            typing.Dict[typing.Any, "student_teacher_gradebook.StudentData"], ...
+        ] = ({}, {}, {})
+        self._by_name = types.MappingProxyType(self._lookups[0])
+        self._names_digest: typing.Optional[str] = None
+        for position, student in enumerate(self._students):
+            self._add(position, student)
+
+    def _add(self, position: int, student: "student_teacher_gradebook.StudentData") -> None:
+        for positions, lookup, key in zip(self._positions, self._lookups, _keys(student)):
+            if key is None:
+                continue
+            key_positions = positions.setdefault(key, [])
+            bisect.insort(key_positions, position)
+            lookup[key] = self._students[key_positions[-1]]
+
+    def _remove(self, position: int, student: "student_teacher_gradebook.StudentData") -> None:
+        for positions, lookup, key in zip(self._positions, self._lookups, _keys(student)):
+            if key is None:
+                continue
+            key_positions = positions[key]
+            del key_positions[bisect.bisect_left(key_positions, position)]
+            if key_positions:
+                lookup[key] = self._students[key_positions[-1]]
+            else:
+                del positions[key], lookup[key]
+
+    def __getitem__(self, index):
+        """The student (or tuple of students, for a slice) at index."""
+        if isinstance(index, slice):
+            return tuple(self._students[index])
+        return self._students[index]
+
+    def __len__(self) -> int:
+        """Number of students."""
+        return len(self._students)
+
+    def __iter__(self) -> typing.Iterator["student_teacher_gradebook.StudentData"]:
+        """The students in sheet order."""
+        return iter(self._students)
+
+    def __eq__(self, other: object) -> bool:
+        """Equal to any sequence (a tuple, say) of the same students in the same order."""
+        if not isinstance(other, typing.Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        """The students, as a tuple would show them."""
+        return f"Roster({tuple(self._students)!r})"
+
+    @property
+    def by_name(self) -> typing.Mapping[str, "student_teacher_gradebook.StudentData"]:
+        """Student name to student, as a read-only view that stays up to date."""
+        return self._by_name
+
+    @property
+    def names_digest(self) -> str:
+        """Hash of the students' names, for keying what depends on who is on the roster."""
+        if self._names_digest is None:
+            self._names_digest = hashlib.sha256(
+                "\0".join(sorted(self._lookups[0])).encode("UTF-8")
+            ).hexdigest()
+        return self._names_digest
+
+    def by_id(self, id_: str) -> typing.Optional["student_teacher_gradebook.StudentData"]:
+        """The student with the ID, if any."""
+        return self._lookups[1].get(id_)
+
+    def by_file(
+        self, student_file: typing.Union[str, pathlib.PurePath]
+    ) -> typing.Optional["student_teacher_gradebook.StudentData"]:
+        """The student whose workbook is student_file (as written in the roster), if any."""
+        return self._lookups[2].get(pathlib.PurePath(student_file))
+
+    def row(self, index: int) -> int:
+        """Sheet row of the student at index."""
+        return self._rows[index]
+
+    def replace(self, index: int, student: "student_teacher_gradebook.StudentData") -> None:
+        """Put student in place of the one at index, updating the indexes to match."""
+        index = range(len(self._students))[index]  # as a position, even if negative
+        old = self._students[index]
+        self._remove(index, old)
+        self._students[index] = student
+        self._add(index, student)
+        if old.name != student.name:
+            self._names_digest = None
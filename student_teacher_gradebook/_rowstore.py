@@ -0,0 +1,264 @@
+"""Compact, column-oriented storage for the student rows extracted from the grade sheets.
+
+A list per row of Python objects costs dozens of bytes per cell. Here each grade sheet's rows
+are kept in a :class:`SheetRows`: one type byte and one 8-byte slot per cell in flat arrays,
+with text stored once per sheet in a table, and the sheet name stored once rather than in
+every row. :class:`StudentRows` indexes those sheets by student, and hands out read-only
+views that decode cells only as they are read.
+"""
+import array
+import base64
+import collections.abc
+import typing
+
+from student_teacher_gradebook import _parse_cache
+
+# What a cell's 8-byte slot holds, by its type byte.
+_BLANK = 0  # nothing; read as ""
+_FLOAT = 1  # the value
+_INT = 2  # the value (exact, within _MAX_EXACT_INT)
+_TEXT = 3  # index into the sheet's text table
+_OBJECT = 4  # index into the sheet's list of other values (dates, booleans, ...)
+
+_MAX_EXACT_INT = 1 << 53
+
+
+class SheetRows:
+    """The student rows of one sheet, packed.
+
+    :meth:`to_data` and :meth:`from_data` store it in the parse cache, arrays as raw bytes.
+    """
+
+    def __init__(self, sheet_name: str) -> None:
+        """Start an empty set of rows for sheet_name."""
+        self.sheet_name = sheet_name
+        self.students: typing.List[str] = []  # of each row
+        self._offsets = array.array("L", [0])  # row i's cells are [offsets[i], offsets[i + 1])
+        self._types = bytearray()
+        self._slots = array.array("d")
+        self._texts: typing.List[str] = []
+        self._text_indices: typing.Optional[typing.Dict[str, int]] = {}
+        self._objects: typing.List[typing.Any] = []
+
+    def append(self, student: str, values: typing.Iterable[typing.Any]) -> None:
+        """Add a row of values (None and "" are both kept as blank)."""
+        for value in values:
+            kind = type(value)
+            if value is None or value == "":
+                self._types.append(_BLANK)
+                self._slots.append(0.0)
+            elif kind is float:
+                self._types.append(_FLOAT)
+                self._slots.append(value)
+            elif kind is int and -_MAX_EXACT_INT < value < _MAX_EXACT_INT:
+                self._types.append(_INT)
+                self._slots.append(value)
+            elif kind is str:
+                if self._text_indices is None:  # loaded from the parse cache
+                    self._text_indices = {text: i for i, text in enumerate(self._texts)}
+                index = self._text_indices.get(value)
+                if index is None:
+                    index = self._text_indices[value] = len(self._texts)
+                    self._texts.append(value)
+                self._types.append(_TEXT)
+                self._slots.append(index)
+            else:
+                self._types.append(_OBJECT)
+                self._slots.append(len(self._objects))
+                self._objects.append(value)
+        self.students.append(student)
+        self._offsets.append(len(self._types))
+
+    def __len__(self) -> int:
+        """Number of rows."""
+        return len(self.students)
+
+    def _value(self, cell: int) -> typing.Any:
+        kind = self._types[cell]
+        if kind == _BLANK:
+            return ""
+        slot = self._slots[cell]
+        if kind == _FLOAT:
+            return slot
+        if kind == _INT:
+            return int(slot)
+        if kind == _TEXT:
+            return self._texts[int(slot)]
+        return self._objects[int(slot)]
+
+    def values(self, row: int) -> typing.List[typing.Any]:
+        """The values of row (without the sheet name), blanks as ""."""
+        return [self._value(cell) for cell in range(self._offsets[row], self._offsets[row + 1])]
+
+    def to_data(self) -> typing.Dict[str, typing.Any]:
+        """The rows as JSON data, for the parse cache (in this machine's byte order)."""
+        return {
+            "sheet": self.sheet_name,
+            "students": self.students,
+            "offsets": _packed(array.array("q", self._offsets)),
+            "types": _packed(self._types),
+            "slots": _packed(self._slots),
+            "texts": self._texts,
+            "objects": [_parse_cache.encode_value(value) for value in self._objects],
+        }
+
+    @classmethod
+    def from_data(cls, data: typing.Dict[str, typing.Any]) -> "SheetRows":
+        """Rows stored by :meth:`to_data`; raises ValueError if they do not fit together.
+
+        The text lookup is rebuilt only if more rows are appended.
+        """
+        sheet = cls(data["sheet"])
+        sheet.students = [str(student) for student in data["students"]]
+        sheet._offsets = array.array("L", _unpacked("q", data["offsets"]))
+        sheet._types = bytearray(_unpacked("B", data["types"]))
+        sheet._slots = _unpacked("d", data["slots"])
+        sheet._texts = [str(text) for text in data["texts"]]
+        sheet._text_indices = None
+        sheet._objects = [_parse_cache.decode_value(value) for value in data["objects"]]
+        offsets, types, slots = sheet._offsets, sheet._types, sheet._slots
+        if (
+            len(offsets) != len(sheet.students) + 1
+            or offsets[0] != 0
+            or any(offsets[i] > offsets[i + 1] for i in range(len(sheet.students)))
+            or offsets[-1] != len(types)
+            or len(slots) != len(types)
+        ):
+            raise ValueError("Mismatched row offsets and cells")
+        counts = {_TEXT: len(sheet._texts), _OBJECT: len(sheet._objects)}
+        for kind, slot in zip(types, slots):
+            if kind > _OBJECT or (kind in counts and not 0 <= slot < counts[kind]):
+                raise ValueError(f"Invalid cell of type {kind} in slot {slot}")
+        return sheet
+
+
+def _packed(values: typing.Union["array.array[typing.Any]", bytearray]) -> str:
+    return base64.b64encode(values if isinstance(values, bytearray) else values.tobytes()).decode()
+
+
+def _unpacked(typecode: str, text: str) -> "array.array[typing.Any]":
+    values = array.array(typecode)
+    values.frombytes(base64.b64decode(text, validate=True))
+    return values
+
+
+CACHE_CODEC = _parse_cache.Codec(SheetRows.to_data, SheetRows.from_data)
+
+
+class RowView(collections.abc.Sequence):
+    """One extracted row, [sheet name] + values, decoded as it is read."""
+
+    __slots__ = ("_sheet", "_row", "_start", "_length")
+
+    def __init__(self, sheet: SheetRows, row: int) -> None:
+        """View row of sheet."""
+        self._sheet = sheet
+        self._row = row
+        self._start = sheet._offsets[row]
+        self._length = sheet._offsets[row + 1] - self._start + 1
+
+    def __len__(self) -> int:
+        """Number of cells, counting the sheet name."""
+        return self._length
+
+    def __getitem__(self, index):
+        """Cell at index (0 is the sheet name), or a list for a slice."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        if index == 0:
+            return self._sheet.sheet_name
+        return self._sheet._value(self._start + index - 1)
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        """The sheet name, then each value."""
+        yield self._sheet.sheet_name
+        yield from self._sheet.values(self._row)
+
+    def __eq__(self, other: object) -> bool:
+        """Equal to any sequence of the same cells (e.g. the equivalent list)."""
+        if not isinstance(other, collections.abc.Sequence) or isinstance(other, str):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        """Shown as the equivalent list."""
+        return repr(list(self))
+
+
+class StudentView(collections.abc.Sequence):
+    """A student's extracted rows, in sheet order, as :class:`RowView`s.
+
+    Pickled as a plain list of lists, so a job sent to a worker process carries only its own
+    student's rows.
+    """
+
+    __slots__ = ("_sheets", "_refs")
+
+    def __init__(self, sheets: typing.Sequence[SheetRows], refs: "array.array[int]") -> None:
+        """View the rows refs points at: pairs of (sheet index, row index), flattened."""
+        self._sheets = sheets
+        self._refs = refs
+
+    def __len__(self) -> int:
+        """Number of rows."""
+        return len(self._refs) // 2
+
+    def __getitem__(self, index):
+        """Row at index, or a list of rows for a slice."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return RowView(self._sheets[self._refs[2 * index]], self._refs[2 * index + 1])
+
+    def __eq__(self, other: object) -> bool:
+        """Equal to any sequence of the same rows (e.g. the equivalent list of lists)."""
+        if not isinstance(other, collections.abc.Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(row == theirs for row, theirs in zip(self, other))
+
+    def __repr__(self) -> str:
+        """Shown as the equivalent list of lists."""
+        return repr([list(row) for row in self])
+
+    def __reduce__(self):
+        """Pickle as a list of lists."""
+        return list, ([list(row) for row in self],)
+
+
+class StudentRows(collections.abc.Mapping):
+    """Student name to a :class:`StudentView` of their rows, over a list of :class:`SheetRows`."""
+
+    def __init__(self) -> None:
+        """Start with no sheets."""
+        self._sheets: typing.List[SheetRows] = []
+        self._refs: typing.Dict[str, "array.array[int]"] = {}
+
+    def add_sheet(self, sheet: SheetRows) -> None:
+        """Add every row of sheet (shared, not copied) after those already added."""
+        sheet_index = len(self._sheets)
+        self._sheets.append(sheet)
+        for row, student in enumerate(sheet.students):
+            refs = self._refs.get(student)
+            if refs is None:
+                refs = self._refs[student] = array.array("L")
+            refs.append(sheet_index)
+            refs.append(row)
+
+    def __getitem__(self, student: str) -> StudentView:
+        """The rows of student."""
+        return StudentView(self._sheets, self._refs[student])
+
+    def __iter__(self) -> typing.Iterator[str]:
+        """Students, in the order their first row was added."""
+        return iter(self._refs)
+
+    def __len__(self) -> int:
+        """Number of students with any rows."""
+        return len(self._refs)
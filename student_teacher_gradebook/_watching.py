@@ -0,0 +1,45 @@
+"""Notice when a file has been saved, by polling its size and modification time."""
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    import pathlib
+
+Stamp = typing.Optional[typing.Tuple[int, int]]
+
+
+def file_stamp(path: "pathlib.Path") -> Stamp:
+    """(size, mtime) of path, or None if it does not exist (e.g. mid-save)."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def saves(
+    path: "pathlib.Path",
+    last_stamp: Stamp,
+    poll_seconds: float,
+    debounce_seconds: float,
+    sleep: typing.Callable[[float], None] = time.sleep,
+) -> typing.Iterator[Stamp]:
+    """Yield the stamp of path each time it has been saved, forever.
+
+    A save counts once the file has existed and stayed unchanged for debounce_seconds, so a
+    burst of saves (or a save written in several steps) is reported once, after the last.
+    Saves made while the caller is handling one are reported when it asks for the next.
+    """
+    while True:
+        sleep(poll_seconds)
+        stamp = file_stamp(path)
+        if stamp is None or stamp == last_stamp:
+            continue
+        quiet = 0.0
+        while quiet < debounce_seconds:
+            sleep(poll_seconds)
+            latest = file_stamp(path)
+            quiet = quiet + poll_seconds if latest == stamp and latest is not None else 0.0
+            stamp = latest
+        yield stamp
+        last_stamp = stamp
@@ -75,15 +75,22 @@ def assert_excel_data_in_dir(dir: pathlib.Path, snapshot: pytest_snapshot.plugin
             if value is None:
                 continue
             data[data_file.relative_to(unzipped_dir.parent).as_posix().replace("/", "___")] = value
-        wb = student_teacher_gradebook._BaseWorkBook(file)
-        try:
-            wb.open()
-            for sheet in wb.worksheet_names():
-                stream = io.StringIO()
-                writer = csv.writer(stream)
-                for row in wb.get_cells_value_range(sheet, 1, "A"):
-                    writer.writerow(row)
-                data[file.stem + f"_as_csv__{sheet}.csv"] = stream.getvalue().encode("UTF-8")
-        finally:
-            wb.close()
+        data.update(workbook_as_csv(file))
     snapshot.assert_match_dir(data, "expected_files")
+
+
+def workbook_as_csv(file: pathlib.Path) -> typing.Dict[str, bytes]:
+    """Render each sheet of the workbook as CSV, keyed like the snapshot files."""
+    data = {}
+    wb = student_teacher_gradebook._BaseWorkBook(file)
+    try:
+        wb.open()
+        for sheet in wb.worksheet_names():
+            stream = io.StringIO()
+            writer = csv.writer(stream)
+            for row in wb.get_cells_value_range(sheet, 1, "A"):
+                writer.writerow(row)
+            data[file.stem + f"_as_csv__{sheet}.csv"] = stream.getvalue().encode("UTF-8")
+    finally:
+        wb.close()
+    return data
@@ -7,6 +7,8 @@ import pytest_snapshot.plugin
 import student_teacher_gradebook
 import tests._utils
 
+pytestmark = pytest.mark.excel
+
 MODULE_DIR = pathlib.Path(__file__).parent
 TEST_CASE_DIR = MODULE_DIR / "test_cases"
 
@@ -4,13 +4,102 @@ import functools
 import importlib
 import pathlib
 import shutil
+import sys
+import typing
 
 import click.testing
 import freezegun.api
 import pytest
+from benchmarks import generate
 
 import student_teacher_gradebook
 import student_teacher_gradebook.__main__
+from student_teacher_gradebook._backends import memory
+
+
+def pytest_configure(config):
+    """Register custom markers."""
+    config.addinivalue_line(
+        "markers", "excel: drives Microsoft Excel, so only runs on Windows with Excel installed."
+    )
+
+
+def pytest_runtest_setup(item):
+    """Skip Excel-driven tests on hosts that cannot run Excel."""
+    if item.get_closest_marker("excel") and sys.platform != "win32":
+        pytest.skip("requires Microsoft Excel")
+
+
+@pytest.fixture()
+def ooxml_backend(monkeypatch: pytest.MonkeyPatch):
+    """Use the pure-Python .xlsx backend for the test."""
+    monkeypatch.setattr(student_teacher_gradebook._config, "BACKEND", "ooxml")
+
+
+@pytest.fixture()
+def memory_backend(monkeypatch: pytest.MonkeyPatch):
+    """Use the in-memory backend for the test and provide its module."""
+    monkeypatch.setattr(student_teacher_gradebook._config, "BACKEND", "memory")
+    memory.reset()
+    yield memory
+    memory.reset()
+
+
+@pytest.fixture()
+def memory_teacher_book(temp_cwd: pathlib.Path, memory_backend, monkeypatch: pytest.MonkeyPatch):
+    """Provide a factory that sets up a teacher book on the in-memory backend in temp_cwd.
+
+    Call it with the student names and the grade sheets ({sheet name: rows}); template_rows
+    and student_rows fill the template's and each student workbook's first sheet. The config
+    is patched to use the book, and the template and student workbooks get small files on disk
+    for the publish manifest and journal to stamp and hash. Returns the teacher book's path.
+    """
+
+    def make(
+        students: typing.Sequence[str],
+        grade_sheets: typing.Mapping[str, typing.List[typing.List[typing.Any]]],
+        template_rows: typing.Sequence[typing.List[typing.Any]] = (),
+        student_rows: typing.Sequence[typing.List[typing.Any]] = (),
+    ) -> pathlib.Path:
+        teacher_book = temp_cwd / "TeacherBook.xlsx"
+        template = temp_cwd / "studentTemplate.xlsx"
+        monkeypatch.setattr(student_teacher_gradebook._config, "TEACHER_BOOK", teacher_book)
+        monkeypatch.setattr(student_teacher_gradebook._config, "STUDENT_TEMPLATE", template)
+        memory_backend.add_workbook(
+            teacher_book,
+            {
+                "Config": [
+                    ["Student Template Filename:", "studentTemplate.xlsx"],
+                    ["Student Filename Format String:", "{name}.xlsx"],
+                ],
+                "Roster": [["ID", "Student", "Workbook"]]
+                + [[f"id{i}", name, f"{name}.xlsx"] for i, name in enumerate(students)],
+                **grade_sheets,
+            },
+        )
+        memory_backend.add_workbook(template, {"Sheet1": [list(row) for row in template_rows]})
+        template.write_bytes(b"template")
+        for name in students:
+            student_book = temp_cwd / f"{name}.xlsx"
+            memory_backend.add_workbook(
+                student_book, {"Sheet1": [list(row) for row in student_rows]}
+            )
+            student_book.write_bytes(name.encode())
+        memory_backend.CALLS.clear()
+        return teacher_book
+
+    return make
+
+
+@pytest.fixture()
+def generated_gradebook(
+    temp_cwd: pathlib.Path, ooxml_backend, monkeypatch: pytest.MonkeyPatch
+) -> generate.Gradebook:
+    """Generate a small .xlsx gradebook in temp_cwd and patch the config to use it."""
+    gradebook = generate.generate(temp_cwd, students=4, sheets=2, columns=3)
+    monkeypatch.setattr(student_teacher_gradebook._config, "TEACHER_BOOK", gradebook.teacher_book)
+    monkeypatch.setattr(student_teacher_gradebook._config, "STUDENT_TEMPLATE", gradebook.template)
+    return gradebook
 
 
 @pytest.fixture()
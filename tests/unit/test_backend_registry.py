@@ -0,0 +1,45 @@
+import importlib.metadata
+
+import pytest
+
+from student_teacher_gradebook import _backends
+from student_teacher_gradebook._backends import memory
+
+
+@pytest.fixture()
+def registry(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(_backends, "_BACKEND_MODULES", dict(_backends._BACKEND_MODULES))
+    monkeypatch.setattr(_backends, "_entry_points_loaded", False)
+
+
+def test____register___module___application_from_that_module(registry):
+    _backends.register("scratch", memory.__name__)
+
+    assert isinstance(_backends.get_application("scratch"), memory.MemoryApplication)
+
+
+def test____get_application___entry_point___discovered_on_first_use(
+    registry, monkeypatch: pytest.MonkeyPatch
+):
+    entry_point = importlib.metadata.EntryPoint(
+        "plugin", memory.__name__, _backends.ENTRY_POINT_GROUP
+    )
+    monkeypatch.setattr(
+        importlib.metadata,
+        "entry_points",
+        lambda: importlib.metadata.EntryPoints([entry_point]),
+    )
+
+    assert isinstance(_backends.get_application("plugin"), memory.MemoryApplication)
+    assert "plugin" in _backends.backend_names()
+
+
+def test____get_application___unknown_name___lists_known_backends(
+    registry, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(
+        importlib.metadata, "entry_points", lambda: importlib.metadata.EntryPoints([])
+    )
+
+    with pytest.raises(ValueError, match="expected one of: excel, memory, ooxml"):
+        _backends.get_application("nope")
@@ -0,0 +1,100 @@
+import pathlib
+
+import click
+import pytest
+
+import tests._utils
+from student_teacher_gradebook import _publishing
+
+SECTIONS = {
+    "section1": {"Ann": 10, "Bo": 9},
+    "section2": {"Ann": 7, "Cy": 8},
+}
+
+
+def _add_sections(temp_cwd: pathlib.Path, memory_backend, student_file: str) -> None:
+    """Add a teacher book per section; student_file is each roster entry's workbook."""
+    for section, scores in SECTIONS.items():
+        directory = temp_cwd / section
+        directory.mkdir()
+        teacher_book = directory / "TeacherBook.xlsx"
+        template = directory / "studentTemplate.xlsx"
+        memory_backend.add_workbook(
+            teacher_book,
+            {
+                "Config": [
+                    ["Student Template Filename:", "studentTemplate.xlsx"],
+                    ["Student Filename Format String:", "{name}.xlsx"],
+                ],
+                "Roster": [["ID", "Student", "Workbook"]]
+                + [[name, name, student_file.format(name=name)] for name in scores],
+                f"Quiz {section}": [[name, score] for name, score in scores.items()],
+            },
+        )
+        teacher_book.write_bytes(section.encode())  # found by the batch command
+        memory_backend.add_workbook(template, {"Sheet1": []})
+        template.write_bytes(b"template")  # hashed by the publish manifest
+        for name in scores:
+            path = (directory / student_file.format(name=name)).resolve()
+            memory_backend.add_workbook(path, {"Sheet1": []})
+            path.write_bytes(b"")  # stamped by the publish manifest
+    memory_backend.CALLS.clear()
+
+
+@pytest.fixture()
+def sections(temp_cwd: pathlib.Path, memory_backend) -> pathlib.Path:
+    _add_sections(temp_cwd, memory_backend, "{name}.xlsx")  # beside each section's book
+    return temp_cwd
+
+
+def test____batch___directory_of_sections___one_session_and_one_write_per_student(
+    sections: pathlib.Path, memory_backend, console_runner: tests._utils.RUNNER_TYPE, mocker
+):
+    publish = mocker.spy(_publishing, "publish_student")
+
+    result = console_runner(["batch", str(sections)])
+
+    assert not result.exception
+    assert memory_backend.CALLS["create_application"] == 1
+    assert sorted(call.args[1].student_name for call in publish.call_args_list) == [
+        "Ann",
+        "Ann",
+        "Bo",
+        "Cy",
+    ]
+    assert memory_backend.sheet_rows(sections / "section1" / "Ann.xlsx", "Progress") == [
+        ["Quiz section1", 10]
+    ]
+    assert memory_backend.sheet_rows(sections / "section2" / "Ann.xlsx", "Progress") == [
+        ["Quiz section2", 7]
+    ]
+    section1 = sections / "section1" / "TeacherBook.xlsx"
+    assert f"{section1}: 2 updated, 0 unchanged, 0 failed" in result.stdout
+
+
+def test____batch___run_again___skips_every_student(
+    sections: pathlib.Path, console_runner: tests._utils.RUNNER_TYPE, mocker
+):
+    console_runner(["batch", str(sections)])
+    publish = mocker.spy(_publishing, "publish_student")
+
+    result = console_runner(["batch", str(sections / "*" / "TeacherBook.xlsx")])
+
+    assert not result.exception
+    assert publish.call_count == 0
+    section2 = sections / "section2" / "TeacherBook.xlsx"
+    assert f"{section2}: 0 updated, 2 unchanged, 0 failed" in result.stdout
+
+
+def test____batch___student_workbook_named_by_two_books___rejected(
+    temp_cwd: pathlib.Path, memory_backend, console_runner: tests._utils.RUNNER_TYPE, mocker
+):
+    _add_sections(temp_cwd, memory_backend, "../{name}.xlsx")  # one workbook per student
+    publish = mocker.spy(_publishing, "publish_student")
+
+    with pytest.raises(click.ClickException) as error:
+        console_runner(["batch", str(temp_cwd)])
+
+    assert str(temp_cwd / "Ann.xlsx") in error.value.message
+    assert "more than one teacher workbook" in error.value.message
+    assert publish.call_count == 0
@@ -0,0 +1,47 @@
+import pathlib
+
+from benchmarks import generate, suite
+
+import student_teacher_gradebook
+
+
+def test____generate___sizes___teacher_book_has_roster_and_scores(tmp_path: pathlib.Path):
+    gradebook = generate.generate(tmp_path, students=5, sheets=3, columns=4, sparsity=0.5)
+
+    session = student_teacher_gradebook.Session("ooxml")
+    with session, student_teacher_gradebook.MainWorkbook(
+        gradebook.teacher_book, session=session
+    ) as main_workbook:
+        assert [student.name for student in main_workbook.roster] == gradebook.students
+        assert sorted(main_workbook.worksheet_names()) == sorted(
+            gradebook.sheets + ["Config", "Roster"]
+        )
+        rows = main_workbook.get_block_range("Assignment 1", 1, "A")
+    assert len(rows) == 6
+    assert sorted(row[0] for row in rows[1:]) == gradebook.students
+
+
+def test____run___small_gradebook___times_the_commands_phases_and_writes_each_student(
+    tmp_path: pathlib.Path,
+):
+    timings = suite.run(tmp_path, students=4, sheets=2, columns=3, backends=["ooxml"])
+
+    phases = {(timing.command, timing.phase): timing for timing in timings}
+    assert {
+        ("populate-student-sheets", "open"),
+        ("populate-student-sheets", "load_config"),
+        ("populate-student-sheets", "load_roster"),
+        ("populate-student-sheets", "plan"),
+        ("populate-student-sheets", "copy_files"),
+        ("populate-student-sheets", "update_roster"),
+        ("populate-student-sheets", "save"),
+        ("update-student-sheets", "open"),
+        ("update-student-sheets", "extraction"),
+        ("update-student-sheets", "manifest"),
+        ("update-student-sheets", "publish"),
+        ("update-student-sheets", "publish_student"),
+        ("update-student-sheets", "save"),
+    } <= set(phases)
+    assert phases[("update-student-sheets", "publish_student")].count == 4
+    assert len(list((tmp_path / "ooxml").glob("Student *_gradebook.xlsx"))) == 4
+    assert (tmp_path / "ooxml" / "TeacherBook.xlsx.manifest.json").exists()
@@ -0,0 +1,65 @@
+import pathlib
+
+import pytest
+
+import tests._utils
+
+STUDENTS = [f"Student {i}" for i in range(5)]
+SHEETS = [f"Quiz {i}" for i in range(4)]
+SCORE_COLUMNS = 6
+
+
+@pytest.fixture()
+def memory_gradebook(memory_teacher_book):
+    grade_sheets = {
+        sheet: [
+            [name] + [sheet_index * 10 + column for column in range(SCORE_COLUMNS)]
+            for name in STUDENTS
+        ]
+        for sheet_index, sheet in enumerate(SHEETS)
+    }
+    return memory_teacher_book(STUDENTS, grade_sheets, student_rows=[["old data"]]).parent
+
+
+def test____update_student_sheets___uses_one_read_per_sheet_and_write_per_student(
+    memory_gradebook: pathlib.Path,
+    memory_backend,
+    console_runner: tests._utils.RUNNER_TYPE,
+):
+    result = console_runner("update-student-sheets")
+
+    assert not result.exception
+    assert memory_backend.sheet_rows(memory_gradebook / "Student 3.xlsx", "Progress") == [
+        [sheet] + [sheet_index * 10 + column for column in range(SCORE_COLUMNS)]
+        for sheet_index, sheet in enumerate(SHEETS)
+    ]
+    calls = memory_backend.CALLS
+    assert calls["get_value"] == calls["set_value"] == 0
+    assert calls["get_block"] == 2  # the Config and Roster sheets
+    assert calls["iter_rows"] == calls["get_rows"] == len(SHEETS)
+    assert calls["set_block"] == len(STUDENTS)
+    assert calls["format_as_text"] == 0  # numbers are written as numbers
+
+
+def test____update_student_sheets___date_like_text___one_text_format_call_per_student(
+    memory_gradebook: pathlib.Path,
+    memory_backend,
+    console_runner: tests._utils.RUNNER_TYPE,
+    mocker,
+):
+    quiz = memory_backend.WORKBOOKS[(memory_gradebook / "TeacherBook.xlsx").resolve()]["Quiz 1"]
+    for row in range(1, len(STUDENTS) + 1):
+        quiz[(row, 2)] = "8/10"
+    format_as_text = mocker.spy(memory_backend.MemoryWorkbook, "format_as_text")
+
+    result = console_runner("update-student-sheets")
+
+    assert not result.exception
+    assert memory_backend.sheet_rows(memory_gradebook / "Student 3.xlsx", "Progress")[1][:3] == [
+        "Quiz 1",
+        "8/10",
+        11,
+    ]
+    assert memory_backend.CALLS["set_block"] == len(STUDENTS)
+    assert format_as_text.call_count == len(STUDENTS)
+    assert format_as_text.call_args.args[1:] == ("Progress", 1, len(SHEETS), [2])
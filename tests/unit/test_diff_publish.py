@@ -0,0 +1,124 @@
+import pathlib
+
+import pytest
+
+import student_teacher_gradebook
+import tests._utils
+from student_teacher_gradebook import _publishing
+
+STUDENTS = ["Ann", "Bo"]
+
+
+@pytest.fixture()
+def student_book(temp_cwd: pathlib.Path, memory_backend):
+    memory_backend.add_workbook(temp_cwd / "template.xlsx", {"Sheet1": [["Sheet", "Score"]]})
+    memory_backend.add_workbook(
+        temp_cwd / "Ann.xlsx",
+        {
+            "Progress": [
+                ["Sheet", "Score"],
+                ["Quiz 1", 5.0, "my note"],
+                ["Quiz 2", 7.0],
+                ["Quiz 3", 9.0],
+            ],
+            "Scratch": [["kept"]],
+        },
+    )
+    memory_backend.CALLS.clear()
+    return temp_cwd / "Ann.xlsx"
+
+
+def _job(student_book: pathlib.Path, rows, diff=True):
+    return _publishing.PublishJob(
+        "Ann", student_book, student_book.with_name("template.xlsx"), 2, rows, diff=diff
+    )
+
+
+def test____publish_student___diff___writes_only_changed_cells(
+    student_book: pathlib.Path, memory_backend
+):
+    with student_teacher_gradebook.Session() as session:
+        _publishing.publish_student(session, _job(student_book, [["Quiz 1", "5"], ["Quiz 2", "8"]]))
+
+    assert memory_backend.sheet_rows(student_book, "Progress") == [
+        ["Sheet", "Score", None],
+        ["Quiz 1", 5.0, "my note"],
+        ["Quiz 2", "8", None],
+    ]
+    assert memory_backend.sheet_rows(student_book, "Scratch") == [["kept"]]
+    assert memory_backend.CALLS["set_block"] == 2  # Quiz 2's score, then clearing Quiz 3
+    assert memory_backend.CALLS["copy_sheet_from"] == 0
+
+
+def test____publish_student___diff_nothing_changed___does_not_save(
+    student_book: pathlib.Path, memory_backend
+):
+    rows = [["Quiz 1", "5"], ["Quiz 2", "7"], ["Quiz 3", "9"]]
+
+    with student_teacher_gradebook.Session() as session:
+        _publishing.publish_student(session, _job(student_book, rows))
+
+    assert memory_backend.CALLS["set_block"] == memory_backend.CALLS["save"] == 0
+
+
+def test____publish_student___diff_without_progress_sheet___rebuilds_from_template(
+    student_book: pathlib.Path, memory_backend
+):
+    memory_backend.add_workbook(student_book, {"Sheet1": [["old"]]})
+
+    with student_teacher_gradebook.Session() as session:
+        _publishing.publish_student(session, _job(student_book, [["Quiz 1", "5"]]))
+
+    assert memory_backend.sheet_rows(student_book, "Progress") == [
+        ["Sheet", "Score"],
+        ["Quiz 1", "5"],
+    ]
+    assert list(memory_backend.WORKBOOKS[student_book.resolve()]) == ["Progress"]
+
+
+@pytest.fixture()
+def memory_gradebook(memory_teacher_book):
+    grade_sheets = {"Quiz": [[name, 1, 2] for name in STUDENTS]}
+    return memory_teacher_book(STUDENTS, grade_sheets, template_rows=[["Sheet", "A", "B"]]).parent
+
+
+def test____update_student_sheets___diff_after_full_run___keeps_student_notes(
+    memory_gradebook: pathlib.Path,
+    memory_backend,
+    console_runner: tests._utils.RUNNER_TYPE,
+):
+    console_runner(["update-student-sheets"])
+    ann_book = memory_backend.WORKBOOKS[(memory_gradebook / "Ann.xlsx").resolve()]
+    ann_book["Progress"][(1, 5)] = "my note"  # beside the Quiz row
+    teacher_book = memory_backend.WORKBOOKS[(memory_gradebook / "TeacherBook.xlsx").resolve()]
+    teacher_book["Quiz"][(1, 3)] = 10
+    memory_backend.CALLS.clear()
+
+    result = console_runner(["update-student-sheets", "--diff"])
+
+    assert not result.exception
+    assert memory_backend.sheet_rows(memory_gradebook / "Ann.xlsx", "Progress") == [
+        ["Quiz", 1, 10, None, "my note"]
+    ]
+    assert memory_backend.CALLS["copy_sheet_from"] == 0
+    assert memory_backend.CALLS["set_block"] == 1
+
+
+def test____update_student_sheets___diff_after_a_column_removed_from_every_sheet___clears_it(
+    memory_gradebook: pathlib.Path,
+    memory_backend,
+    console_runner: tests._utils.RUNNER_TYPE,
+):
+    console_runner(["update-student-sheets"])
+    ann_book = memory_backend.WORKBOOKS[(memory_gradebook / "Ann.xlsx").resolve()]
+    ann_book["Progress"][(1, 5)] = "my note"
+    teacher_book = memory_backend.WORKBOOKS[(memory_gradebook / "TeacherBook.xlsx").resolve()]
+    for row in range(1, len(STUDENTS) + 1):
+        del teacher_book["Quiz"][(row, 3)]
+
+    result = console_runner(["update-student-sheets", "--diff"])
+
+    assert not result.exception
+    assert memory_backend.sheet_rows(memory_gradebook / "Ann.xlsx", "Progress") == [
+        ["Quiz", 1, None, None, "my note"]
+    ]
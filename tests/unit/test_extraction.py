@@ -0,0 +1,84 @@
+import pathlib
+
+import pytest
+
+import student_teacher_gradebook
+from student_teacher_gradebook import _extraction, _projection
+
+ROSTER = [student_teacher_gradebook.StudentData(str(i), f"Student {i}", None) for i in range(3)]
+
+
+@pytest.fixture()
+def workbook(tmp_path: pathlib.Path, memory_backend):
+    path = tmp_path / "TeacherBook.xlsx"
+    quiz = [["Name", "Score", "Notes"]]
+    for row in range(200):
+        # other classes' students, with wide notes columns that no roster row uses
+        quiz.append([f"Other {row}", row] + [None] * 10 + ["far right"])
+    quiz[50] = ["Student 1", 8, None, "late"]
+    quiz[120] = ["Student 0", 9]
+    quiz[121] = ["Student 2"]  # no values
+    memory_backend.add_workbook(path, {"Quiz": quiz, "Empty": [], "Test": [["Student 0", 1]]})
+    workbook = student_teacher_gradebook._BaseWorkBook(path)
+    workbook.open()
+    yield workbook
+    workbook.close()
+
+
+def test____extract___rows_for_roster_students___partitioned_by_student(workbook):
+    engine = _extraction.ExtractionEngine(workbook, ROSTER)
+
+    assert engine.extract(["Quiz", "Empty", "Test"]) == {
+        "Student 1": [["Quiz", 8, "", "late"]],
+        "Student 0": [["Quiz", 9], ["Test", 1]],
+    }
+
+
+def test____extract___reads_names_then_only_matching_rows(workbook, memory_backend):
+    engine = _extraction.ExtractionEngine(workbook, ROSTER)
+
+    engine.extract(["Quiz"])
+
+    name_cells = 201
+    value_cells = len([8, None, "late"]) + len([9])  # Student 2's empty row is not returned
+    assert (engine.rows_read, engine.cells_read) == (name_cells + 2, name_cells + value_cells)
+    assert memory_backend.CALLS["get_block"] == 0
+
+
+def test____extract___projected_columns___reads_only_those_columns(workbook, mocker):
+    projection = _projection.Projection(columns=(("q*", ((2, 2), (4, 4))),))
+    engine = _extraction.ExtractionEngine(workbook, ROSTER, projection)
+    get_rows = mocker.spy(workbook, "get_rows")
+
+    assert engine.extract(["Quiz", "Test"]) == {
+        "Student 1": [["Quiz", 8, "late"]],
+        "Student 0": [["Quiz", 9], ["Test", 1]],
+    }
+    quiz_reads = [call.kwargs for call in get_rows.call_args_list if call.args[0] == "Quiz"]
+    assert [(read["column_index"], read["end_column_index"]) for read in quiz_reads] == [
+        (2, 2),
+        (4, 4),
+    ]
+
+
+def test____from_config___sheet_patterns_and_columns___parsed():
+    config = student_teacher_gradebook.Config(
+        "studentTemplate.xlsx",
+        "{name}.xlsx",
+        include_sheets="Quiz*, Test ?",
+        exclude_sheets="*draft*",
+        sheet_columns="Quiz*: D, B:C; Test 1: C",
+    )
+
+    projection = _projection.from_config(config)
+
+    assert [
+        name
+        for name in ["Quiz 1", "quiz 2 DRAFT", "Test 1", "Test 10", "Notes"]
+        if projection.includes(name)
+    ] == ["Quiz 1", "Test 1"]
+    assert projection.column_runs("QUIZ 1") == ((2, 4),)
+    assert projection.column_runs("Test 1") == ((3, 3),)
+    assert projection.column_runs("Test 2") is None
+    with pytest.raises(ValueError, match="column A"):
+        _projection.from_config(config._replace(sheet_columns="Quiz*: A:C"))
@@ -0,0 +1,61 @@
+import os
+import pathlib
+import subprocess
+import sys
+import typing
+
+import pytest
+
+REPO_ROOT = pathlib.Path(__file__).parent.parent.parent
+
+# Modules only some commands or backends need; importing them up front slows every command.
+LAZY_MODULES = {
+    "win32com",
+    "pythoncom",
+    "multiprocessing",
+    "concurrent.futures",
+    "importlib.metadata",
+    "zipfile",
+    "student_teacher_gradebook._backends.excel",
+    "student_teacher_gradebook._backends.ooxml",
+    "student_teacher_gradebook._backends.memory",
+}
+
+
+def _import_times(tmp_path: pathlib.Path, *args: str) -> typing.List[typing.Tuple[str, int, bool]]:
+    """Run python -X importtime with args: (module, cumulative microseconds, is top-level)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=tmp_path,
+        env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # e.g. the header line
+        name = fields[2][1:]  # nested imports are indented further
+        imports.append((name.strip(), int(fields[1]), not name.startswith(" ")))
+    return imports
+
+
+@pytest.mark.parametrize(
+    "args,budget_seconds",
+    [
+        (["-c", "import student_teacher_gradebook"], 0.5),
+        (["-m", "student_teacher_gradebook", "--help"], 1.0),
+    ],
+)
+def test____startup___imports_only_what_is_needed_within_budget(
+    tmp_path: pathlib.Path, args, budget_seconds
+):
+    imports = _import_times(tmp_path, *args)
+
+    imported = {name for name, _, _ in imports}
+    assert "student_teacher_gradebook" in imported
+    assert not LAZY_MODULES & imported
+    total = sum(microseconds for _, microseconds, top_level in imports if top_level) / 1e6
+    assert total < budget_seconds
@@ -0,0 +1,110 @@
+import pathlib
+
+import click
+import pytest
+
+import tests._utils
+from student_teacher_gradebook import _publishing
+
+STUDENTS = ["Ann", "Bo", "Cy"]
+
+
+@pytest.fixture()
+def gradebook(memory_teacher_book):
+    return memory_teacher_book(STUDENTS, {"Quiz 1": [[name, 10] for name in STUDENTS]})
+
+
+def _failing_for(monkeypatch: pytest.MonkeyPatch, name: str, error: BaseException):
+    publish_student = _publishing.publish_student
+
+    def publish(session, job):
+        if job.student_name == name:
+            raise error
+        publish_student(session, job)
+
+    monkeypatch.setattr(_publishing, "publish_student", publish)
+
+
+def _killed_at(monkeypatch: pytest.MonkeyPatch, console_runner, gradebook, name):
+    """Run update-student-sheets, stopping hard when it gets to name."""
+    with monkeypatch.context() as patch:
+        _failing_for(patch, name, KeyboardInterrupt())
+        with pytest.raises(click.Abort):  # how click reports Ctrl+C
+            console_runner(["update-student-sheets"])
+    # A killed run never gets to save its manifest.
+    gradebook.with_name("TeacherBook.xlsx.manifest.json").unlink()
+
+
+def test____update_student_sheets___resume_after_kill___publishes_only_the_rest(
+    gradebook: pathlib.Path,
+    console_runner: tests._utils.RUNNER_TYPE,
+    monkeypatch: pytest.MonkeyPatch,
+    mocker,
+):
+    _killed_at(monkeypatch, console_runner, gradebook, "Bo")
+    publish = mocker.spy(_publishing, "publish_student")
+
+    result = console_runner(["update-student-sheets", "--resume"])
+
+    assert not result.exception
+    assert sorted(call.args[1].student_name for call in publish.call_args_list) == ["Bo", "Cy"]
+    assert "1 student workbook(s) already completed" in result.stdout
+    assert not gradebook.with_name("TeacherBook.xlsx.journal.jsonl").exists()
+
+
+def test____update_student_sheets___resume_after_output_edited___republishes_it(
+    gradebook: pathlib.Path,
+    console_runner: tests._utils.RUNNER_TYPE,
+    monkeypatch: pytest.MonkeyPatch,
+    mocker,
+):
+    _killed_at(monkeypatch, console_runner, gradebook, "Cy")
+    gradebook.with_name("Ann.xlsx").write_bytes(b"edited")
+    publish = mocker.spy(_publishing, "publish_student")
+
+    result = console_runner(["update-student-sheets", "--resume"])
+
+    assert not result.exception
+    assert sorted(call.args[1].student_name for call in publish.call_args_list) == ["Ann", "Cy"]
+
+
+def test____update_student_sheets___one_student_fails___others_published_and_journaled(
+    gradebook: pathlib.Path,
+    memory_backend,
+    console_runner: tests._utils.RUNNER_TYPE,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    _failing_for(monkeypatch, "Ann", PermissionError("Ann.xlsx is locked"))
+
+    with pytest.raises(click.ClickException, match=r"1 student workbook\(s\): Ann\."):
+        console_runner(["update-student-sheets"])
+
+    for name in ["Bo", "Cy"]:
+        assert memory_backend.sheet_rows(gradebook.with_name(f"{name}.xlsx"), "Progress") == [
+            ["Quiz 1", 10]
+        ]
+    journal = gradebook.with_name("TeacherBook.xlsx.journal.jsonl").read_text().splitlines()
+    assert len(journal) == 1 + 2  # the header, then Bo and Cy
+
+
+def test____update_student_sheets___student_without_workbook___reported_and_resumable(
+    gradebook: pathlib.Path,
+    memory_backend,
+    console_runner: tests._utils.RUNNER_TYPE,
+    mocker,
+):
+    memory_backend.WORKBOOKS[gradebook]["Roster"][(3, 3)] = None  # Bo has no workbook yet
+
+    with pytest.raises(click.ClickException, match=r"1 student workbook\(s\): Bo\."):
+        console_runner(["update-student-sheets"])
+
+    assert memory_backend.sheet_rows(gradebook.with_name("Ann.xlsx"), "Progress") == [
+        ["Quiz 1", 10]
+    ]
+    memory_backend.WORKBOOKS[gradebook]["Roster"][(3, 3)] = "Bo.xlsx"
+    publish = mocker.spy(_publishing, "publish_student")
+
+    result = console_runner(["update-student-sheets", "--resume"])
+
+    assert not result.exception
+    assert [call.args[1].student_name for call in publish.call_args_list] == ["Bo"]
@@ -0,0 +1,85 @@
+import pathlib
+
+import pytest
+
+import tests._utils
+
+STUDENTS = ["Ann", "Bo", "Cy"]
+
+
+@pytest.fixture()
+def gradebook(memory_teacher_book):
+    return memory_teacher_book(STUDENTS, {"Quiz 1": [[name, 10] for name in STUDENTS]})
+
+
+def _published(memory_backend, console_runner, *args):
+    memory_backend.CALLS.clear()
+    result = console_runner(["update-student-sheets", *args])
+    assert not result.exception
+    return memory_backend.CALLS["open_workbook"] - 1  # minus the teacher book
+
+
+def test____update_student_sheets___nothing_changed___skips_all_students(
+    gradebook: pathlib.Path, memory_backend, console_runner: tests._utils.RUNNER_TYPE
+):
+    assert _published(memory_backend, console_runner) == len(STUDENTS)
+
+    assert _published(memory_backend, console_runner) == 0
+    assert gradebook.with_name("TeacherBook.xlsx.manifest.json").is_file()
+
+
+def test____update_student_sheets___one_score_changed___publishes_only_that_student(
+    gradebook: pathlib.Path, memory_backend, console_runner: tests._utils.RUNNER_TYPE
+):
+    _published(memory_backend, console_runner)
+    memory_backend.WORKBOOKS[gradebook]["Quiz 1"][(2, 2)] = 7
+
+    assert _published(memory_backend, console_runner) == 1
+    assert memory_backend.sheet_rows(gradebook.with_name("Bo.xlsx"), "Progress") == [["Quiz 1", 7]]
+
+
+@pytest.mark.parametrize(
+    "change, expected",
+    [
+        pytest.param(
+            lambda book: book.with_name("studentTemplate.xlsx").write_bytes(b"new"),
+            len(STUDENTS),
+            id="template",
+        ),
+        pytest.param(lambda book: book.with_name("Cy.xlsx").unlink(), 1, id="student_file_missing"),
+        pytest.param(
+            lambda book: book.with_name("Cy.xlsx").write_bytes(b"edited"),
+            1,
+            id="student_file_edited",
+        ),
+    ],
+)
+def test____update_student_sheets___inputs_changed___republishes(
+    gradebook: pathlib.Path,
+    memory_backend,
+    console_runner: tests._utils.RUNNER_TYPE,
+    change,
+    expected: int,
+):
+    _published(memory_backend, console_runner)
+    change(gradebook)
+
+    assert _published(memory_backend, console_runner) == expected
+
+
+def test____update_student_sheets___config_changed___publishes_all(
+    gradebook: pathlib.Path, memory_backend, console_runner: tests._utils.RUNNER_TYPE
+):
+    _published(memory_backend, console_runner)
+    memory_backend.WORKBOOKS[gradebook]["Config"][(3, 1)] = "Skip N Rows When Copying Student Data"
+    memory_backend.WORKBOOKS[gradebook]["Config"][(3, 2)] = "1"
+
+    assert _published(memory_backend, console_runner) == len(STUDENTS)
+
+
+def test____update_student_sheets___force___publishes_all(
+    gradebook: pathlib.Path, memory_backend, console_runner: tests._utils.RUNNER_TYPE
+):
+    _published(memory_backend, console_runner)
+
+    assert _published(memory_backend, console_runner, "--force") == len(STUDENTS)
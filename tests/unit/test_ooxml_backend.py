@@ -0,0 +1,335 @@
+import datetime
+import io
+import pathlib
+import shutil
+import struct
+import zipfile
+
+import pytest
+
+import student_teacher_gradebook
+import tests._utils
+from student_teacher_gradebook._backends import ooxml
+
+SOURCE_DIR = pathlib.Path(__file__).parent.parent.parent / "source"
+UPDATE_TEST_CASE_DIR = (
+    pathlib.Path(__file__).parent.parent / "component/update_student_sheets/test_cases"
+)
+
+
+@pytest.fixture()
+def teacher_book(tmp_path: pathlib.Path, ooxml_backend) -> pathlib.Path:
+    shutil.copy2(SOURCE_DIR / "TeacherBook.xlsx", tmp_path)
+    return tmp_path / "TeacherBook.xlsx"
+
+
+def test____main_workbook___load___reads_config_and_roster(teacher_book: pathlib.Path):
+    with student_teacher_gradebook.MainWorkbook(teacher_book) as workbook:
+        assert workbook.config == student_teacher_gradebook.Config(
+            student_template_filename="studentTemplate.xlsx",
+            student_filename_format_string="Mus476_{name}_gradebook.xlsx",
+            skip_n_rows_when_copying_student_data=1.0,
+        )
+        assert workbook.roster == ()
+        assert list(workbook.worksheet_names()) == ["Config", "Roster", "Quiz 1", "Assignment 2"]
+
+
+def test____set_values___save_and_reopen___values_round_trip(teacher_book: pathlib.Path):
+    workbook = student_teacher_gradebook._BaseWorkBook(teacher_book)
+    workbook.open()
+    workbook.set_column_range("Roster", 2, "B", ["Ann <A&B>", "Bo"])
+    workbook.set_row_range("Quiz 1", "A", 2, ["Ann <A&B>", 9.5, "P", ""])
+    workbook.save()
+    workbook.close()
+
+    workbook.open()
+    try:
+        assert list(workbook.get_cells_value_range("Roster", 2, "B", end_row_index=3)) == [
+            ["Ann <A&B>", None, None, None, None],
+            ["Bo", None, None, None, None],
+        ]
+        assert list(workbook.get_cells_value_range("Quiz 1", 2, "A")) == [["Ann <A&B>", 9.5, "P"]]
+    finally:
+        workbook.close()
+    with zipfile.ZipFile(teacher_book) as package:
+        assert package.testzip() is None
+        assert "xl/tables/table1.xml" in package.namelist()
+
+
+def test____set_values___columns_past_z___save_and_reopen_in_place(teacher_book: pathlib.Path):
+    workbook = student_teacher_gradebook._BaseWorkBook(teacher_book)
+    workbook.open()
+    workbook.set_row_range("Quiz 1", "Z", 2, ["z", "aa", "ab"])
+    workbook.save()
+    workbook.close()
+
+    workbook.open()
+    try:
+        assert list(workbook.get_cells_value_range("Quiz 1", 2, "Z")) == [["z", "aa", "ab"]]
+        assert list(workbook.get_cells_value_range("Quiz 1", 2, "AB")) == [["ab"]]
+    finally:
+        workbook.close()
+
+
+def test____set_typed_block_range___save_and_reopen___keeps_native_types(
+    teacher_book: pathlib.Path,
+):
+    when = datetime.datetime(2024, 1, 2, 3, 4)
+    workbook = student_teacher_gradebook._BaseWorkBook(teacher_book)
+    workbook.open()
+    workbook.set_typed_block_range(
+        "Quiz 1", "A", 2, [["Ann", "8/10", 9.5, when, "007"], ["Bo", "Oct 10", 7, None, ""]]
+    )
+    workbook.save()
+    workbook.close()
+
+    workbook.open()
+    try:
+        assert list(workbook.get_cells_value_range("Quiz 1", 2, "A", end_row_index=3)) == [
+            ["Ann", "8/10", 9.5, when, "007"],
+            ["Bo", "Oct 10", 7.0, None, None],
+        ]
+    finally:
+        workbook.close()
+
+
+def test____set_typed_block_range___rows_from_a_generator___streamed_into_the_template_sheet(
+    tmp_path: pathlib.Path, ooxml_backend
+):
+    student_file = tmp_path / "student.xlsx"
+    shutil.copy2(SOURCE_DIR / "TeacherBook.xlsx", student_file)
+    workbook = student_teacher_gradebook.StudentWorkbook(student_file)
+    workbook.open()
+    workbook.copy_sheet_from(SOURCE_DIR / "studentTemplate.xlsx", new_name="Progress")
+    rows = ([f"Quiz {number}", score] for number, score in [(1, 10), (2, "8/10")])
+    workbook.set_typed_block_range("Progress", "A", 1, rows)
+    workbook.save()
+    workbook.close()
+
+    with zipfile.ZipFile(student_file) as package:
+        shared_strings = package.read("xl/sharedStrings.xml").decode()
+        sheet_xml = next(
+            package.read(name).decode()
+            for name in package.namelist()
+            if name.startswith("xl/worksheets/") and "Quiz 1" in package.read(name).decode()
+        )
+    assert '<c r="A1" s="' in sheet_xml  # the template's row formatting is kept
+    assert 't="inlineStr"' in sheet_xml and "Quiz 2" not in shared_strings
+    assert "<conditionalFormatting" in sheet_xml
+    workbook.open()
+    try:
+        assert list(workbook.get_cells_value_range("Progress", 1, "A", end_row_index=2)) == [
+            ["Quiz 1", 10],
+            ["Quiz 2", "8/10"],
+        ]
+    finally:
+        workbook.close()
+
+
+def test____copy_remove_rename___sheet_from_template___replaces_sheets(
+    tmp_path: pathlib.Path, ooxml_backend
+):
+    student_file = tmp_path / "student.xlsx"
+    shutil.copy2(SOURCE_DIR / "TeacherBook.xlsx", student_file)
+    workbook = student_teacher_gradebook.StudentWorkbook(student_file)
+    workbook.open()
+    workbook.copy_sheet_from(SOURCE_DIR / "studentTemplate.xlsx", new_name="Progress_new")
+    for sheet in workbook.worksheet_names():
+        if sheet != "Progress_new":
+            workbook.remove_sheet(sheet)
+    workbook.rename_sheet("Progress_new", "Progress")
+    workbook.set_row_range("Progress", "A", 1, ["Quiz 1", 10])
+    workbook.save()
+    workbook.close()
+
+    with zipfile.ZipFile(student_file) as package:
+        sheet_parts = [name for name in package.namelist() if name.startswith("xl/worksheets/")]
+        sheet_xml = package.read(sheet_parts[0]).decode()
+        assert "xl/tables/table1.xml" not in package.namelist()
+    assert len(sheet_parts) == 1
+    assert "<conditionalFormatting" in sheet_xml
+    workbook.open()
+    try:
+        assert list(workbook.worksheet_names()) == ["Progress"]
+        assert list(workbook.get_cells_value_range("Progress", 1, "A")) == [["Quiz 1", 10.0]]
+    finally:
+        workbook.close()
+
+
+@pytest.mark.parametrize(
+    "case",
+    [
+        pytest.param(case, id=case.name)
+        for case in sorted(UPDATE_TEST_CASE_DIR.iterdir())
+        # Excel turns the text "10/10" into a date in simple_case; the file backend keeps text.
+        if case.is_dir() and case.name != "simple_case"
+    ],
+)
+def test____update_student_sheets___file_backend___matches_excel_values(
+    case: pathlib.Path,
+    temp_cwd: pathlib.Path,
+    ooxml_backend,
+    console_runner: tests._utils.RUNNER_TYPE,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    for source in case.glob("*.xlsx"):
+        shutil.copy2(source, temp_cwd)
+    monkeypatch.setattr(
+        student_teacher_gradebook._config, "TEACHER_BOOK", temp_cwd / "teacher.xlsx"
+    )
+
+    result = console_runner("update-student-sheets")
+
+    assert not result.exception
+    expected_dir = case / "output/update_student_sheets/expected_files"
+    actual = {}
+    for file in temp_cwd.glob("*.xlsx"):
+        actual.update(tests._utils.workbook_as_csv(file))
+    expected = {file.name: file.read_bytes() for file in expected_dir.glob("*.csv")}
+    assert {name: actual[name].decode().splitlines() for name in expected} == {
+        name: data.decode().splitlines() for name, data in expected.items()
+    }
+
+
+def test____stream_rows___small_chunks___parses_rows_split_across_chunks(
+    teacher_book: pathlib.Path,
+):
+    xml = (
+        '<worksheet><dimension ref="A1:C900000"/><sheetData>'
+        '<row r="1"><c r="A1" t="inlineStr"><is><t>Ann</t></is></c><c r="C1"><v>9.5</v></c></row>'
+        '<row r="3" spans="1:2"><c r="B3" t="str"><v>P&amp;Q</v></c></row>'
+        '<row r="900000" s="1" customFormat="1"><c r="A900000" s="1"/></row>'
+        "</sheetData></worksheet>"
+    ).encode()
+
+    workbook = ooxml.OoxmlWorkbook(teacher_book)
+    try:
+        rows = [
+            (index, {column: cell.value for column, cell in row.cells.items()})
+            for index, row in ooxml._stream_rows(io.BytesIO(xml), workbook._decode, chunk_size=7)
+        ]
+    finally:
+        workbook.close()
+
+    assert rows == [(1, {1: "Ann", 3: 9.5}), (3, {2: "P&Q"}), (900000, {1: None})]
+
+
+def test____iter_rows___unloaded_sheet___streams_without_loading_the_sheet(
+    teacher_book: pathlib.Path,
+):
+    workbook = student_teacher_gradebook._BaseWorkBook(teacher_book)
+    workbook.open()
+    workbook.set_block_range("Quiz 1", "A", 2, [[f"Student {i}", i, "", i * 2] for i in range(500)])
+    workbook.save()
+    workbook.close()
+
+    workbook.open()
+    try:
+        rows = list(workbook.iter_rows("Quiz 1", start_row_index=2))
+        assert workbook._workbook._worksheets == {}
+        assert rows[0] == (2, ["Student 0", 0.0, None, 0.0])
+        assert rows[-1] == (501, ["Student 499", 499.0, None, 998.0])
+        assert len(rows) == 500
+        assert list(workbook.iter_rows("Quiz 1", 2, "B", end_column_index="B"))[1] == (3, [1.0])
+    finally:
+        workbook.close()
+
+
+def test____get_rows___unloaded_sheet___returns_only_requested_rows(teacher_book: pathlib.Path):
+    workbook = student_teacher_gradebook._BaseWorkBook(teacher_book)
+    workbook.open()
+    workbook.set_block_range("Quiz 1", "A", 1, [[f"Student {i}", i, i * 2] for i in range(100)])
+    workbook.save()
+    workbook.close()
+
+    workbook.open()
+    try:
+        assert list(workbook.get_rows("Quiz 1", [50, 3, 99], "B")) == [
+            (3, [2.0, 4.0]),
+            (50, [49.0, 98.0]),
+            (99, [98.0, 196.0]),
+        ]
+        assert list(workbook.get_rows("Quiz 1", [7], "A", end_column_index="A")) == [
+            (7, ["Student 6"])
+        ]
+        assert workbook._workbook._worksheets == {}
+    finally:
+        workbook.close()
+
+
+def _raw_member(path: pathlib.Path, name: str) -> bytes:
+    with zipfile.ZipFile(path) as package, open(path, "rb") as stream:
+        info = package.getinfo(name)
+        stream.seek(info.header_offset + 26)
+        name_length, extra_length = struct.unpack("<HH", stream.read(4))
+        stream.seek(name_length + extra_length, 1)
+        return stream.read(info.compress_size)
+
+
+def test____save___untouched_parts___copied_without_recompressing(teacher_book: pathlib.Path):
+    original = teacher_book.with_name("original.xlsx")
+    shutil.copy2(teacher_book, original)
+    workbook = student_teacher_gradebook._BaseWorkBook(teacher_book)
+    workbook.open()
+    workbook.set_row_range("Quiz 1", "A", 2, ["Ann", 1])
+    workbook.save()
+    workbook.close()
+
+    with zipfile.ZipFile(teacher_book) as package:
+        assert package.testzip() is None
+        names = package.namelist()
+    assert _raw_member(teacher_book, "xl/theme/theme1.xml") == _raw_member(
+        original, "xl/theme/theme1.xml"
+    )
+    assert "xl/theme/theme1.xml" in names
+
+
+def test____save___zipfile_internals_changed___falls_back_to_the_public_api(
+    teacher_book: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+):
+    assert ooxml._raw_copy_works()  # on the Pythons this package supports
+    monkeypatch.setattr(ooxml, "_raw_copy_works", lambda: False)
+    original = teacher_book.with_name("original.xlsx")
+    shutil.copy2(teacher_book, original)
+    workbook = student_teacher_gradebook._BaseWorkBook(teacher_book)
+    workbook.open()
+    workbook.set_row_range("Quiz 1", "A", 2, ["Ann", 1])
+    workbook.save()
+    workbook.close()
+
+    with zipfile.ZipFile(teacher_book) as package, zipfile.ZipFile(original) as before:
+        assert package.testzip() is None
+        assert package.read("xl/theme/theme1.xml") == before.read("xl/theme/theme1.xml")
+    workbook.open()
+    try:
+        assert list(workbook.get_cells_value_range("Quiz 1", 2, "A", end_row_index=2)) == [
+            ["Ann", 1]
+        ]
+    finally:
+        workbook.close()
+
+
+def test____copy_sheet_from___many_workbooks___parses_template_once_per_change(
+    tmp_path: pathlib.Path, mocker
+):
+    template = tmp_path / "template.xlsx"
+    shutil.copy2(SOURCE_DIR / "studentTemplate.xlsx", template)
+    students = [tmp_path / f"student{i}.xlsx" for i in range(3)]
+    for student in students:
+        shutil.copy2(SOURCE_DIR / "studentTemplate.xlsx", student)
+    load = mocker.spy(ooxml, "_load_sheet_image")
+    app = ooxml.create_application()
+
+    for student in students:
+        workbook = app.open_workbook(student)
+        workbook.copy_sheet_from(template, 1, "Copy")
+        workbook.save()
+        workbook.close()
+    assert load.call_count == 1
+
+    shutil.copy2(students[0], template)  # new content, so a new image
+    workbook = app.open_workbook(students[1])
+    workbook.copy_sheet_from(template, 1, "Copy 2")
+    workbook.close()
+    assert load.call_count == 2
+    app.quit()
@@ -0,0 +1,148 @@
+import gc
+import pathlib
+import shutil
+import threading
+
+import click
+import pytest
+
+import student_teacher_gradebook
+import tests._utils
+from student_teacher_gradebook import _publishing
+
+CASE_DIR = (
+    pathlib.Path(__file__).parent.parent
+    / "component/update_student_sheets/test_cases/student_sheet_skip_n_rows_case"
+)
+
+
+@pytest.fixture()
+def case_copy(temp_cwd: pathlib.Path, ooxml_backend, monkeypatch: pytest.MonkeyPatch):
+    for source in CASE_DIR.glob("*.xlsx"):
+        shutil.copy2(source, temp_cwd)
+    monkeypatch.setattr(
+        student_teacher_gradebook._config, "TEACHER_BOOK", temp_cwd / "teacher.xlsx"
+    )
+    return temp_cwd
+
+
+def _student_csvs(directory: pathlib.Path):
+    data = {}
+    for file in sorted(directory.glob("Mus476_*.xlsx")):
+        data.update(tests._utils.workbook_as_csv(file))
+    return data
+
+
+def test____update_student_sheets___jobs___matches_sequential_output(
+    case_copy: pathlib.Path,
+    tmp_path_factory: pytest.TempPathFactory,
+    console_runner: tests._utils.RUNNER_TYPE,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    sequential_dir = tmp_path_factory.mktemp("sequential")
+    for source in CASE_DIR.glob("*.xlsx"):
+        shutil.copy2(source, sequential_dir)
+    with monkeypatch.context() as patch:
+        patch.chdir(sequential_dir)
+        patch.setattr(
+            student_teacher_gradebook._config, "TEACHER_BOOK", sequential_dir / "teacher.xlsx"
+        )
+        console_runner("update-student-sheets")
+
+    result = console_runner(["update-student-sheets", "--jobs", "2"])
+
+    assert not result.exception
+    assert sorted(line for line in result.stdout.splitlines() if line.startswith("Updated")) == [
+        "Updated John Doe (2 rows)",
+        "Updated Molly Doe (3 rows)",
+        "Updated Stephen Jane (2 rows)",
+    ]
+    assert _student_csvs(case_copy) == _student_csvs(sequential_dir)
+
+
+def test____publish_in_parallel___biggest_first_and_errors_reported(case_copy: pathlib.Path):
+    template = student_teacher_gradebook._config.STUDENT_TEMPLATE.resolve()
+    jobs = [
+        _publishing.PublishJob(
+            "small", case_copy / "Mus476_John Doe_gradebook.xlsx", template, 1, [["a"]]
+        ),
+        _publishing.PublishJob("missing", case_copy / "nobody.xlsx", template, 1, [["a"]] * 2),
+        _publishing.PublishJob(
+            "big", case_copy / "Mus476_Molly Doe_gradebook.xlsx", template, 1, [["a"]] * 3
+        ),
+    ]
+
+    results = list(_publishing.publish_in_parallel(jobs, workers=1, backend="ooxml"))
+
+    assert [(result.student_name, result.rows_written) for result in results] == [
+        ("big", 3),
+        ("missing", 0),
+        ("small", 1),
+    ]
+    assert "FileNotFoundError" in results[1].error
+    assert results[0].error is None and results[2].error is None
+
+
+def test____update_student_sheets___jobs_with_failure___raises(
+    case_copy: pathlib.Path, console_runner: tests._utils.RUNNER_TYPE
+):
+    (case_copy / "Mus476_Molly Doe_gradebook.xlsx").unlink()
+
+    with pytest.raises(click.ClickException, match="Molly Doe"):
+        console_runner(["update-student-sheets", "--jobs", "3"])
+
+
+def _jobs(directory: pathlib.Path, count: int):
+    template = directory / "template.xlsx"
+    return [
+        _publishing.PublishJob(f"student{i}", directory / f"{i}.xlsx", template, 1, [["a"]])
+        for i in range(count)
+    ]
+
+
+def test____publish_pipelined___thread_safe_backend___overlaps_publishes(
+    tmp_path: pathlib.Path, ooxml_backend, monkeypatch: pytest.MonkeyPatch
+):
+    # Passed only by two publishes running at once.
+    both_running = threading.Barrier(2, timeout=5)
+    monkeypatch.setattr(_publishing, "publish_student", lambda session, job: both_running.wait())
+
+    with student_teacher_gradebook.Session() as session:
+        results = list(_publishing.publish_pipelined(session, _jobs(tmp_path, 4), writers=2))
+
+    assert sorted(result.student_name for result in results) == [f"student{i}" for i in range(4)]
+    assert all(result.error is None for result in results)
+
+
+def test____publish_pipelined___caller_stops_early___remaining_jobs_not_published(
+    tmp_path: pathlib.Path, memory_backend, monkeypatch: pytest.MonkeyPatch
+):
+    published = []
+    monkeypatch.setattr(
+        _publishing, "publish_student", lambda session, job: published.append(job.student_name)
+    )
+
+    with student_teacher_gradebook.Session() as session:
+        results = _publishing.publish_pipelined(session, _jobs(tmp_path, 20), queue_size=2)
+        assert next(results).student_name == "student0"
+        results.close()
+
+    assert published == ["student0"]
+
+
+@pytest.mark.filterwarnings("error::pytest.PytestUnraisableExceptionWarning")
+def test____publish_pipelined___interrupted___shuts_down_cleanly(
+    tmp_path: pathlib.Path, memory_backend, monkeypatch: pytest.MonkeyPatch
+):
+    def publish(session, job):
+        if job.student_name == "student1":
+            raise KeyboardInterrupt()
+
+    monkeypatch.setattr(_publishing, "publish_student", publish)
+
+    with student_teacher_gradebook.Session() as session:
+        results = _publishing.publish_pipelined(session, _jobs(tmp_path, 5))
+        assert next(results).student_name == "student0"
+        with pytest.raises(KeyboardInterrupt):
+            next(results)
+    gc.collect()  # any task left pending on the closed loop would complain here
@@ -0,0 +1,183 @@
+import json
+import pathlib
+import pickle
+
+import pytest
+from benchmarks import generate
+
+import student_teacher_gradebook
+from student_teacher_gradebook import _extraction, _parse_cache, _rowstore
+from student_teacher_gradebook._backends import ooxml
+
+
+@pytest.fixture()
+def gradebook(tmp_path: pathlib.Path, ooxml_backend) -> generate.Gradebook:
+    return generate.generate(tmp_path, students=6, sheets=3, columns=4, seed=1)
+
+
+def _load(gradebook: generate.Gradebook, session=None):
+    """Load the teacher book like update-student-sheets; returns (workbook, engine, records)."""
+    with student_teacher_gradebook.MainWorkbook(
+        gradebook.teacher_book, session=session
+    ) as main_workbook:
+        engine = _extraction.ExtractionEngine(main_workbook, main_workbook.roster)
+        records = engine.extract(gradebook.sheets)
+    return main_workbook, engine, records
+
+
+def test____load___unchanged_workbook___reads_nothing_the_second_time(
+    gradebook: generate.Gradebook, mocker
+):
+    first_workbook, _, first_records = _load(gradebook)
+    read_config = mocker.spy(student_teacher_gradebook.MainWorkbook, "_read_config")
+    read_roster = mocker.spy(student_teacher_gradebook.MainWorkbook, "_read_roster")
+
+    main_workbook, engine, records = _load(gradebook)
+
+    assert _parse_cache.cache_path(gradebook.teacher_book).is_file()
+    assert read_config.call_count == read_roster.call_count == 0
+    assert engine.rows_read == 0
+    assert records == first_records
+    assert main_workbook.config == first_workbook.config
+    assert main_workbook.roster == first_workbook.roster
+
+
+def _edit_one_score(gradebook: generate.Gradebook) -> None:
+    editor = student_teacher_gradebook._BaseWorkBook(gradebook.teacher_book)
+    editor.open()
+    editor.set_block_range("Assignment 2", "B", 2, [["99"]])
+    editor.save()
+    editor.close()
+
+
+@pytest.mark.parametrize("fingerprints", [True, False], ids=["fingerprints", "no_fingerprints"])
+def test____load___one_sheet_edited___rereads_only_that_sheet(
+    gradebook: generate.Gradebook, monkeypatch: pytest.MonkeyPatch, fingerprints: bool
+):
+    if not fingerprints:  # like the excel backend: sheets are told apart by their values
+        monkeypatch.setattr(ooxml.OoxmlWorkbook, "sheet_fingerprint", lambda self, name: None)
+    _load(gradebook)
+    _edit_one_score(gradebook)
+
+    _, engine, records = _load(gradebook)
+
+    assert engine.rows_read == 2 * len(gradebook.students) + 1  # names, then matching rows
+    edited = [
+        row
+        for rows in records.values()
+        for row in rows
+        if row[0] == "Assignment 2" and row[1] == 99
+    ]
+    assert len(edited) == 1
+
+
+def test____load___roster_written_and_saved___cache_still_valid_for_grade_sheets(
+    gradebook: generate.Gradebook,
+):
+    with student_teacher_gradebook.MainWorkbook(gradebook.teacher_book) as main_workbook:
+        student = main_workbook.roster[0]
+        main_workbook.update_students([(0, student._replace(student_file="a.xlsx"))])
+        _extraction.ExtractionEngine(main_workbook, main_workbook.roster).extract(gradebook.sheets)
+
+    main_workbook, engine, _ = _load(gradebook)
+
+    assert main_workbook.roster[0].student_file == "a.xlsx"
+    assert engine.rows_read == 0
+
+
+def test____load___corrupt_cache___rebuilt(gradebook: generate.Gradebook):
+    _, _, first_records = _load(gradebook)
+    _parse_cache.cache_path(gradebook.teacher_book).write_bytes(b"{not json")
+
+    _, engine, records = _load(gradebook)
+
+    assert engine.rows_read > 0
+    assert records == first_records
+
+
+def test____load___cache_disabled___no_cache_file(
+    gradebook: generate.Gradebook, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(student_teacher_gradebook._config, "PARSE_CACHE", False)
+
+    _load(gradebook)
+    _, engine, _ = _load(gradebook)
+
+    assert not _parse_cache.cache_path(gradebook.teacher_book).exists()
+    assert engine.rows_read > 0
+
+
+def test____load___config_cached_before_a_field_was_added___reread(
+    gradebook: generate.Gradebook,
+):
+    editor = student_teacher_gradebook._BaseWorkBook(gradebook.teacher_book)
+    editor.open()
+    config_rows = len(list(editor.get_block_range("Config", 1, "A", end_column_index="B")))
+    editor.set_block_range("Config", "A", config_rows + 1, [["Include Sheets:", "Assignment 1"]])
+    editor.save()
+    editor.close()
+    _load(gradebook)
+    # Make the cache look like one written before Include Sheets was a Config field.
+    path = _parse_cache.cache_path(gradebook.teacher_book)
+    saved = json.loads(path.read_text())
+    for entry in saved["entries"]:
+        if entry["kind"] == "config":
+            entry["extra"] = None
+            entry["value"]["include_sheets"] = None
+    path.write_text(json.dumps(saved))
+
+    main_workbook, _, _ = _load(gradebook)
+
+    assert main_workbook.config.include_sheets == "Assignment 1"
+
+
+class _Payload:
+    def __init__(self, marker: pathlib.Path) -> None:
+        self.marker = marker
+
+    def __reduce__(self):
+        return self.marker.touch, ()
+
+
+def test____load___pickle_in_place_of_cache___not_run(gradebook: generate.Gradebook):
+    _, _, first_records = _load(gradebook)
+    marker = gradebook.teacher_book.with_name("ran")
+    _parse_cache.cache_path(gradebook.teacher_book).write_bytes(pickle.dumps(_Payload(marker)))
+
+    _, engine, records = _load(gradebook)
+
+    assert not marker.exists()
+    assert engine.rows_read > 0
+    assert records == first_records
+
+
+def test____load___cached_sheet_rows_altered___reread(gradebook: generate.Gradebook):
+    _, _, first_records = _load(gradebook)
+    path = _parse_cache.cache_path(gradebook.teacher_book)
+    saved = json.loads(path.read_text())
+    for entry in saved["entries"]:
+        if entry["kind"] == "sheet_rows":
+            entry["value"]["offsets"] = "!!"
+    path.write_text(json.dumps(saved))
+
+    _, engine, records = _load(gradebook)
+
+    assert engine.rows_read == len(gradebook.sheets) * (2 * len(gradebook.students) + 1)
+    assert records == first_records
+
+
+def test____load___again_in_the_same_session___reuses_what_was_parsed(
+    gradebook: generate.Gradebook, mocker
+):
+    with student_teacher_gradebook.Session() as session:
+        _, _, first_records = _load(gradebook, session)
+        _edit_one_score(gradebook)
+        from_data = mocker.spy(_rowstore.SheetRows, "from_data")
+
+        _, engine, records = _load(gradebook, session)
+
+    assert from_data.call_count == 0  # kept in memory, not decoded from the file again
+    assert engine.rows_read == 2 * len(gradebook.students) + 1
+    assert sum(row[0] == "Assignment 1" for rows in records.values() for row in rows) == sum(
+        row[0] == "Assignment 1" for rows in first_records.values() for row in rows
+    )
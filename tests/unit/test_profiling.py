@@ -0,0 +1,95 @@
+import json
+import pathlib
+
+import click
+import pytest
+from benchmarks import generate
+
+import tests._utils
+from student_teacher_gradebook import _profiling
+
+STUDENTS = ["Ann", "Bo"]
+
+
+@pytest.fixture()
+def memory_gradebook(memory_teacher_book):
+    return memory_teacher_book(STUDENTS, {"Quiz": [[name, 1, 2, 3] for name in STUDENTS]}).parent
+
+
+def test____phase___not_profiling___records_nothing():
+    with _profiling.phase("anything"):
+        _profiling.count("cells_read", 10)
+
+    assert not _profiling.is_enabled()
+
+
+def test____profiling___nested_phases___writes_json_and_chrome_trace(tmp_path: pathlib.Path):
+    with _profiling.profiling(tmp_path / "profile.json", tmp_path / "trace.json"):
+        for _ in range(3):
+            with _profiling.phase("outer"), _profiling.phase("inner", student="Ann"):
+                _profiling.count("cells_read", 2)
+
+    profile = json.loads((tmp_path / "profile.json").read_text())
+    assert {phase["name"]: phase["count"] for phase in profile["phases"]} == {
+        "total": 1,
+        "outer": 3,
+        "inner": 3,
+    }
+    assert profile["counters"] == {"cells_read": 6}
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    assert {event["ph"] for event in trace["traceEvents"]} == {"X"}
+    assert len(trace["traceEvents"]) == 7
+
+
+def test____update_student_sheets___profile___counts_io_and_times_each_student(
+    memory_gradebook: pathlib.Path,
+    console_runner: tests._utils.RUNNER_TYPE,
+):
+    result = console_runner(["update-student-sheets", "--profile", "profile.json"])
+
+    assert not result.exception
+    profile = json.loads((memory_gradebook / "profile.json").read_text())
+    phases = {phase["name"]: phase for phase in profile["phases"]}
+    assert {"load_config", "load_roster", "extraction", "publish", "save"} <= set(phases)
+    assert phases["publish_student"]["count"] == len(STUDENTS)
+    assert (
+        sorted(
+            span["args"]["student"]
+            for span in profile["spans"]
+            if span["name"] == "publish_student"
+        )
+        == STUDENTS
+    )
+    assert profile["counters"]["workbook_opens"] == 1 + len(STUDENTS)
+    assert profile["counters"]["workbook_saves"] == len(STUDENTS)  # the teacher book is unchanged
+    assert profile["counters"]["cells_written"] == len(STUDENTS) * 4
+    assert "publish_student" in result.stdout
+
+
+def test____update_student_sheets___profile_with_jobs___merges_the_workers_counts_and_phases(
+    generated_gradebook: generate.Gradebook, console_runner: tests._utils.RUNNER_TYPE
+):
+    console_runner(["populate-student-sheets"])
+    students = len(generated_gradebook.students)
+
+    result = console_runner(["update-student-sheets", "--jobs", "2", "--profile", "profile.json"])
+
+    assert not result.exception
+    profile = json.loads(pathlib.Path("profile.json").read_text())
+    assert profile["counters"]["workbook_opens"] == 1 + students
+    assert profile["counters"]["workbook_saves"] == students
+    assert profile["counters"]["cells_written"] > 0
+    phases = {phase["name"]: phase["count"] for phase in profile["phases"]}
+    assert phases["open"] == 1 + students
+    assert phases["save"] == students
+    assert phases["copy_sheet_from"] == students
+
+
+@pytest.mark.parametrize("command", ["update-student-sheets", "populate-student-sheets"])
+def test____profile_trace___without_profile___rejected(
+    memory_gradebook: pathlib.Path, console_runner: tests._utils.RUNNER_TYPE, command: str
+):
+    with pytest.raises(click.UsageError, match="--profile-trace needs --profile"):
+        console_runner([command, "--profile-trace", "trace.json"])
+
+    assert not (memory_gradebook / "trace.json").exists()
@@ -0,0 +1,91 @@
+import errno
+import os
+import pathlib
+
+import pytest
+
+import student_teacher_gradebook
+from student_teacher_gradebook import _provisioning
+
+CONFIG = student_teacher_gradebook.Config("template.xlsx", "{name}.xlsx")
+
+
+@pytest.fixture()
+def template(temp_cwd: pathlib.Path) -> pathlib.Path:
+    template = temp_cwd / "template.xlsx"
+    template.write_bytes(os.urandom(100_000))
+    return template
+
+
+def test____plan___roster___copies_each_missing_file_once(temp_cwd: pathlib.Path):
+    (temp_cwd / "Bo.xlsx").touch()
+    roster = [
+        student_teacher_gradebook.StudentData("1", "Ann", None),
+        student_teacher_gradebook.StudentData("2", "Bo", None),
+        student_teacher_gradebook.StudentData("3", "Cy", "lost/Cy.xlsx"),
+        student_teacher_gradebook.StudentData("4", "Ann", None),
+    ]
+
+    steps = _provisioning.plan(roster, CONFIG, temp_cwd)
+
+    assert [(step.student_file, step.needs_copy, step.needs_roster_update) for step in steps] == [
+        ("Ann.xlsx", True, True),
+        ("Bo.xlsx", False, True),
+        ("lost/Cy.xlsx", True, False),
+        ("Ann.xlsx", False, True),
+    ]
+    assert steps[2].path == temp_cwd / "lost" / "Cy.xlsx"
+
+
+def test____plan___run_from_another_directory___files_beside_the_teacher_book(
+    temp_cwd: pathlib.Path,
+):
+    books = temp_cwd / "books"
+    books.mkdir()
+    (books / "Bo.xlsx").touch()
+    roster = [
+        student_teacher_gradebook.StudentData("1", "Ann", None),
+        student_teacher_gradebook.StudentData("2", "Bo", None),
+    ]
+
+    steps = _provisioning.plan(roster, CONFIG, books)
+
+    assert [(step.path, step.needs_copy) for step in steps] == [
+        (books / "Ann.xlsx", True),
+        (books / "Bo.xlsx", False),
+    ]
+
+
+def test____copy_files___many_targets___all_match_template(
+    template: pathlib.Path, temp_cwd: pathlib.Path
+):
+    targets = [temp_cwd / f"student{i}.xlsx" for i in range(40)]
+
+    _provisioning.copy_files(template, targets, workers=8)
+
+    assert all(target.read_bytes() == template.read_bytes() for target in targets)
+    assert not any(target.samefile(template) for target in targets)
+
+
+def test____copy_files___hardlink___links_to_template(
+    template: pathlib.Path, temp_cwd: pathlib.Path
+):
+    target = temp_cwd / "student.xlsx"
+
+    _provisioning.copy_files(template, [target], workers=2, hardlink=True)
+
+    assert target.samefile(template)
+
+
+def test____copy_files___copy_file_range_unsupported___falls_back(
+    template: pathlib.Path, temp_cwd: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+):
+    def unsupported(*args):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+    target = temp_cwd / "student.xlsx"
+
+    _provisioning.copy_files(template, [target], workers=1)
+
+    assert target.read_bytes() == template.read_bytes()
@@ -0,0 +1,97 @@
+import pathlib
+
+import pytest
+
+import student_teacher_gradebook
+import tests._utils
+from student_teacher_gradebook import _roster
+
+STUDENTS = [f"Student {i}" for i in range(25)]
+
+
+@pytest.fixture()
+def new_roster(temp_cwd: pathlib.Path, memory_backend, monkeypatch: pytest.MonkeyPatch):
+    teacher_book = temp_cwd / "TeacherBook.xlsx"
+    monkeypatch.setattr(student_teacher_gradebook._config, "TEACHER_BOOK", teacher_book)
+    roster = [["ID", "Student", "Workbook"]] + [[f"id{i}", name] for i, name in enumerate(STUDENTS)]
+    roster[3] = ["id2", "Student 2", "existing.xlsx"]
+    roster.insert(10, [])  # a blank row in the middle of the roster
+    memory_backend.add_workbook(
+        teacher_book,
+        {
+            "Config": [
+                ["Student Template Filename:", "studentTemplate.xlsx"],
+                ["Student Filename Format String:", "{name}.xlsx"],
+            ],
+            "Roster": roster,
+        },
+    )
+    memory_backend.CALLS.clear()
+    return teacher_book
+
+
+def test____populate_student_sheets___new_roster___writes_roster_in_one_pass(
+    new_roster: pathlib.Path, memory_backend, console_runner: tests._utils.RUNNER_TYPE
+):
+    result = console_runner("populate-student-sheets")
+
+    assert not result.exception
+    assert memory_backend.CALLS["get_block"] == 2  # Config and Roster, read once each
+    # one write per run of adjacent new students (split by the existing one and the blank row)
+    assert memory_backend.CALLS["set_block"] == 3
+    roster = memory_backend.sheet_rows(new_roster, "Roster")
+    assert roster[3] == ["id2", "Student 2", "existing.xlsx"]
+    assert roster[10] == [None, None, None]
+    assert roster[11] == ["id9", "Student 9", "Student 9.xlsx"]
+    assert all(row[2] for row in roster[1:] if row[1])
+    assert (new_roster.parent / "Student 24.xlsx").is_file()
+
+
+def test____update_students___chunk_size___splits_writes_and_updates_roster(
+    new_roster: pathlib.Path, memory_backend
+):
+    with student_teacher_gradebook.MainWorkbook(new_roster) as workbook:
+        memory_backend.CALLS.clear()
+        updates = [
+            (index, student._replace(student_file=f"{student.name}.xlsx"))
+            for index, student in enumerate(workbook.roster)
+            if index > 2
+        ]
+        workbook.update_students(updates, chunk_size=4)
+
+        assert memory_backend.CALLS["get_block"] == 0
+        assert memory_backend.CALLS["set_block"] == 2 + 4  # 6 rows before the gap, 16 after
+        assert workbook.roster[-1] == student_teacher_gradebook.StudentData(
+            "id24", "Student 24", "Student 24.xlsx"
+        )
+
+
+def test____update_students___roster_indexes___follow_the_update(
+    new_roster: pathlib.Path, memory_backend
+):
+    with student_teacher_gradebook.MainWorkbook(new_roster) as workbook:
+        roster = workbook.roster
+        by_name = workbook.roster_as_mapping
+        student = roster.by_id("id5")
+
+        workbook.update_student_values(5, student._replace(student_file="five.xlsx"))
+
+        assert workbook.roster is roster and memory_backend.CALLS["get_block"] == 2
+        assert by_name["Student 5"].student_file == "five.xlsx"
+        assert roster.by_file("five.xlsx") == roster[5] == by_name["Student 5"]
+        assert roster.by_file("existing.xlsx").name == "Student 2"
+
+
+def test____roster___replace_a_repeated_name___index_falls_back_to_the_other():
+    ann, other_ann, bo = (
+        student_teacher_gradebook.StudentData(id_, name, None)
+        for id_, name in [("1", "Ann"), ("2", "Ann"), ("3", "Bo")]
+    )
+    roster = _roster.Roster([ann, other_ann, bo], rows=[2, 3, 4])
+
+    assert roster.by_name["Ann"] is other_ann
+    roster.replace(1, other_ann._replace(name="Cy"))
+
+    assert roster.by_name["Ann"] is ann
+    assert roster.by_name["Cy"] == roster[1] and roster.row(1) == 3
+    assert roster == (ann, roster[1], bo)
@@ -0,0 +1,107 @@
+import datetime
+import json
+import pickle
+import tracemalloc
+
+import pytest
+
+from student_teacher_gradebook import _rowstore
+
+WHEN = datetime.datetime(2024, 1, 2, 3, 4)
+
+
+def _student_rows():
+    quiz = _rowstore.SheetRows("Quiz")
+    quiz.append("Ann", [1.5, None, "late", 7])
+    quiz.append("Bo", ["", True, WHEN, 2**60])
+    test = _rowstore.SheetRows("Test")
+    test.append("Ann", ["late"])
+    rows = _rowstore.StudentRows()
+    rows.add_sheet(quiz)
+    rows.add_sheet(test)
+    return rows
+
+
+def test____student_rows___mixed_values___read_back_as_lists_with_blanks_as_empty_text():
+    rows = _student_rows()
+
+    assert rows == {
+        "Ann": [["Quiz", 1.5, "", "late", 7], ["Test", "late"]],
+        "Bo": [["Quiz", "", True, WHEN, 2**60]],
+    }
+    assert type(rows["Ann"][0][4]) is int
+
+
+def test____student_view___indexing_and_slicing___behaves_like_list():
+    ann = _student_rows()["Ann"]
+
+    assert len(ann) == 2
+    assert ann[-1] == ["Test", "late"]
+    assert ann[0][1:3] == [1.5, ""]
+    assert len(ann[0]) == 5
+    assert [list(row) for row in ann[:1]] == [["Quiz", 1.5, "", "late", 7]]
+
+
+def test____student_view___pickled___becomes_plain_lists():
+    ann = pickle.loads(pickle.dumps(_student_rows()["Ann"]))
+
+    assert ann == [["Quiz", 1.5, "", "late", 7], ["Test", "late"]]
+    assert type(ann) is list and type(ann[0]) is list
+
+
+def test____sheet_rows___cached_then_appended___keeps_text_table():
+    sheet = _rowstore.SheetRows("Quiz")
+    sheet.append("Ann", ["late", 1.0])
+
+    sheet = _rowstore.SheetRows.from_data(json.loads(json.dumps(sheet.to_data())))
+    sheet.append("Bo", ["late", "early"])
+
+    assert [sheet.values(0), sheet.values(1)] == [["late", 1.0], ["late", "early"]]
+    assert sheet._texts == ["late", "early"]
+
+
+def test____sheet_rows___cached___mixed_values_round_trip():
+    quiz = _rowstore.SheetRows("Quiz")
+    quiz.append("Ann", [1.5, None, "late", 7])
+    quiz.append("Bo", ["", True, WHEN, 2**60])
+
+    cached = _rowstore.SheetRows.from_data(json.loads(json.dumps(quiz.to_data())))
+
+    assert cached.students == ["Ann", "Bo"]
+    assert [cached.values(0), cached.values(1)] == [[1.5, "", "late", 7], ["", True, WHEN, 2**60]]
+
+
+def test____sheet_rows___cached_data_out_of_range___rejected():
+    sheet = _rowstore.SheetRows("Quiz")
+    sheet.append("Ann", ["late"])
+    data = sheet.to_data()
+    data["texts"] = []
+
+    with pytest.raises(ValueError):
+        _rowstore.SheetRows.from_data(data)
+
+
+def test____student_rows___large_gradebook___far_smaller_than_lists():
+    def values(student, sheet):  # fresh objects, like cells read from a workbook
+        return [float(student * sheet + column) + 0.5 for column in range(20)]
+
+    tracemalloc.start()
+    lists = {}
+    for sheet in range(10):
+        for student in range(300):
+            lists.setdefault(f"S{student}", []).append([f"Sheet {sheet}"] + values(student, sheet))
+    list_bytes = tracemalloc.get_traced_memory()[0]
+    del lists
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    rows = _rowstore.StudentRows()
+    for sheet in range(10):
+        sheet_rows = _rowstore.SheetRows(f"Sheet {sheet}")
+        for student in range(300):
+            sheet_rows.append(f"S{student}", values(student, sheet))
+        rows.add_sheet(sheet_rows)
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert store_bytes * 2.5 < list_bytes
@@ -0,0 +1,154 @@
+import pathlib
+
+import pytest
+
+import student_teacher_gradebook
+import tests._utils
+from student_teacher_gradebook._backends import excel
+
+XL_CALCULATION_AUTOMATIC = -4105
+
+
+class _FakeSheet:
+    def __init__(self, workbook: "_FakeWorkbook", name: str) -> None:
+        self.workbook = workbook
+        self.Name = name
+
+    def Copy(self, Before):  # noqa: N802, N803 - COM names
+        target = Before.workbook
+        target.sheets.insert(target.sheets.index(Before), _FakeSheet(target, self.Name))
+
+
+class _FakeWorkbook:
+    def __init__(self, path: str, read_only: bool) -> None:
+        self.path = path
+        self.read_only = read_only
+        self.saved = self.closed = False
+        self.sheets = [_FakeSheet(self, "Sheet1")]
+
+    def Sheets(self, index):  # noqa: N802 - COM name
+        return self.sheets[index - 1]
+
+    def Save(self):  # noqa: N802 - COM name
+        self.saved = True
+
+    def Close(self, SaveChanges=None):  # noqa: N802, N803 - COM names
+        self.closed = True
+
+
+class _FakeWorkbooks:
+    def __init__(self) -> None:
+        self.opened = []
+
+    def Open(self, path: str, ReadOnly=False):  # noqa: N802, N803 - COM names
+        self.opened.append(_FakeWorkbook(path, ReadOnly))
+        return self.opened[-1]
+
+
+class _FakeExcel:
+    def __init__(self) -> None:
+        self.Visible = True
+        self.ScreenUpdating = True
+        self.Calculation = XL_CALCULATION_AUTOMATIC
+        self.Workbooks = _FakeWorkbooks()
+        self.quit_count = 0
+
+    def Quit(self):  # noqa: N802 - COM name
+        self.quit_count += 1
+
+
+@pytest.fixture()
+def fake_excel(monkeypatch: pytest.MonkeyPatch):
+    created = []
+
+    def dispatch(new_instance=False):
+        created.append(_FakeExcel())
+        return created[-1]
+
+    monkeypatch.setattr(excel, "_ensure_dispatch", dispatch)
+    monkeypatch.setattr(student_teacher_gradebook._config, "BACKEND", "excel")
+    return created
+
+
+def test____session___many_workbooks___dispatches_excel_once(fake_excel, tmp_path: pathlib.Path):
+    with student_teacher_gradebook.Session() as session:
+        for name in ["a", "b", "c"]:
+            workbook = student_teacher_gradebook.StudentWorkbook(
+                tmp_path / f"{name}.xlsx", session=session
+            )
+            workbook.open()
+            with session.bulk_edit():
+                assert fake_excel[0].ScreenUpdating is False
+                workbook.save()
+            workbook.close()
+        assert fake_excel[0].quit_count == 0
+
+    assert len(fake_excel) == 1
+    app = fake_excel[0]
+    assert app.Visible is False
+    assert app.quit_count == 1
+    assert (app.ScreenUpdating, app.Calculation) == (True, XL_CALCULATION_AUTOMATIC)
+    assert [(book.saved, book.closed) for book in app.Workbooks.opened] == [(True, True)] * 3
+
+
+def test____session___copy_from_template___opens_template_once(fake_excel, tmp_path: pathlib.Path):
+    template = tmp_path / "template.xlsx"
+    with student_teacher_gradebook.Session() as session:
+        for name in ["a", "b"]:
+            workbook = student_teacher_gradebook.StudentWorkbook(
+                tmp_path / f"{name}.xlsx", session=session
+            )
+            workbook.open()
+            workbook.copy_sheet_from(template, new_name="Progress_new")
+            assert [sheet.Name for sheet in workbook._workbook._workbook.sheets] == [
+                "Progress_new",
+                "Sheet1",
+            ]
+            workbook.close()
+
+    opened = fake_excel[0].Workbooks.opened
+    templates = [book for book in opened if book.path == str(template.resolve())]
+    assert [(book.read_only, book.closed) for book in templates] == [(True, True)]
+    assert templates[0].sheets[0].Name == "Sheet1"  # the template itself is left alone
+
+
+def test____workbook_without_session___close___quits_its_own_application(
+    fake_excel, tmp_path: pathlib.Path
+):
+    workbook = student_teacher_gradebook.StudentWorkbook(tmp_path / "a.xlsx")
+    workbook.open()
+    workbook.close()
+
+    assert [app.quit_count for app in fake_excel] == [1]
+
+
+def test____update_student_sheets___starts_one_application(
+    memory_backend, temp_cwd: pathlib.Path, console_runner: tests._utils.RUNNER_TYPE, monkeypatch
+):
+    teacher_book = temp_cwd / "TeacherBook.xlsx"
+    template = temp_cwd / "studentTemplate.xlsx"
+    monkeypatch.setattr(student_teacher_gradebook._config, "TEACHER_BOOK", teacher_book)
+    monkeypatch.setattr(student_teacher_gradebook._config, "STUDENT_TEMPLATE", template)
+    students = ["Ann", "Bo", "Cy"]
+    memory_backend.add_workbook(
+        teacher_book,
+        {
+            "Config": [
+                ["Student Template Filename:", "studentTemplate.xlsx"],
+                ["Student Filename Format String:", "{name}.xlsx"],
+            ],
+            "Roster": [["ID", "Student", "Workbook"]]
+            + [[str(i), name, f"{name}.xlsx"] for i, name in enumerate(students)],
+            "Quiz 1": [[name, 10] for name in students],
+        },
+    )
+    memory_backend.add_workbook(template, {"Sheet1": []})
+    template.write_bytes(b"")  # hashed by the publish manifest
+    for name in students:
+        memory_backend.add_workbook(temp_cwd / f"{name}.xlsx", {"Sheet1": []})
+
+    result = console_runner("update-student-sheets")
+
+    assert not result.exception
+    assert memory_backend.CALLS["create_application"] == 1
+    assert memory_backend.CALLS["open_workbook"] == 1 + len(students)
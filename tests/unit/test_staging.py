@@ -0,0 +1,79 @@
+import pathlib
+import typing
+
+import click
+import pytest
+from benchmarks import generate
+
+import tests._utils
+from student_teacher_gradebook import _publishing, _staging
+
+
+@pytest.fixture()
+def gradebook(
+    generated_gradebook: generate.Gradebook, console_runner: tests._utils.RUNNER_TYPE
+) -> generate.Gradebook:
+    console_runner(["populate-student-sheets"])
+    return generated_gradebook
+
+
+def _student_files(gradebook: generate.Gradebook) -> typing.Dict[str, bytes]:
+    return {
+        path.name: path.read_bytes()
+        for path in gradebook.teacher_book.parent.glob("*_gradebook.xlsx")
+    }
+
+
+def test____update_student_sheets___staged___publishes_every_workbook_and_cleans_up(
+    gradebook: generate.Gradebook, console_runner: tests._utils.RUNNER_TYPE
+):
+    before = _student_files(gradebook)
+
+    result = console_runner(["update-student-sheets", "--staged"])
+
+    assert not result.exception
+    assert f"Published {len(gradebook.students)} student workbook(s)." in result.stdout
+    after = _student_files(gradebook)
+    assert after.keys() == before.keys()
+    assert all(after[name] != before[name] for name in before)
+    assert not list(gradebook.teacher_book.parent.glob(".gradebook-staging-*"))
+
+
+def test____update_student_sheets___staged_with_a_failure___changes_no_workbook(
+    gradebook: generate.Gradebook,
+    console_runner: tests._utils.RUNNER_TYPE,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    before = _student_files(gradebook)
+    publish_student = _publishing.publish_student
+    failing = gradebook.students[-1]
+
+    def publish(session, job):
+        publish_student(session, job)
+        if job.student_name == failing:
+            raise OSError("disk full")
+
+    monkeypatch.setattr(_publishing, "publish_student", publish)
+
+    with pytest.raises(click.ClickException, match="No student workbooks were changed"):
+        console_runner(["update-student-sheets", "--staged"])
+
+    assert _student_files(gradebook) == before
+    assert not list(gradebook.teacher_book.parent.glob(".gradebook-staging-*"))
+
+
+def test____staging_area___commit___moves_only_changed_copies(tmp_path: pathlib.Path):
+    changed, unchanged = tmp_path / "changed.xlsx", tmp_path / "unchanged.xlsx"
+    changed.write_bytes(b"old")
+    unchanged.write_bytes(b"same")
+    staging = _staging.StagingArea(sync_batch_files=1)
+
+    staging.stage(changed).write_bytes(b"new")
+    staging.written(changed)
+    staging.stage(unchanged)
+
+    assert changed.read_bytes() == b"old"
+    assert staging.commit() == 1
+    assert changed.read_bytes() == b"new"
+    assert unchanged.read_bytes() == b"same"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["changed.xlsx", "unchanged.xlsx"]
@@ -0,0 +1,54 @@
+import itertools
+import pathlib
+
+import pytest
+from benchmarks import generate
+
+import student_teacher_gradebook
+import tests._utils
+from student_teacher_gradebook import _publishing, _watching
+
+
+def test____saves___burst_of_saves___reported_once_after_it_settles(tmp_path: pathlib.Path):
+    book = tmp_path / "book.xlsx"
+    book.write_bytes(b"0")
+    ticks = itertools.count()
+
+    def sleep(_):
+        tick = next(ticks)
+        if tick in (2, 3, 4):  # three saves, one poll apart
+            book.write_bytes(b"x" * tick)
+        if tick == 20:
+            book.write_bytes(b"later")
+
+    saves = _watching.saves(book, _watching.file_stamp(book), 1, 3, sleep=sleep)
+
+    assert next(saves)[0] == 4
+    assert next(saves)[0] == len(b"later")
+
+
+def test____watch___teacher_book_saved___republishes_only_changed_student(
+    generated_gradebook: generate.Gradebook,
+    console_runner: tests._utils.RUNNER_TYPE,
+    monkeypatch: pytest.MonkeyPatch,
+    mocker,
+):
+    console_runner(["populate-student-sheets"])
+
+    def saves(path, stamp, poll_seconds, debounce_seconds):
+        editor = student_teacher_gradebook._BaseWorkBook(path)
+        editor.open()
+        editor.set_block_range("Assignment 1", "B", 2, [["999"]])
+        editor.save()
+        editor.close()
+        yield _watching.file_stamp(path)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(_watching, "saves", saves)
+    publish = mocker.spy(_publishing, "publish_student")
+
+    result = console_runner(["watch"])
+
+    assert not result.exception
+    assert publish.call_count == len(generated_gradebook.students) + 1
+    assert "Stopped watching." in result.stdout